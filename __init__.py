@@ -12,16 +12,18 @@ from .nodes.rh_upload_image import RH_UploadImage
 from .nodes.rh_upload_video import RH_UploadVideo
 from .nodes.rh_upload_audio import RH_UploadAudio
 from .nodes.rh_load_audio_path import RH_LoadAudioPath
-# from .nodes.rh_upload_mask import RH_UploadMask
+from .nodes.rh_upload_mask import RH_UploadMask
 from .nodes.rh_upload_file import RH_UploadFile
 from .nodes.rh_upload_latent import RH_UploadLatent
 from .nodes.rh_batch_upload_image import RH_BatchUploadImage
+from .nodes.rh_upload_folder import RH_UploadFolder
 from .nodes.rh_multi_input_image import RH_MultiInputImage
 from .nodes.rh_utils import RH_ImageSelector, RH_TextDisplay
 from .nodes.rh_download import RH_Download
 from .nodes.rh_param_bundle import RH_ParamBundle
 from .nodes.rh_batch_execute import RH_BatchExecute
 from .nodes.rh_task_manager import RH_TaskManager
+from .nodes.rh_task_journal import resume_journaled_tasks
 
 NODE_CLASS_MAPPINGS = {
     # Core nodes
@@ -34,10 +36,11 @@ NODE_CLASS_MAPPINGS = {
     "RH_UploadVideo": RH_UploadVideo,
     "RH_UploadAudio": RH_UploadAudio,
     "RH_LoadAudioPath": RH_LoadAudioPath,
-    # "RH_UploadMask": RH_UploadMask,
+    "RH_UploadMask": RH_UploadMask,
     "RH_UploadFile": RH_UploadFile,
     "RH_UploadLatent": RH_UploadLatent,
     "RH_BatchUploadImage": RH_BatchUploadImage,
+    "RH_UploadFolder": RH_UploadFolder,
     "RH_MultiInputImage": RH_MultiInputImage,
 
     # Utility nodes
@@ -66,10 +69,11 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "RH_UploadVideo": "📤 RH Upload Video",
     "RH_UploadAudio": "📤 RH Upload Audio",
     "RH_LoadAudioPath": "🎵 RH Load Audio Path",
-    # "RH_UploadMask": "📤 RH Upload Mask",
+    "RH_UploadMask": "📤 RH Upload Mask",
     "RH_UploadFile": "📤 RH Upload File",
     "RH_UploadLatent": "📤 RH Upload Latent",
     "RH_BatchUploadImage": "📤 RH Batch Upload Image",
+    "RH_UploadFolder": "📁 RH Upload Folder",
     "RH_MultiInputImage": "📤 RH Multi-Input Image",
 
     # Utility nodes
@@ -87,6 +91,9 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "RH_TaskManager": "🛠️ RH Task Manager",
 }
 
+# Re-attach monitoring/downloads for tasks left in flight by a previous session
+resume_journaled_tasks()
+
 WEB_DIRECTORY = "js"
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS"]
 
@@ -0,0 +1,185 @@
+"""
+RH Audio Encoder - Encode ComfyUI AUDIO dicts in memory for upload
+FLAC (lossless) or Opus (compact lossy), with optional resampling and downmix to mono
+"""
+
+import shutil
+import subprocess
+import wave
+from io import BytesIO
+
+import numpy as np
+import torch
+
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+try:
+    import torchaudio
+    AUDIO_AVAILABLE = True
+except ImportError:
+    AUDIO_AVAILABLE = False
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+
+AUDIO_FORMATS = ["flac", "opus", "wav"]
+DEFAULT_OPUS_BITRATE_KBPS = 96
+# Opus only runs at these rates; anything else is resampled to 48 kHz
+OPUS_SAMPLE_RATES = (48000, 24000, 16000, 12000, 8000)
+
+# format -> (file extension, content type)
+AUDIO_FORMAT_INFO = {
+    "flac": (".flac", "audio/flac"),
+    "opus": (".ogg", "audio/ogg"),
+    "wav": (".wav", "audio/wav"),
+}
+
+
+def clip_waveform(audio, index=0):
+    """
+    One clip of an AUDIO dict as a [channels, samples] tensor, before any processing.
+
+    Accepts tensor, numpy or list waveforms shaped [B, C, T], [C, T] or [T].
+    """
+    if not isinstance(audio, dict) or "waveform" not in audio or "sample_rate" not in audio:
+        raise ValueError("Invalid audio: expected a dict with 'waveform' and 'sample_rate'")
+    waveform = audio["waveform"]
+    if not isinstance(waveform, torch.Tensor):
+        waveform = torch.as_tensor(np.asarray(waveform))
+    if waveform.ndim == 3:
+        waveform = waveform[index]
+    elif waveform.ndim == 1:
+        waveform = waveform.unsqueeze(0)
+    return waveform
+
+
+def prepare_waveform(audio, sample_rate=0, mono=False, index=0):
+    """
+    Take one clip of an AUDIO dict as a float32 [channels, samples] tensor.
+
+    Args:
+        audio: {"waveform": [B, C, T] or [C, T], "sample_rate": int}
+        sample_rate: Resample to this rate (0 = keep)
+        mono: Average the channels into one
+        index: Clip of the batch to use
+
+    Returns:
+        Tuple of (waveform [C, T], sample_rate)
+    """
+    waveform = clip_waveform(audio, index).detach().float().cpu()
+    source_rate = int(audio["sample_rate"])
+
+    if mono and waveform.shape[0] > 1:
+        waveform = waveform.mean(dim=0, keepdim=True)
+    if sample_rate and sample_rate != source_rate:
+        if not AUDIO_AVAILABLE:
+            raise Exception("Resampling audio needs torchaudio")
+        waveform = torchaudio.functional.resample(waveform, source_rate, sample_rate)
+        source_rate = sample_rate
+    return waveform, source_rate
+
+
+def _interleaved(waveform):
+    """[C, T] float tensor as a C-contiguous float32 [T, C] array clipped to [-1, 1]"""
+    return np.ascontiguousarray(waveform.clamp(-1.0, 1.0).t().numpy(), dtype=np.float32)
+
+
+def _encode_ffmpeg(waveform, sample_rate, codec_args, container):
+    command = [
+        FFMPEG_PATH, "-loglevel", "error",
+        "-f", "f32le", "-ar", str(sample_rate), "-ac", str(waveform.shape[0]), "-i", "-",
+        *codec_args, "-f", container, "-",
+    ]
+    result = subprocess.run(command, input=memoryview(_interleaved(waveform)).cast("B"), capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg failed to encode audio: {result.stderr.decode('utf-8', 'replace').strip()}")
+    return BytesIO(result.stdout)
+
+
+def _encode_wav(waveform, sample_rate):
+    pcm = (_interleaved(waveform) * 32767.0).round().astype("<i2")
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(waveform.shape[0])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer
+
+
+def _encode_flac(waveform, sample_rate):
+    if SOUNDFILE_AVAILABLE:
+        buffer = BytesIO()
+        soundfile.write(buffer, _interleaved(waveform), sample_rate, format="FLAC", subtype="PCM_16")
+        return buffer
+    if AUDIO_AVAILABLE:
+        try:
+            buffer = BytesIO()
+            torchaudio.save(buffer, waveform, sample_rate, format="flac", bits_per_sample=16)
+            return buffer
+        except Exception as e:
+            if not FFMPEG_PATH:
+                raise
+            print(f"⚠️ torchaudio could not encode FLAC ({e}), using ffmpeg")
+    if FFMPEG_PATH:
+        return _encode_ffmpeg(waveform, sample_rate, ["-c:a", "flac", "-sample_fmt", "s16"], "flac")
+    raise Exception("Encoding FLAC needs soundfile, torchaudio or ffmpeg on PATH")
+
+
+def _encode_opus(waveform, sample_rate, bitrate_kbps, output_rate):
+    if FFMPEG_PATH:
+        # ffmpeg resamples to output_rate itself, so torchaudio is not needed
+        return _encode_ffmpeg(waveform, sample_rate,
+                              ["-c:a", "libopus", "-b:a", f"{bitrate_kbps}k", "-ar", str(output_rate)], "ogg")
+    if SOUNDFILE_AVAILABLE:
+        if sample_rate != output_rate:
+            if not AUDIO_AVAILABLE:
+                raise Exception("Encoding Opus at this sample rate without ffmpeg needs torchaudio to resample")
+            waveform = torchaudio.functional.resample(waveform, sample_rate, output_rate)
+            sample_rate = output_rate
+        # libsndfile picks the Opus bitrate itself
+        buffer = BytesIO()
+        soundfile.write(buffer, _interleaved(waveform), sample_rate, format="OGG", subtype="OPUS")
+        return buffer
+    raise Exception("Encoding Opus needs ffmpeg on PATH or soundfile")
+
+
+def encode_audio(audio, audio_format="flac", sample_rate=0, mono=False, bitrate_kbps=DEFAULT_OPUS_BITRATE_KBPS):
+    """
+    Encode an AUDIO dict into an in-memory file.
+
+    Args:
+        audio: ComfyUI AUDIO dict
+        audio_format: "flac" (lossless, 16-bit), "opus" (Ogg Opus at bitrate_kbps) or "wav" (16-bit PCM)
+        sample_rate: Resample to this rate (0 = keep; Opus uses 48 kHz unless it is one of OPUS_SAMPLE_RATES)
+        mono: Downmix to a single channel
+        bitrate_kbps: Opus bitrate
+
+    Returns:
+        Tuple of (BytesIO rewound to 0, file extension, content type)
+    """
+    output_rate = sample_rate
+    if audio_format == "opus":
+        output_rate = sample_rate or int(audio.get("sample_rate", 0))
+        if output_rate not in OPUS_SAMPLE_RATES:
+            output_rate = 48000
+        # The Opus encoders resample on their own (see _encode_opus)
+        sample_rate = 0
+    waveform, sample_rate = prepare_waveform(audio, sample_rate, mono)
+    if waveform.shape[-1] == 0:
+        raise ValueError("Audio is empty")
+
+    if audio_format == "flac":
+        buffer = _encode_flac(waveform, sample_rate)
+    elif audio_format == "opus":
+        buffer = _encode_opus(waveform, sample_rate, bitrate_kbps, output_rate)
+    elif audio_format == "wav":
+        buffer = _encode_wav(waveform, sample_rate)
+    else:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+    buffer.seek(0)
+    extension, content_type = AUDIO_FORMAT_INFO[audio_format]
+    return buffer, extension, content_type
@@ -2,13 +2,18 @@
 RH_BatchExecute Node - Execute a batch of tasks on RunningHub
 """
 
-import json
-import requests
-from .rh_utils import _validate_config
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .rh_utils import _validate_config, create_task
+from .rh_transport import TokenBucket
+from .rh_task_scheduler import get_task_scheduler, PRIORITY_BATCH
+from .rh_deferred_upload import resolve_deferred_uploads
 
 class RH_BatchExecute:
     """
     A node to execute a batch of tasks on RunningHub using a parameter bundle.
+    Tasks are submitted concurrently, rate limited and retried on transient errors.
+    Submissions wait in the account's task queue while all concurrent slots are in use.
     """
 
     @classmethod
@@ -18,6 +23,37 @@ class RH_BatchExecute:
                 "config": ("RH_CONFIG", ),
                 "workflow_id": ("STRING", {"multiline": False, "default": ""}),
                 "param_bundle": ("RH_PARAM_BUNDLE", ),
+            },
+            "optional": {
+                "use_high_performance": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Use RTX 4090 48GB instance (costs more credits)"
+                }),
+                "max_concurrency": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 32,
+                    "tooltip": "Maximum number of submissions in flight at once"
+                }),
+                "requests_per_second": ("FLOAT", {
+                    "default": 2.0,
+                    "min": 0.1,
+                    "max": 50.0,
+                    "step": 0.1,
+                    "tooltip": "Sustained submission rate limit (token bucket)"
+                }),
+                "max_retries": ("INT", {
+                    "default": 3,
+                    "min": 1,
+                    "max": 10,
+                    "tooltip": "Attempts per task for transient errors (business errors are never retried)"
+                }),
+                "timeout": ("INT", {
+                    "default": 3600,
+                    "min": 60,
+                    "max": 86400,
+                    "tooltip": "Maximum time to wait for free task slots for the whole batch (seconds); tasks still queued then are reported as failed"
+                }),
             }
         }
 
@@ -26,56 +62,65 @@ class RH_BatchExecute:
     FUNCTION = "batch_execute"
     CATEGORY = "Ken-Chen/RH-API"
 
-    def batch_execute(self, config, workflow_id, param_bundle):
+    def batch_execute(self, config, workflow_id, param_bundle, use_high_performance=False,
+                      max_concurrency=4, requests_per_second=2.0, max_retries=3, timeout=3600):
         """
         Executes a task for each parameter set in the bundle.
+
+        Task IDs are returned in bundle order; failed submissions are skipped.
+        If workflow_id is empty, the workflow/app ID from the config is used.
+        Submissions still waiting for a slot after `timeout` seconds are dropped.
         """
         _validate_config(config)
-        api_key = config["api_key"]
-        base_url = config["base_url"]
 
+        workflow_id = (workflow_id or "").strip() or config.get("workflow_or_app_id", "")
         if not workflow_id:
             raise ValueError("Workflow ID is required.")
         if not isinstance(param_bundle, list) or not param_bundle:
             raise ValueError("Parameter bundle is invalid or empty.")
 
-        print(f"🚀 Starting Batch Execution for {len(param_bundle)} tasks...")
-        task_ids = []
-        # Use the correct endpoint for creating tasks, same as in rh_execute
-        url = f"{base_url}/task/openapi/create"
-
-        for i, params_list in enumerate(param_bundle):
-            print(f"  - Submitting task {i+1}/{len(param_bundle)}...")
-            try:
-                # Use the correct payload structure with 'nodeInfoList'
-                payload = {
-                    "apiKey": api_key,
-                    "workflowId": workflow_id,
-                    "nodeInfoList": params_list,
-                }
-
-                headers = {'Content-Type': 'application/json'}
-                response = requests.post(url, data=json.dumps(payload), headers=headers, timeout=20)
-                response.raise_for_status()
-                result = response.json()
+        # Pending uploads of every parameter set go out together, each distinct file once
+        param_bundle = resolve_deferred_uploads(param_bundle)
 
-                if result.get("code") == 0 and result.get("data", {}).get("taskId"):
-                    task_id = result["data"]["taskId"]
-                    task_ids.append(task_id)
-                    print(f"    ✓ Task submitted successfully. Task ID: {task_id}")
-                else:
-                    error_msg = result.get("msg", "Unknown error")
-                    print(f"    ❌ Task submission failed: {error_msg}")
+        total = len(param_bundle)
+        print(f"🚀 Starting Batch Execution for {total} tasks "
+              f"(concurrency {max_concurrency}, {requests_per_second:g} req/s)...")
+        rate_limiter = TokenBucket(requests_per_second, capacity=max_concurrency)
+        scheduler = get_task_scheduler(config)
+        deadline = time.time() + timeout
 
+        def submit(index, params_list):
+            try:
+                # Batch jobs yield to interactive RH_Execute submissions
+                future = scheduler.submit(
+                    lambda: create_task(
+                        config, params_list, use_high_performance, workflow_id=workflow_id,
+                        source="RH_BatchExecute", max_retries=max_retries, rate_limiter=rate_limiter
+                    ),
+                    priority=PRIORITY_BATCH
+                )
+                try:
+                    task_id, _ = future.result(timeout=max(0, deadline - time.time()))
+                except FutureTimeoutError:
+                    if not scheduler.cancel(future):
+                        print(f"    ⚠️ Task {index + 1}/{total} submission was already in flight; "
+                              f"if it succeeds it is listed in the task journal")
+                    raise TimeoutError(f"no free task slot on RunningHub within {timeout} seconds")
+                print(f"    ✓ Task {index + 1}/{total} submitted successfully. Task ID: {task_id}")
+                return task_id
             except Exception as e:
-                print(f"    ❌ An exception occurred during task submission: {e}")
+                print(f"    ❌ Task {index + 1}/{total} submission failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, total)) as executor:
+            results = list(executor.map(submit, range(total), param_bundle))
 
+        task_ids = [task_id for task_id in results if task_id]
         if not task_ids:
             raise Exception("All task submissions failed for the batch.")
 
         # Return a comma-separated string of task IDs
         task_id_string = ",".join(task_ids)
-        print(f"✅ Batch submission complete. Task IDs: {task_id_string}")
-        
-        return (task_id_string,)
+        print(f"✅ Batch submission complete ({len(task_ids)}/{total}). Task IDs: {task_id_string}")
 
+        return (task_id_string,)
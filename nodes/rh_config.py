@@ -5,6 +5,8 @@ Simplified configuration with clear parameter names
 
 import json
 import os
+from .rh_transport import get_transport, DEFAULT_POOL_SIZE
+from .rh_image_encoder import ENCODER_BACKENDS, IMAGE_FORMATS, DEFAULT_PNG_COMPRESS_LEVEL, DEFAULT_QUALITY
 
 class RH_Config:
     """
@@ -61,6 +63,35 @@ class RH_Config:
                     "default": False,
                     "tooltip": "Enable this if calling an AI App instead of a workflow"
                 }),
+                "use_upload_cache": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Reuse previous uploads of identical files instead of uploading them again"
+                }),
+                "webhook_public_url": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "tooltip": "Public base URL of this ComfyUI (e.g. https://my-host:8188) to receive completion webhooks; leave empty to use polling only"
+                }),
+                "image_format": (IMAGE_FORMATS, {
+                    "default": "png",
+                    "tooltip": "Format used to upload images: png, lossless WebP, high-quality WebP/JPEG, or auto (cheapest encoding under image_size_target_mb from config.json)"
+                }),
+                "image_encoder": (ENCODER_BACKENDS, {
+                    "default": "pil",
+                    "tooltip": "Library used to encode uploaded images (opencv is usually faster for large images)"
+                }),
+                "png_compress_level": ("INT", {
+                    "default": DEFAULT_PNG_COMPRESS_LEVEL,
+                    "min": 0,
+                    "max": 9,
+                    "tooltip": "PNG compression level: lower is faster to encode, higher gives smaller uploads"
+                }),
+                "image_quality": ("INT", {
+                    "default": DEFAULT_QUALITY,
+                    "min": 50,
+                    "max": 100,
+                    "tooltip": "Quality for lossy WebP/JPEG uploads"
+                }),
             }
         }
     
@@ -69,7 +100,9 @@ class RH_Config:
     FUNCTION = "create_config"
     CATEGORY = "Ken-Chen/RH-API"
     
-    def create_config(self, api_key, workflow_or_app_id, base_url, is_ai_app=False):
+    def create_config(self, api_key, workflow_or_app_id, base_url, is_ai_app=False, use_upload_cache=True,
+                      webhook_public_url="", image_format="png", image_encoder="pil",
+                      png_compress_level=DEFAULT_PNG_COMPRESS_LEVEL, image_quality=DEFAULT_QUALITY):
         """
         Create configuration dictionary for RunningHub API
 
@@ -78,6 +111,12 @@ class RH_Config:
             workflow_or_app_id: Workflow ID or AI App ID
             base_url: API base URL (if empty, loads from config.json)
             is_ai_app: Whether this is an AI App (True) or workflow (False)
+            use_upload_cache: Whether upload nodes may reuse cached uploads
+            webhook_public_url: Public URL for completion webhooks (if empty, loads from config.json)
+            image_format: Format used by image upload nodes
+            image_encoder: Encoding backend used by image upload nodes ("pil" or "opencv")
+            png_compress_level: PNG compression level (0-9)
+            image_quality: Quality for lossy formats
 
         Returns:
             Configuration dictionary
@@ -88,6 +127,7 @@ class RH_Config:
         # Node inputs have the highest priority. Use file config as a fallback.
         final_api_key = api_key.strip() if api_key and api_key.strip() else file_config.get("api_key", "")
         final_base_url = base_url.strip() if base_url and base_url.strip() else file_config.get("base_url", "https://www.runninghub.cn")
+        final_webhook_url = webhook_public_url.strip() if webhook_public_url and webhook_public_url.strip() else file_config.get("webhook_public_url", "")
         final_workflow_id = workflow_or_app_id.strip() if workflow_or_app_id and workflow_or_app_id.strip() else file_config.get("workflow_or_app_id", "")
 
         # Validate required fields
@@ -102,8 +142,18 @@ class RH_Config:
             "workflow_or_app_id": final_workflow_id,
             "base_url": final_base_url,
             "is_ai_app": is_ai_app,
+            "use_upload_cache": use_upload_cache,
+            "http_pool_size": int(file_config.get("http_pool_size", DEFAULT_POOL_SIZE)),
+            "webhook_public_url": final_webhook_url,
+            "image_format": image_format,
+            "image_encoder": image_encoder,
+            "png_compress_level": png_compress_level,
+            "image_quality": image_quality,
         }
 
+        # One pooled keep-alive transport per base URL, shared by every node using this config
+        get_transport(final_base_url, pool_size=config["http_pool_size"])
+
         # Show where values came from
         api_source = "node input" if (api_key and api_key.strip()) else "config.json"
         base_url_source = "node input" if (base_url and base_url.strip()) else "config.json"
@@ -113,6 +163,8 @@ class RH_Config:
         print(f"  API Key: loaded from {api_source}")
         print(f"  Workflow ID: loaded from {workflow_id_source}")
         print(f"  Base URL: {final_base_url} (from {base_url_source})")
+        if final_webhook_url:
+            print(f"  Webhook: completion callbacks via {final_webhook_url}")
 
         return (config,)
 
@@ -0,0 +1,104 @@
+"""
+RH Deferred Upload - Upload handles resolved concurrently right before task creation
+Upload nodes can put a handle into RH_PARAMS instead of uploading immediately
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .rh_upload_pipeline import get_upload_concurrency
+
+
+class DeferredUpload:
+    """
+    A pending upload used as a fieldValue in RH_PARAMS.
+
+    `upload_fn` performs the upload and returns the RunningHub fileName. It runs
+    at most once; later `resolve()` calls return the same name. `dedupe_key`
+    identifies the content (tensor hash, file stat key, ...) so identical
+    handles in one submission are uploaded once.
+    """
+
+    def __init__(self, upload_fn, dedupe_key, label):
+        self.upload_fn = upload_fn
+        self.dedupe_key = dedupe_key
+        self.label = label
+        self._result = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        with self._lock:
+            if self._result is None:
+                self._result = self.upload_fn()
+                if not self._result:
+                    raise Exception(f"Deferred upload of {self.label} returned no file name")
+            return self._result
+
+    def __str__(self):
+        return self._result or f"<deferred upload: {self.label}>"
+
+    __repr__ = __str__
+
+
+def filename_output(value):
+    """
+    Value for an upload node's `filename` STRING output.
+
+    A pending upload has no fileName yet, so the output is empty; only the
+    node's params output carries the upload.
+    """
+    return "" if isinstance(value, DeferredUpload) else str(value)
+
+
+def _collect(params_lists):
+    handles = {}
+    for params in params_lists:
+        for param in params or []:
+            value = param.get("fieldValue") if isinstance(param, dict) else None
+            if isinstance(value, DeferredUpload):
+                handles.setdefault(value.dedupe_key or id(value), []).append(value)
+    return handles
+
+
+def resolve_deferred_uploads(params_lists, max_workers=None):
+    """
+    Upload every pending handle in one or more RH_PARAMS lists concurrently.
+
+    Handles with the same dedupe_key are uploaded once. Returns new lists in
+    which each DeferredUpload fieldValue is replaced by its fileName; the input
+    lists are not modified.
+
+    Args:
+        params_lists: List of RH_PARAMS lists (one per task)
+        max_workers: Uploads in flight (defaults to `upload_concurrency` in config.json)
+
+    Returns:
+        list: Resolved RH_PARAMS lists, in the same order
+    """
+    handles = _collect(params_lists)
+    if handles:
+        groups = list(handles.values())
+        workers = min(len(groups), max_workers or get_upload_concurrency())
+        print(f"📤 Resolving {sum(len(g) for g in groups)} deferred upload(s) "
+              f"({len(groups)} unique, {workers} in parallel)...")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rh-deferred") as executor:
+            names = list(executor.map(lambda group: group[0].resolve(), groups))
+        # Duplicates share the first handle's upload
+        for group, name in zip(groups, names):
+            for handle in group[1:]:
+                with handle._lock:
+                    handle._result = name
+
+    resolved = []
+    for params in params_lists:
+        resolved.append([
+            dict(param, fieldValue=param["fieldValue"].resolve())
+            if isinstance(param, dict) and isinstance(param.get("fieldValue"), DeferredUpload) else param
+            for param in params or []
+        ])
+    return resolved
+
+
+def resolve_deferred_params(params):
+    """Single-task shortcut for resolve_deferred_uploads"""
+    return resolve_deferred_uploads([params or []])[0]
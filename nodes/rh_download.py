@@ -4,7 +4,9 @@ RH_Download Node - Download results from a RunningHub task
 
 import torch
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from .rh_task_monitor import get_task_monitor
 from .rh_utils import _monitor_task, _get_outputs, _create_placeholder_image, _create_placeholder_latent, _create_placeholder_audio
+from .rh_remote_files import make_remote_files, merge_remote_files
 
 class RH_Download:
     """
@@ -43,22 +45,25 @@ class RH_Download:
             }
         }
 
-    RETURN_TYPES = ("IMAGE", "IMAGE", "STRING", "AUDIO", "VIDEO", "LATENT")
-    RETURN_NAMES = ("images", "video_frames", "text", "audio", "video", "latent")
+    RETURN_TYPES = ("IMAGE", "IMAGE", "STRING", "AUDIO", "VIDEO", "LATENT", "RH_REMOTE_FILES")
+    RETURN_NAMES = ("images", "video_frames", "text", "audio", "video", "latent", "remote_files")
     FUNCTION = "download"
     CATEGORY = "Ken-Chen/RH-API"
     OUTPUT_NODE = True
 
     def _process_single_task(self, task_id, config, timeout, save_to_local, output_prefix):
-        """Processes a single task ID: monitors, downloads, and returns results."""
+        """
+        Processes a single task ID: monitors, downloads, and returns results.
+        The last element is the task's RH_REMOTE_FILES handle.
+        """
         try:
             print(f"  - Starting processing for task ID: {task_id}...")
-            _monitor_task(task_id, config, timeout)
-            outputs = _get_outputs(task_id, config, save_to_local, output_prefix)
+            task_outputs = _monitor_task(task_id, config, timeout)
+            outputs = _get_outputs(task_id, config, save_to_local, output_prefix, outputs=task_outputs)
             if outputs is None:
                 raise Exception("Task completed with no output.")
             print(f"    ✓ Task {task_id} processed successfully.")
-            return outputs
+            return outputs + (make_remote_files(task_id, task_outputs),)
         except Exception as e:
             print(f"    ❌ Failed to process task {task_id}: {e}")
             return (
@@ -67,7 +72,8 @@ class RH_Download:
                 f"ERROR: {e}",
                 _create_placeholder_audio(),
                 None,
-                _create_placeholder_latent()
+                _create_placeholder_latent(),
+                None
             )
 
     def download(self, config, task_id, timeout=600, save_to_local=True, output_prefix="RH_DL"):
@@ -94,25 +100,36 @@ class RH_Download:
         all_results = [None] * len(task_ids)
 
         if is_batch:
-            with ThreadPoolExecutor(max_workers=min(10, len(task_ids))) as executor:
-                future_to_index = {
-                    executor.submit(self._process_single_task, tid, config, timeout, save_to_local, f"{output_prefix}_{i+1}"): i
-                    for i, tid in enumerate(task_ids)
-                }
-                for future in as_completed(future_to_index):
-                    index = future_to_index[future]
-                    try:
-                        all_results[index] = future.result()
-                    except Exception as e:
-                        print(f"    ❌ An unexpected exception occurred for task at index {index}: {e}")
-                        all_results[index] = (
-                            _create_placeholder_image(f"Failed: {task_ids[index]}"),
-                            _create_placeholder_image("Failed"),
-                            f"ERROR: {e}",
-                            _create_placeholder_audio(),
-                            None,
-                            _create_placeholder_latent()
-                        )
+            # Register every task with the shared monitor up front so all of them are
+            # polled from the start, even those still waiting for a download worker
+            monitor = get_task_monitor()
+            for tid in task_ids:
+                monitor.watch(tid, config)
+
+            try:
+                with ThreadPoolExecutor(max_workers=min(10, len(task_ids))) as executor:
+                    future_to_index = {
+                        executor.submit(self._process_single_task, tid, config, timeout, save_to_local, f"{output_prefix}_{i+1}"): i
+                        for i, tid in enumerate(task_ids)
+                    }
+                    for future in as_completed(future_to_index):
+                        index = future_to_index[future]
+                        try:
+                            all_results[index] = future.result()
+                        except Exception as e:
+                            print(f"    ❌ An unexpected exception occurred for task at index {index}: {e}")
+                            all_results[index] = (
+                                _create_placeholder_image(f"Failed: {task_ids[index]}"),
+                                _create_placeholder_image("Failed"),
+                                f"ERROR: {e}",
+                                _create_placeholder_audio(),
+                                None,
+                                _create_placeholder_latent(),
+                                None
+                            )
+            finally:
+                for tid in task_ids:
+                    monitor.unwatch(tid)
         else:
             all_results[0] = self._process_single_task(task_ids[0], config, timeout, save_to_local, output_prefix)
 
@@ -123,10 +140,11 @@ class RH_Download:
         first_audio = next((res[3] for res in all_results if res[3] is not None), _create_placeholder_audio())
         first_video = next((res[4] for res in all_results if res[4] is not None), None)
         final_latents = {key: torch.cat([res[5][key] for res in all_results], dim=0) for key in all_results[0][5].keys()}
+        remote_files = merge_remote_files([res[6] for res in all_results])
 
         print("\n" + "=" * 60)
         print(f"✅ Batch Download completed successfully.")
         print("=" * 60)
 
-        return (final_images, final_video_frames, final_text, first_audio, first_video, final_latents)
+        return (final_images, final_video_frames, final_text, first_audio, first_video, final_latents, remote_files)
 
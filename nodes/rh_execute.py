@@ -3,12 +3,18 @@ RH_Execute Node - Execute RunningHub workflows and AI apps
 Simplified execution with automatic progress tracking and output handling
 """
 
-import requests
 import time
-import json
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Import shared logic from rh_utils
-from .rh_utils import _monitor_task, _get_outputs, _create_placeholder_image
+from .rh_utils import _monitor_task, _get_outputs, _create_placeholder_image, _create_placeholder_latent, create_task
+from .rh_task_monitor import get_task_monitor
+from .rh_websocket import start_progress_channel
+from .rh_task_journal import get_task_journal
+from .rh_result_cache import get_result_cache, compute_result_key, outputs_still_available
+from .rh_task_scheduler import get_task_scheduler, PRIORITY_INTERACTIVE
+from .rh_remote_files import make_remote_files
+from .rh_deferred_upload import resolve_deferred_params
 
 try:
     import comfy.utils
@@ -58,17 +64,30 @@ class RH_Execute:
                     "multiline": False,
                     "tooltip": "Prefix for saved files (e.g., 'RH' -> 'RH_001.png')"
                 }),
+                "use_websocket": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Listen for completion on the task's WebSocket (falls back to HTTP polling automatically)"
+                }),
+                "use_result_cache": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Reuse outputs of an identical earlier submission (same workflow and parameters) instead of running again"
+                }),
+                "download_outputs": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "Download and decode outputs locally. Disable when only chaining remote_files into another RunningHub task"
+                }),
             },
         }
     
-    RETURN_TYPES = ("IMAGE", "IMAGE", "STRING", "AUDIO", "VIDEO", "LATENT", "STRING")
-    RETURN_NAMES = ("images", "video_frames", "text", "audio", "video", "latent", "task_id")
+    RETURN_TYPES = ("IMAGE", "IMAGE", "STRING", "AUDIO", "VIDEO", "LATENT", "STRING", "RH_REMOTE_FILES")
+    RETURN_NAMES = ("images", "video_frames", "text", "audio", "video", "latent", "task_id", "remote_files")
     FUNCTION = "execute"
     CATEGORY = "Ken-Chen/RH-API"
     OUTPUT_NODE = True
     
     def execute(self, config, params=None, timeout=600, use_high_performance=False,
-                save_to_local=True, output_prefix="RH"):
+                save_to_local=True, output_prefix="RH", use_websocket=False, use_result_cache=False,
+                download_outputs=True):
         """
         Execute RunningHub workflow or AI app
 
@@ -79,9 +98,12 @@ class RH_Execute:
             use_high_performance: Use high-performance instance
             save_to_local: Save outputs to local directory
             output_prefix: Prefix for saved files
+            use_websocket: Use the task's WebSocket for push completion events
+            use_result_cache: Reuse outputs of an identical earlier submission
+            download_outputs: Download outputs locally (off: only the remote_files handle is returned)
 
         Returns:
-            Tuple of (images, video_frames, text, audio, video)
+            Tuple of (images, video_frames, text, audio, video, latent, task_id, remote_files)
         """
         print("=" * 60)
         print("🚀 Starting RunningHub Execution")
@@ -89,18 +111,38 @@ class RH_Execute:
 
         # Validate config
         self._validate_config(config)
-        
-        # Create task
-        task_id = self._create_task(config, params or [], use_high_performance)
-        print(f"✓ Task created: {task_id}")
-        
-        # Monitor task using shared utility function
-        _monitor_task(task_id, config, timeout)
-        print("✓ Task completed")
 
-        # Get and process outputs using shared utility function
-        outputs = _get_outputs(task_id, config, save_to_local, output_prefix)
-        print("✓ Outputs processed")
+        # Upload files deferred by upload nodes, all at once (the result cache keys on file names)
+        params = resolve_deferred_params(params or [])
+
+        # Reuse outputs of an identical earlier submission if allowed
+        result_cache = get_result_cache() if use_result_cache else None
+        result_key = None
+        cached = None
+        if result_cache is not None:
+            result_key = compute_result_key(config, params or [], use_high_performance)
+            cached = result_cache.lookup(config, result_key)
+            if cached and not outputs_still_available(cached[1]):
+                print("ℹ Cached result has expired on RunningHub, running the task again")
+                result_cache.invalidate(config, result_key)
+                cached = None
+
+        if cached:
+            task_id, task_outputs = cached
+            print(f"✓ Identical submission found, reusing outputs of task {task_id}")
+        else:
+            task_id, task_outputs = self._run_task(config, params or [], timeout, use_high_performance,
+                                                   save_to_local and download_outputs, output_prefix, use_websocket)
+            if result_cache is not None and task_outputs:
+                result_cache.store(config, result_key, task_id, task_outputs)
+
+        # Process the outputs handed over by the monitor
+        if download_outputs:
+            outputs = _get_outputs(task_id, config, save_to_local, output_prefix, outputs=task_outputs)
+            print("✓ Outputs processed")
+        else:
+            outputs = None
+            print(f"ℹ Outputs left on RunningHub ({len(task_outputs or [])} files), available through remote_files")
 
         # Handle case where task completes with no output
         if outputs is None:
@@ -109,16 +151,58 @@ class RH_Execute:
                 _create_placeholder_image("No video output"),
                 "",
                 None,
-                None
+                None,
+                _create_placeholder_latent()
             )
 
         print("=" * 60)
         print("✅ Execution completed successfully")
         print("=" * 60)
 
-        return outputs + (task_id,)
+        # Handle to the outputs on RunningHub, for chaining into the next task without a local round trip
+        return outputs + (task_id, make_remote_files(task_id, task_outputs))
+
+
 
+    def _run_task(self, config, params, timeout, use_high_performance, save_to_local, output_prefix,
+                  use_websocket):
+        """Create a task and wait for it; returns (task_id, outputs list)"""
+        # The timeout covers waiting for a free slot as well as the run itself
+        deadline = time.time() + timeout
+
+        # Create task
+        task_id, task_info = self._create_task(config, params, use_high_performance, timeout)
+        print(f"✓ Task created: {task_id}")
+        timeout = max(1, int(deadline - time.time()))
 
+        journal = get_task_journal()
+        if journal is not None:
+            try:
+                journal.set_delivery(task_id, save_to_local, output_prefix)
+            except Exception as e:
+                print(f"⚠️ Could not update task journal: {e}")
+
+        # Optionally listen for push events; the monitor keeps polling as a safety net
+        channel = None
+        monitor = get_task_monitor()
+        if use_websocket:
+            monitor.watch(task_id, config, timeout)
+            channel = start_progress_channel(task_id, task_info.get("netWssUrl"))
+        elif config.get("webhook_public_url"):
+            print("ℹ Waiting for webhook callback (HTTP polling as safety net)")
+        else:
+            print("ℹ Using HTTP polling for task monitoring")
+
+        # Monitor task using shared utility function
+        try:
+            task_outputs = _monitor_task(task_id, config, timeout)
+        finally:
+            if use_websocket:
+                if channel is not None:
+                    channel.close()
+                monitor.unwatch(task_id)
+        print("✓ Task completed")
+        return task_id, task_outputs
 
     def _validate_config(self, config):
         """Validate configuration"""
@@ -130,116 +214,27 @@ class RH_Execute:
             if field not in config or not config[field]:
                 raise ValueError(f"Missing required config field: {field}")
 
-    def _create_task(self, config, params, use_high_performance):
-        """Create task on RunningHub"""
-        api_key = config["api_key"]
-        base_url = config["base_url"]
-        workflow_or_app_id = config["workflow_or_app_id"]
-        is_ai_app = config.get("is_ai_app", False)
-
-        # Choose endpoint based on task type
-        if is_ai_app:
-            url = f"{base_url}/task/openapi/ai-app/run"
-            payload = {
-                "webappId": int(workflow_or_app_id),
-                "apiKey": api_key,
-                "nodeInfoList": params,
-            }
-        else:
-            url = f"{base_url}/task/openapi/create"
-            payload = {
-                "workflowId": workflow_or_app_id,
-                "apiKey": api_key,
-                "nodeInfoList": params,
-            }
-
-        # Add instance type if high performance requested
-        if use_high_performance:
-            payload["instanceType"] = "plus"
-
-
-        # Send request with retry
-        max_retries = 5
-        for attempt in range(max_retries):
-            try:
-                print(f"Creating task (attempt {attempt + 1}/{max_retries})...")
-                headers = {'Content-Type': 'application/json'}
-                response = requests.post(url, data=json.dumps(payload), headers=headers, timeout=30)
-                response.raise_for_status()
-
-                result = response.json()
-
-                if result.get("code") == 0:
-                    data = result.get("data", {})
-                    task_id = data.get("taskId")
-
-                    if not task_id:
-                        raise ValueError("No taskId in response")
-
-                    # WebSocket disabled - HTTP polling is more reliable
-                    # WebSocket can cause blocking issues with certain proxy configurations
-                    # HTTP polling works perfectly and is more stable
-                    print("ℹ Using HTTP polling for task monitoring (WebSocket disabled for stability)")
-
-                    return task_id
-                else:
-                    error_msg = result.get('msg', 'Unknown error')
-
-                    # Check for business errors that should not be retried
-                    non_retryable_errors = [
-                        "WORKFLOW_NOT_SAVED_OR_NOT_RUNNING",
-                        "WORKFLOW_NOT_FOUND",
-                        "INVALID_WORKFLOW_ID",
-                        "INVALID_API_KEY",
-                        "INSUFFICIENT_BALANCE",
-                    ]
-
-                    if any(err in error_msg for err in non_retryable_errors):
-                        # These are business errors, not network errors - don't retry
-                        print(f"❌ Business error (not retrying): {error_msg}")
-
-                        # Provide helpful error messages
-                        if "WORKFLOW_NOT_SAVED_OR_NOT_RUNNING" in error_msg:
-                            raise Exception(
-                                f"Workflow error: {error_msg}\n"
-                                f"Please check:\n"
-                                f"1. Workflow ID '{workflow_or_app_id}' exists on RunningHub\n"
-                                f"2. Workflow is saved\n"
-                                f"3. Workflow status is set to 'Running' (not Draft)\n"
-                                f"4. You have access to this workflow"
-                            )
-                        elif "INVALID_API_KEY" in error_msg:
-                            raise Exception(f"Invalid API key. Please check your RH_Config node.")
-                        elif "INSUFFICIENT_BALANCE" in error_msg:
-                            raise Exception(f"Insufficient balance. Please top up your RunningHub account.")
-                        else:
-                            raise Exception(f"API error: {error_msg}")
-
-                    # For other errors, allow retry
-                    raise Exception(f"API error: {error_msg}")
-
-            except Exception as e:
-                error_str = str(e)
-
-                # Don't retry business errors
-                if "Workflow error:" in error_str or "Invalid API key" in error_str or "Insufficient balance" in error_str:
-                    raise
-
-                # Retry network errors
-                if attempt == max_retries - 1:
-                    raise Exception(f"Failed to create task: {e}")
-                print(f"Retry in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt)
-
-        raise Exception("Failed to create task after all retries")
-
-
-
-
-
-
-
-
-
+    def _create_task(self, config, params, use_high_performance, timeout):
+        """
+        Create task on RunningHub
 
+        Goes through the account's task scheduler, so the submission waits for a
+        free concurrent slot instead of failing with a quota error. Raises
+        TimeoutError (and drops the queued submission) if no slot frees up within
+        `timeout` seconds.
 
+        Returns:
+            Tuple of (task_id, task_info) where task_info is the API's data dict
+            (includes e.g. netWssUrl for WebSocket monitoring)
+        """
+        scheduler = get_task_scheduler(config)
+        future = scheduler.submit(
+            lambda: create_task(config, params, use_high_performance, source="RH_Execute"),
+            priority=PRIORITY_INTERACTIVE
+        )
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not scheduler.cancel(future):
+                print("⚠️ Task submission was already in flight; if it succeeds it is listed in the task journal")
+            raise TimeoutError(f"No free task slot on RunningHub within {timeout} seconds")
@@ -0,0 +1,285 @@
+"""
+RH Image Encoder - Encode image tensors for upload
+Selectable backend (PIL / OpenCV) and format (PNG, lossless WebP, JPEG, WebP)
+"""
+
+import math
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from .rh_storage import load_plugin_settings
+from .rh_tensor_convert import image_to_uint8
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+ENCODER_BACKENDS = ["pil", "opencv"]
+IMAGE_FORMATS = ["png", "webp_lossless", "webp", "jpeg", "auto"]
+
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+DEFAULT_QUALITY = 95
+DEFAULT_SIZE_TARGET_MB = 4.0
+
+# RunningHub rejects image uploads above 10MB
+UPLOAD_SIZE_LIMIT = 10 * 1024 * 1024
+# Aim a little under the limit when predicting a downscale factor
+FIT_HEADROOM = 0.92
+MIN_FIT_QUALITY = 75
+MAX_FIT_RESIZES = 5
+
+# format -> (file extension, content type)
+FORMAT_INFO = {
+    "png": (".png", "image/png"),
+    "webp_lossless": (".webp", "image/webp"),
+    "webp": (".webp", "image/webp"),
+    "jpeg": (".jpg", "image/jpeg"),
+}
+
+
+def get_encode_options(config):
+    """
+    Collect the image encoding settings from an RH_Config dict.
+
+    `image_size_target_mb` (used by the "auto" format) comes from config.json.
+    """
+    config = config or {}
+    if "image_size_target_mb" in config:
+        size_target_mb = config["image_size_target_mb"]
+    else:
+        size_target_mb = load_plugin_settings().get("image_size_target_mb", DEFAULT_SIZE_TARGET_MB)
+    return {
+        "format": config.get("image_format", "png"),
+        "backend": config.get("image_encoder", "pil"),
+        "png_compress_level": int(config.get("png_compress_level", DEFAULT_PNG_COMPRESS_LEVEL)),
+        "quality": int(config.get("image_quality", DEFAULT_QUALITY)),
+        "size_target_mb": float(size_target_mb),
+    }
+
+
+def encoding_tag(options):
+    """Short description of the encoding settings, part of the upload cache key"""
+    return (f"{options['format']}/{options['backend']}/z{options['png_compress_level']}"
+            f"/q{options['quality']}/t{options['size_target_mb']:g}")
+
+
+def _encode_pil(array, image_format, png_compress_level, quality):
+    if array.ndim == 2:
+        mode = "L"
+    else:
+        mode = {3: "RGB", 4: "RGBA"}.get(array.shape[2])
+    if mode is None:
+        raise ValueError(f"Unsupported channel count: {array.shape[2]}")
+    pil_image = Image.fromarray(array, mode)
+    buffer = BytesIO()
+    if image_format == "png":
+        pil_image.save(buffer, format="PNG", compress_level=png_compress_level)
+    elif image_format == "webp_lossless":
+        pil_image.save(buffer, format="WEBP", lossless=True, quality=0, method=0)
+    elif image_format == "webp":
+        pil_image.save(buffer, format="WEBP", quality=quality, method=4)
+    elif image_format == "jpeg":
+        if pil_image.mode == "RGBA":
+            pil_image = pil_image.convert("RGB")
+        pil_image.save(buffer, format="JPEG", quality=quality, subsampling=0 if quality >= 90 else 2)
+    else:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    return buffer
+
+
+def _encode_opencv(array, image_format, png_compress_level, quality):
+    if array.ndim == 3 and array.shape[2] == 4:
+        if image_format == "jpeg":
+            array = cv2.cvtColor(array, cv2.COLOR_RGBA2BGR)
+        else:
+            array = cv2.cvtColor(array, cv2.COLOR_RGBA2BGRA)
+    elif array.ndim == 3 and array.shape[2] == 3:
+        array = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+
+    if image_format == "png":
+        ok, encoded = cv2.imencode(".png", array, [cv2.IMWRITE_PNG_COMPRESSION, png_compress_level])
+    elif image_format == "webp_lossless":
+        # OpenCV switches WebP to lossless for quality values above 100
+        ok, encoded = cv2.imencode(".webp", array, [cv2.IMWRITE_WEBP_QUALITY, 101])
+    elif image_format == "webp":
+        ok, encoded = cv2.imencode(".webp", array, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    elif image_format == "jpeg":
+        ok, encoded = cv2.imencode(".jpg", array, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    else:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if not ok:
+        raise Exception(f"OpenCV could not encode image as {image_format}")
+    return BytesIO(encoded.tobytes())
+
+
+def encode_image(array, image_format="png", backend="pil", png_compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+                 quality=DEFAULT_QUALITY):
+    """
+    Encode a uint8 image array with the given backend and format.
+
+    Returns:
+        Tuple of (BytesIO rewound to 0, file extension, content type)
+    """
+    if backend == "opencv" and not CV2_AVAILABLE:
+        print("⚠️ OpenCV is not installed, encoding with PIL instead")
+        backend = "pil"
+    encoder = _encode_opencv if backend == "opencv" else _encode_pil
+    buffer = encoder(array, image_format, png_compress_level, quality)
+    buffer.seek(0)
+    extension, content_type = FORMAT_INFO[image_format]
+    return buffer, extension, content_type
+
+
+def _auto_candidates(options):
+    """Encodings in order of increasing cost: fast lossless first, then high-quality lossy"""
+    quality = options["quality"]
+    yield "png", 1, quality
+    yield "webp_lossless", 1, quality
+    for q in sorted({quality, 90, 85}, reverse=True):
+        yield "jpeg", 1, q
+
+
+def encode_for_upload(array, options):
+    """
+    Encode an image array according to get_encode_options().
+
+    With format "auto", candidates are tried from cheapest to most expensive
+    and the first one that fits `size_target_mb` is used; if none fits, the
+    smallest result is returned.
+
+    Returns:
+        Tuple of (BytesIO rewound to 0, file extension, content type)
+    """
+    if options["format"] != "auto":
+        return encode_image(array, options["format"], options["backend"],
+                            options["png_compress_level"], options["quality"])
+
+    target_bytes = options["size_target_mb"] * 1024 * 1024
+    best = None
+    for image_format, level, quality in _auto_candidates(options):
+        encoded = encode_image(array, image_format, options["backend"], level, quality)
+        size = encoded[0].getbuffer().nbytes
+        if size <= target_bytes:
+            return encoded
+        if best is None or size < best[0].getbuffer().nbytes:
+            best = encoded
+    return best
+
+
+def downscale(array, scale=None, max_resolution=None, backend="pil"):
+    """
+    Shrink an image with area averaging.
+
+    Args:
+        array: uint8 image array
+        scale: Factor applied to both sides (< 1)
+        max_resolution: Limit for the longer side, applied instead of scale if given
+    """
+    height, width = array.shape[:2]
+    if max_resolution:
+        scale = min(1.0, max_resolution / max(height, width))
+    if not scale or scale >= 1.0:
+        return array
+    new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    if backend == "opencv" and CV2_AVAILABLE:
+        return cv2.resize(array, new_size, interpolation=cv2.INTER_AREA)
+    mode = "L" if array.ndim == 2 else {3: "RGB", 4: "RGBA"}[array.shape[2]]
+    return np.asarray(Image.fromarray(array, mode).resize(new_size, Image.BOX))
+
+
+def _size(encoded):
+    return encoded[0].getbuffer().nbytes
+
+
+def fit_encode(array, options, max_bytes=UPLOAD_SIZE_LIMIT, lossless_only=False, max_resolution=None):
+    """
+    Encode an image so the result fits under max_bytes.
+
+    The image is first encoded as configured. If that is too large, lossy
+    quality is searched (highest quality that fits, down to MIN_FIT_QUALITY),
+    and only if even that does not fit is the resolution reduced, with the
+    downscale factor predicted from the size ratio so usually one or two
+    extra encodes are enough. Masks pass lossless_only=True and are only
+    downscaled.
+
+    Args:
+        array: uint8 image array
+        options: Settings from get_encode_options()
+        max_bytes: Size limit for the encoded file
+        lossless_only: Never switch to a lossy format
+        max_resolution: Optional limit for the longer side applied up front
+
+    Returns:
+        Tuple of (BytesIO rewound to 0, file extension, content type)
+    """
+    backend = options["backend"]
+    original_hw = array.shape[:2]
+    array = downscale(array, max_resolution=max_resolution, backend=backend)
+    attempts = 1
+    encoded = encode_for_upload(array, options)
+    if _size(encoded) <= max_bytes:
+        if array.shape[:2] != original_hw:
+            print(f"📐 Resized {original_hw[1]}x{original_hw[0]} -> {array.shape[1]}x{array.shape[0]} (max_resolution)")
+        return encoded
+    print(f"📐 Encoded image is {_size(encoded) / 1024 / 1024:.2f}MB, fitting under {max_bytes / 1024 / 1024:.0f}MB...")
+
+    def encode_with(image, image_format, quality):
+        nonlocal attempts
+        attempts += 1
+        return encode_image(image, image_format, backend, options["png_compress_level"], quality)
+
+    if lossless_only:
+        fit_format = options["format"] if options["format"] in ("png", "webp_lossless") else "png"
+        fit_quality = options["quality"]
+    else:
+        if options["format"] in ("webp", "jpeg"):
+            fit_format = options["format"]
+        else:
+            # Keep transparency if there is any
+            fit_format = "webp" if array.ndim == 3 and array.shape[2] == 4 else "jpeg"
+
+        # Search the highest quality that fits
+        high = options["quality"]
+        best = None
+        candidate = encode_with(array, fit_format, high)
+        if _size(candidate) <= max_bytes:
+            best = (candidate, high)
+        else:
+            low = min(MIN_FIT_QUALITY, high)
+            candidate = encode_with(array, fit_format, low)
+            if _size(candidate) <= max_bytes:
+                best = (candidate, low)
+                # Narrow down in steps of 5 quality points
+                while high - low > 5:
+                    mid = (high + low) // 2
+                    candidate = encode_with(array, fit_format, mid)
+                    if _size(candidate) <= max_bytes:
+                        best, low = (candidate, mid), mid
+                    else:
+                        high = mid
+        if best:
+            print(f"📐 Fitted as {fit_format} quality {best[1]} ({_size(best[0]) / 1024 / 1024:.2f}MB, "
+                  f"{attempts} encodes)")
+            return best[0]
+        encoded = candidate
+        fit_quality = min(options["quality"], 90)
+
+    # Reduce resolution; encoded size scales roughly with pixel count
+    for _ in range(MAX_FIT_RESIZES):
+        scale = math.sqrt(max_bytes * FIT_HEADROOM / _size(encoded))
+        array = downscale(array, scale=scale, backend=backend)
+        encoded = encode_with(array, fit_format, fit_quality)
+        if _size(encoded) <= max_bytes:
+            print(f"📐 Fitted by resizing {original_hw[1]}x{original_hw[0]} -> {array.shape[1]}x{array.shape[0]} "
+                  f"as {fit_format} ({_size(encoded) / 1024 / 1024:.2f}MB, {attempts} encodes)")
+            return encoded
+    raise ValueError(f"Could not fit image under {max_bytes / 1024 / 1024:.0f}MB after {attempts} encodes")
+
+
+def encode_image_tensor(image_tensor, options, max_resolution=None):
+    """Encode the first image of an IMAGE tensor, fitted under the upload size limit"""
+    return fit_encode(image_to_uint8(image_tensor), options, max_resolution=max_resolution)
@@ -0,0 +1,140 @@
+"""
+RH Latent Codec - In-memory safetensors serialization for LATENT transport
+Optional fp16/bf16 downcast and deflate/zstd compression, restored on load
+"""
+
+import json
+import zlib
+import struct
+
+import torch
+
+try:
+    from safetensors.torch import save, load
+    SAFETENSORS_AVAILABLE = True
+except ImportError:
+    SAFETENSORS_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+DOWNCAST_OPTIONS = ["none", "fp16", "bf16"]
+COMPRESSION_OPTIONS = ["none", "deflate", "zstd"]
+
+# Compressed container: magic, version, codec id, then the compressed safetensors bytes
+CONTAINER_MAGIC = b"RHLZ"
+CONTAINER_VERSION = 1
+_CODEC_IDS = {"deflate": 1, "zstd": 2}
+_CODEC_NAMES = {v: k for k, v in _CODEC_IDS.items()}
+_HEADER = struct.Struct("<4sBB")
+
+# safetensors metadata key holding the original dtype of each downcast tensor
+DTYPE_METADATA_KEY = "rh_original_dtypes"
+
+_DOWNCAST_DTYPES = {"fp16": torch.float16, "bf16": torch.bfloat16}
+_DTYPE_NAMES = {
+    "float32": torch.float32, "float64": torch.float64,
+    "float16": torch.float16, "bfloat16": torch.bfloat16,
+}
+
+
+def file_extension(compression="none"):
+    """File name suffix for an encoded latent"""
+    return {"deflate": ".safetensors.zlib", "zstd": ".safetensors.zst"}.get(compression, ".safetensors")
+
+
+def encode_latent(latent, downcast="none", compression="none", level=None):
+    """
+    Serialize a LATENT dict to bytes without touching the disk.
+
+    Non-tensor entries (e.g. batch_index) are skipped. When downcasting, the
+    original dtype of each tensor is stored in the safetensors metadata so
+    decode_latent can restore it. With compression the safetensors bytes are
+    wrapped in a small RHLZ container header naming the codec.
+
+    Args:
+        latent: LATENT dict, e.g. {"samples": tensor}
+        downcast: "none", "fp16" or "bf16"
+        compression: "none", "deflate" or "zstd"
+        level: Optional compression level
+
+    Returns:
+        bytes
+    """
+    if not SAFETENSORS_AVAILABLE:
+        raise Exception("safetensors is not installed")
+
+    tensors = {}
+    original_dtypes = {}
+    target_dtype = _DOWNCAST_DTYPES.get(downcast)
+    for key, value in latent.items():
+        if not isinstance(value, torch.Tensor):
+            continue
+        tensor = value.detach().cpu().contiguous()
+        if target_dtype is not None and tensor.is_floating_point() and tensor.dtype != target_dtype:
+            original_dtypes[key] = str(tensor.dtype).replace("torch.", "")
+            tensor = tensor.to(target_dtype)
+        tensors[key] = tensor
+    if not tensors:
+        raise ValueError("Latent contains no tensors")
+
+    metadata = {DTYPE_METADATA_KEY: json.dumps(original_dtypes)} if original_dtypes else None
+    data = save(tensors, metadata=metadata)
+
+    if compression == "none":
+        return data
+    if compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            print("⚠️ zstandard is not installed, compressing latent with deflate instead")
+            compression = "deflate"
+        else:
+            data = zstandard.ZstdCompressor(level=level or 3).compress(data)
+    if compression == "deflate":
+        data = zlib.compress(data, level if level is not None else 6)
+    return _HEADER.pack(CONTAINER_MAGIC, CONTAINER_VERSION, _CODEC_IDS[compression]) + data
+
+
+def _read_metadata(data):
+    """Metadata block of serialized safetensors bytes"""
+    header_size = struct.unpack("<Q", data[:8])[0]
+    header = json.loads(bytes(data[8:8 + header_size]).decode("utf-8"))
+    return header.get("__metadata__") or {}
+
+
+def decode_latent(data):
+    """
+    Inverse of encode_latent; also accepts plain safetensors / ComfyUI .latent files.
+
+    Returns:
+        dict: LATENT dict with original dtypes restored
+    """
+    if not SAFETENSORS_AVAILABLE:
+        raise Exception("safetensors is not installed")
+
+    if data[:4] == CONTAINER_MAGIC:
+        _, version, codec_id = _HEADER.unpack(data[:_HEADER.size])
+        codec = _CODEC_NAMES.get(codec_id)
+        payload = data[_HEADER.size:]
+        if codec == "zstd":
+            if not ZSTD_AVAILABLE:
+                raise Exception("Latent is zstd-compressed but zstandard is not installed")
+            data = zstandard.ZstdDecompressor().decompress(payload)
+        elif codec == "deflate":
+            data = zlib.decompress(payload)
+        else:
+            raise ValueError(f"Unknown latent compression codec {codec_id} (container version {version})")
+
+    tensors = load(data)
+    original_dtypes = json.loads(_read_metadata(data).get(DTYPE_METADATA_KEY, "{}"))
+    for key, dtype_name in original_dtypes.items():
+        if key in tensors and dtype_name in _DTYPE_NAMES:
+            tensors[key] = tensors[key].to(_DTYPE_NAMES[dtype_name])
+
+    # Files written by ComfyUI's SaveLatent store the samples under "latent_tensor"
+    if "samples" not in tensors and "latent_tensor" in tensors:
+        multiplier = 1.0 if "latent_format_version_0" in tensors else 1.0 / 0.18215
+        tensors = {"samples": tensors["latent_tensor"].float() * multiplier}
+    return tensors
@@ -2,12 +2,7 @@
 RH_MultiInputImage Node - Upload multiple images for a single run.
 """
 
-import torch
-import numpy as np
-from PIL import Image
-import io
-
-from .rh_utils import upload_file_to_rh
+from .rh_upload_pipeline import upload_images_parallel
 
 class RH_MultiInputImage:
     """
@@ -39,15 +34,13 @@ class RH_MultiInputImage:
     CATEGORY = "Ken-Chen/RH-API"
 
     def upload_single_run(self, config, previous_params=None, **kwargs):
-        api_key = config.get("api_key")
-        base_url = config.get("base_url")
-
         # Initialize with previous params if they exist
         params_list = []
         if previous_params:
             params_list.extend(previous_params)
 
-        new_params_count = 0
+        jobs = []
+        targets = {}
         for i in range(1, self.MAX_UPLOADS + 1):
             image_tensor = kwargs.get(f"image_{i}")
             node_id = kwargs.get(f"node_id_{i}")
@@ -57,24 +50,22 @@ class RH_MultiInputImage:
                 if not node_id or not str(node_id).strip():
                     print(f"[Error] RH_MultiInputImage: Image_{i} is connected, but its node_id_{i} is missing. This input will be skipped.")
                     continue
+                jobs.append((i, image_tensor, f"multi_input_{i}"))
+                targets[i] = (str(node_id).strip(), field_name)
 
-                img_np = image_tensor.cpu().numpy()
-                img_pil = Image.fromarray((img_np.squeeze(0) * 255).astype(np.uint8))
-                buffer = io.BytesIO()
-                img_pil.save(buffer, format='PNG')
-
-                rh_file_path = upload_file_to_rh(
-                    api_key=api_key, base_url=base_url, file_buffer=buffer,
-                    file_name=f"multi_input_{i}.png", content_type='image/png', file_type='image'
-                )
-
-                if rh_file_path:
-                    param = {"nodeId": str(node_id).strip(), "fieldName": field_name, "fieldValue": rh_file_path}
-                    params_list.append(param)
-                    new_params_count += 1
-                    print(f"[Info] RH_MultiInputImage: Prepared image_{i} for node_id: {node_id}")
-                else:
-                    print(f"[Error] RH_MultiInputImage: Failed to upload image {i} for node {node_id}. Skipping.")
+        # Encode and upload concurrently, then add params back in slot order
+        results = upload_images_parallel(config, jobs)
+        new_params_count = 0
+        for i, _, _ in jobs:
+            node_id, field_name = targets[i]
+            rh_file_path = results.get(i)
+            if isinstance(rh_file_path, str) and rh_file_path:
+                param = {"nodeId": node_id, "fieldName": field_name, "fieldValue": rh_file_path}
+                params_list.append(param)
+                new_params_count += 1
+                print(f"[Info] RH_MultiInputImage: Prepared image_{i} for node_id: {node_id}")
+            else:
+                print(f"[Error] RH_MultiInputImage: Failed to upload image {i} for node {node_id}: {rh_file_path}. Skipping.")
 
         if new_params_count == 0 and not previous_params:
             print("[Warning] RH_MultiInputImage: No new images were processed and no previous params were provided.")
@@ -0,0 +1,127 @@
+"""
+RH Multipart - Streaming multipart/form-data bodies for uploads
+The file part is read from disk (or the caller's buffer) in chunks while the request is sent
+"""
+
+import os
+import time
+import uuid
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Slowest link we still want to succeed on before timing out
+MIN_UPLOAD_BYTES_PER_SECOND = 256 * 1024
+BASE_UPLOAD_TIMEOUT = 60
+CONNECT_TIMEOUT = 15
+# Only report progress for uploads large enough to take a while
+PROGRESS_MIN_BYTES = 8 * 1024 * 1024
+
+
+def upload_timeout(size):
+    """(connect, read) timeout for an upload of `size` bytes, scaled to the payload"""
+    return (CONNECT_TIMEOUT, BASE_UPLOAD_TIMEOUT + size / MIN_UPLOAD_BYTES_PER_SECOND)
+
+
+def _stream_size(file_obj):
+    position = file_obj.tell()
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell() - position
+    file_obj.seek(position)
+    return size
+
+
+class MultipartFileStream:
+    """
+    File-like multipart/form-data body with a single file part.
+
+    requests sends it with a Content-Length header and reads it block by block,
+    so the payload is never copied into one large in-memory body. The body can
+    be rewound with `rewind()` before a retry. Bytes sent are tracked to report
+    upload throughput.
+    """
+
+    def __init__(self, fields, file_field, file_name, file_obj, content_type, label=None):
+        self.boundary = uuid.uuid4().hex
+        self.file_obj = file_obj
+        self.label = label or file_name
+        self._file_start = file_obj.tell()
+        self._file_size = _stream_size(file_obj)
+
+        head = []
+        for name, value in fields.items():
+            head.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        # Original file names can contain quotes or line breaks
+        safe_name = file_name.replace('"', "%22").replace("\r", "").replace("\n", "")
+        head.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{safe_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._length = len(self._head) + self._file_size + len(self._tail)
+        self.rewind()
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def file_size(self):
+        return self._file_size
+
+    def __len__(self):
+        return self._length
+
+    def rewind(self):
+        """Start the body over, e.g. before a retry"""
+        self.file_obj.seek(self._file_start)
+        self._offset = 0
+        self._started_at = None
+        self._next_report = 0.1
+
+    def read(self, size=-1):
+        if self._started_at is None:
+            self._started_at = time.time()
+        if size is None or size < 0:
+            size = self._length - self._offset
+
+        chunks = []
+        remaining = size
+        while remaining > 0 and self._offset < self._length:
+            head_len = len(self._head)
+            file_end = head_len + self._file_size
+            if self._offset < head_len:
+                chunk = self._head[self._offset:self._offset + remaining]
+            elif self._offset < file_end:
+                chunk = self.file_obj.read(min(remaining, file_end - self._offset, STREAM_CHUNK_SIZE))
+                if not chunk:
+                    raise IOError(f"{self.label} ended early while uploading")
+            else:
+                start = self._offset - file_end
+                chunk = self._tail[start:start + remaining]
+            chunks.append(chunk)
+            self._offset += len(chunk)
+            remaining -= len(chunk)
+
+        self._report_progress()
+        return b"".join(chunks)
+
+    def throughput(self):
+        """Average bytes per second since the current attempt started"""
+        if not self._started_at:
+            return 0.0
+        elapsed = max(time.time() - self._started_at, 1e-6)
+        return self._offset / elapsed
+
+    def _report_progress(self):
+        if self._length < PROGRESS_MIN_BYTES:
+            return
+        fraction = self._offset / self._length
+        if fraction >= self._next_report:
+            print(f"📤 {self.label}: {fraction:.0%} ({self._offset / 1e6:.1f}/{self._length / 1e6:.1f} MB, "
+                  f"{self.throughput() / 1e6:.2f} MB/s)")
+            self._next_report = int(fraction * 10 + 1) / 10
@@ -3,6 +3,8 @@ RH_Param Node - Parameter configuration for RunningHub workflows
 Simplified parameter setting with chainable design
 """
 
+from .rh_remote_files import resolve_remote_file, REMOTE_MODES
+
 class RH_Param:
     """
     Parameter configuration node for RunningHub workflows.
@@ -63,6 +65,22 @@ class RH_Param:
                     "multiline": False,
                     "tooltip": "Custom field name (only used when field_name is 'custom')"
                 }),
+                "remote_files": ("RH_REMOTE_FILES", {
+                    "tooltip": "Outputs of a previous RH_Execute/RH_Download; when connected, field_value is replaced by one of these files"
+                }),
+                "remote_index": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 1000,
+                    "tooltip": "Which file of remote_files to use"
+                }),
+                "remote_mode": (REMOTE_MODES, {
+                    "default": "reupload",
+                    "tooltip": "reupload: copy the file's original bytes into a new upload (needs config); url: pass the output URL itself, for nodes that load from URLs"
+                }),
+                "config": ("RH_CONFIG", {
+                    "tooltip": "RunningHub configuration, needed for remote_mode 'reupload'"
+                }),
             }
         }
     
@@ -71,7 +89,8 @@ class RH_Param:
     FUNCTION = "add_param"
     CATEGORY = "Ken-Chen/RH-API"
     
-    def add_param(self, node_id, field_name, field_value, previous_params=None, custom_field_name=""):
+    def add_param(self, node_id, field_name, field_value, previous_params=None, custom_field_name="",
+                  remote_files=None, remote_index=0, remote_mode="reupload", config=None):
         """
         Add a parameter to the parameter list
 
@@ -81,6 +100,10 @@ class RH_Param:
             field_value: Value to set
             previous_params: Previous parameter list (for chaining)
             custom_field_name: Custom field name (when field_name is 'custom')
+            remote_files: RH_REMOTE_FILES handle whose file replaces field_value (optional)
+            remote_index: Index of the file in remote_files
+            remote_mode: "reupload" or "url"
+            config: Configuration from RH_Config node (for "reupload")
 
         Returns:
             Updated parameter list
@@ -95,6 +118,10 @@ class RH_Param:
         elif field_name == "custom" and not custom_field_name.strip():
             print("⚠ Warning: field_name is 'custom' but custom_field_name is empty. Using 'custom' as field name.")
 
+        # Chain an output of a previous task straight into this field
+        if remote_files:
+            field_value = resolve_remote_file(config, remote_files, remote_index, remote_mode)
+
         # Add new parameter
         new_param = {
             "nodeId": str(node_id).strip(),
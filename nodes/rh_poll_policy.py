@@ -0,0 +1,141 @@
+"""
+RH Poll Policy - Adaptive polling schedule for RunningHub task monitoring
+Fast first polls, backoff while queued, tight polls near the predicted finish time
+"""
+
+import os
+import json
+import threading
+import statistics
+
+from .rh_storage import get_data_dir, load_plugin_settings
+
+HISTORY_FILE = "latency_history.json"
+HISTORY_SIZE = 20
+
+
+class LatencyHistory:
+    """
+    Per-workflow record of recent run durations, persisted as JSON.
+
+    Durations are measured from the first time a task is seen RUNNING until it
+    completes, so queue time does not skew the estimate.
+    """
+
+    def __init__(self, path=None, size=HISTORY_SIZE):
+        self.path = path or os.path.join(get_data_dir(), HISTORY_FILE)
+        self.size = size
+        self._lock = threading.Lock()
+        self._history = {}
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._history = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Could not load latency history: {e}")
+            self._history = {}
+
+    def estimate(self, workflow_id):
+        """Return the median run duration in seconds, or None without history"""
+        with self._lock:
+            durations = self._history.get(str(workflow_id))
+            if not durations:
+                return None
+            return statistics.median(durations)
+
+    def record(self, workflow_id, duration):
+        """Add one observed run duration and persist the history"""
+        if not workflow_id or duration <= 0:
+            return
+        with self._lock:
+            durations = self._history.setdefault(str(workflow_id), [])
+            durations.append(round(duration, 2))
+            del durations[:-self.size]
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._history, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Could not save latency history: {e}")
+
+
+class PollPolicy:
+    """
+    Decides how long to wait before the next status poll of a task.
+
+    - The first `initial_polls` polls use `initial_interval` to catch fast or failing tasks.
+    - While QUEUED the interval doubles up to `queued_max_interval`.
+    - While RUNNING with a predicted duration, the monitor sleeps through most of
+      the expected run and polls every `near_eta_interval` around the predicted
+      finish, backing off again if the task overruns.
+    - With a `request_budget`, intervals are stretched so a task never uses more
+      polls than the budget within its timeout.
+    """
+
+    def __init__(self, initial_interval=1.0, initial_polls=3, queued_max_interval=30.0,
+                 running_interval=5.0, near_eta_interval=1.0, max_interval=30.0,
+                 request_budget=None):
+        self.initial_interval = initial_interval
+        self.initial_polls = initial_polls
+        self.queued_max_interval = queued_max_interval
+        self.running_interval = running_interval
+        self.near_eta_interval = near_eta_interval
+        self.max_interval = max_interval
+        self.request_budget = request_budget
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """Build a policy from the optional `poll_*` keys in config.json"""
+        settings = settings if settings is not None else load_plugin_settings()
+        budget = settings.get("poll_request_budget")
+        return cls(
+            initial_interval=float(settings.get("poll_initial_interval", 1.0)),
+            running_interval=float(settings.get("poll_running_interval", 5.0)),
+            max_interval=float(settings.get("poll_max_interval", 30.0)),
+            queued_max_interval=float(settings.get("poll_max_interval", 30.0)),
+            request_budget=int(budget) if budget else None,
+        )
+
+    def next_interval(self, status, polls_made, queued_polls, elapsed, running_for=None,
+                      expected_duration=None, timeout=None):
+        """
+        Args:
+            status: Last observed task status ("QUEUED", "RUNNING", ...)
+            polls_made: Number of polls already made for this task
+            queued_polls: Number of polls that saw the task QUEUED
+            elapsed: Seconds since monitoring started
+            running_for: Seconds since the task was first seen RUNNING, if known
+            expected_duration: Predicted run duration from history, if known
+            timeout: The waiter's timeout in seconds, if known
+
+        Returns:
+            float: Seconds to wait before the next poll
+        """
+        if polls_made < self.initial_polls:
+            interval = self.initial_interval
+        elif status == "QUEUED":
+            interval = min(self.queued_max_interval, self.initial_interval * (2 ** queued_polls))
+        elif status == "RUNNING" and expected_duration and running_for is not None:
+            remaining = expected_duration - running_for
+            if remaining > 2 * self.running_interval:
+                # Sleep through half of the expected remaining time
+                interval = min(self.max_interval, remaining / 2)
+            elif remaining > -self.running_interval:
+                interval = self.near_eta_interval
+            else:
+                # Overrunning the prediction: back off gradually to the normal rate
+                overrun = -remaining
+                interval = min(self.running_interval, self.near_eta_interval * (1 + overrun / self.running_interval))
+        else:
+            interval = self.running_interval
+
+        interval = min(interval, self.max_interval)
+
+        # The request budget wins over max_interval
+        if self.request_budget and timeout:
+            polls_left = max(1, self.request_budget - polls_made)
+            time_left = max(0.0, timeout - elapsed)
+            interval = max(interval, time_left / polls_left)
+
+        return max(0.1, interval)
@@ -0,0 +1,132 @@
+"""
+RH Remote Files - Handles to task outputs that stay on RunningHub
+Lets the outputs of one task feed the next one without decoding and re-encoding them locally
+"""
+
+import os
+import tempfile
+from urllib.parse import urlparse
+
+from .rh_transport import get_transport
+from .rh_upload_cache import find_cached_upload
+
+REMOTE_MODES = ["reupload", "url"]
+
+# Downloads above this size are spooled to disk while being re-uploaded
+SPOOL_MAX_MEMORY = 32 * 1024 * 1024
+
+_FILE_TYPES = {
+    "png": "image", "jpg": "image", "jpeg": "image", "webp": "image", "bmp": "image",
+    "mp4": "video", "avi": "video", "mov": "video", "webm": "video",
+    "wav": "audio", "mp3": "audio", "flac": "audio", "ogg": "audio",
+    "safetensors": "latent", "latent": "latent",
+}
+
+
+def make_remote_files(task_id, outputs):
+    """
+    Build an RH_REMOTE_FILES handle from a task's outputs list.
+
+    Returns:
+        dict: {"task_ids": [...], "files": [{"taskId", "fileUrl", "fileType", "fileName"}, ...]}
+    """
+    files = []
+    for output in outputs or []:
+        url = output.get("fileUrl") if isinstance(output, dict) else None
+        if not url:
+            continue
+        file_type = (output.get("fileType") or os.path.splitext(urlparse(url).path)[1].lstrip(".")).lower()
+        files.append({
+            "taskId": str(task_id),
+            "fileUrl": url,
+            "fileType": file_type,
+            "fileName": os.path.basename(urlparse(url).path) or f"output.{file_type}",
+        })
+    return {"task_ids": [str(task_id)], "files": files}
+
+
+def merge_remote_files(handles):
+    """Concatenate several handles (e.g. from a batch download) in order"""
+    merged = {"task_ids": [], "files": []}
+    for handle in handles:
+        if handle:
+            merged["task_ids"].extend(handle.get("task_ids", []))
+            merged["files"].extend(handle.get("files", []))
+    return merged
+
+
+def select_remote_file(remote_files, index=0):
+    """Pick one file from a handle, with a clear error if it is missing"""
+    files = (remote_files or {}).get("files") or []
+    if not files:
+        raise ValueError("RH_REMOTE_FILES handle contains no files")
+    if index >= len(files):
+        raise ValueError(f"remote_index {index} is out of range, the handle has {len(files)} file(s)")
+    return files[index]
+
+
+def upload_remote_file(config, entry):
+    """
+    Copy a RunningHub output into a new upload, without decoding it.
+
+    The bytes are streamed from the output URL into a spooled buffer (kept in
+    memory up to SPOOL_MAX_MEMORY) and uploaded unchanged. Copies are recorded
+    in the upload cache under the output URL, so chaining the same output
+    again reuses the earlier copy.
+
+    Returns:
+        str: fileName to use in a nodeInfoList
+    """
+    from .rh_utils import upload_file_to_rh
+
+    api_key = config["api_key"]
+    base_url = config["base_url"]
+    use_cache = config.get("use_upload_cache", True)
+    cache_key = f"remote:{entry['fileUrl']}"
+
+    cached = find_cached_upload(api_key, base_url, cache_key) if use_cache else None
+    if cached:
+        print(f"✓ Remote file already copied, reusing: {cached}")
+        return cached
+
+    print(f"↪ Copying output {entry['fileName']} of task {entry['taskId']} into a new upload...")
+    response = get_transport().get(entry["fileUrl"], timeout=120, stream=True)
+    response.raise_for_status()
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as buffer:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            if chunk:
+                buffer.write(chunk)
+        buffer.seek(0)
+        content_type = response.headers.get("Content-Type") or "application/octet-stream"
+        return upload_file_to_rh(
+            api_key=api_key,
+            base_url=base_url,
+            file_buffer=buffer,
+            file_name=entry["fileName"],
+            content_type=content_type,
+            file_type=_FILE_TYPES.get(entry["fileType"], "file"),
+            use_cache=use_cache,
+            cache_key=cache_key
+        )
+
+
+def resolve_remote_file(config, remote_files, index=0, mode="reupload"):
+    """
+    Turn an entry of an RH_REMOTE_FILES handle into a fieldValue.
+
+    Args:
+        config: Configuration from RH_Config node (needed for "reupload")
+        remote_files: RH_REMOTE_FILES handle
+        index: Which file of the handle to use
+        mode: "url" passes the output URL itself (for nodes that load from URLs);
+              "reupload" re-uploads the original bytes as a regular upload (no decode/encode)
+
+    Returns:
+        str
+    """
+    entry = select_remote_file(remote_files, index)
+    if mode == "url":
+        return entry["fileUrl"]
+    if not config:
+        raise ValueError("A config is required to re-upload remote files (connect RH_Config or use mode 'url')")
+    return upload_remote_file(config, entry)
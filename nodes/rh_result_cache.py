@@ -0,0 +1,160 @@
+"""
+RH Result Cache - Memoize task outputs for identical submissions
+A re-queued graph with the same workflow and parameters reuses the previous task's outputs
+"""
+
+import json
+import time
+import hashlib
+import threading
+
+from .rh_storage import connect_db, load_plugin_settings, account_fingerprint
+from .rh_upload_cache import get_upload_cache
+from .rh_transport import get_transport
+
+# Output URLs on RunningHub are not kept forever, so results expire too
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+def canonicalize_params(params, api_key, base_url):
+    """
+    Normalize a nodeInfoList for hashing.
+
+    Entries are sorted by nodeId/fieldName so order does not matter, and values
+    that are known upload fileNames are replaced by the content key they were
+    uploaded from, so re-uploading the same file yields the same result key.
+    """
+    cache = get_upload_cache()
+    items = []
+    for param in params or []:
+        value = param.get("fieldValue")
+        value = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+        if cache is not None and value:
+            try:
+                content_key = cache.find_key(api_key, base_url, value)
+            except Exception:
+                content_key = None
+            if content_key:
+                value = f"upload:{content_key}"
+        items.append([str(param.get("nodeId", "")).strip(), str(param.get("fieldName", "")).strip(), value])
+    return sorted(items)
+
+
+def compute_result_key(config, params, use_high_performance=False, workflow_id=None):
+    """Hash of everything that determines a task's outputs"""
+    api_key = config["api_key"]
+    base_url = config["base_url"]
+    key_data = [
+        str(workflow_id or config.get("workflow_or_app_id", "")),
+        bool(config.get("is_ai_app", False)),
+        "plus" if use_high_performance else "default",
+        canonicalize_params(params, api_key, base_url),
+    ]
+    canonical = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite map of result key -> (task_id, outputs list), scoped per account"""
+
+    DB_NAME = "result_cache.sqlite3"
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " account TEXT NOT NULL,"
+                    " result_key TEXT NOT NULL,"
+                    " task_id TEXT NOT NULL,"
+                    " outputs TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " PRIMARY KEY (account, result_key))"
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def lookup(self, config, result_key):
+        """Return (task_id, outputs) for a still-valid entry, or None"""
+        account = account_fingerprint(config["api_key"], config["base_url"])
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                row = conn.execute(
+                    "SELECT task_id, outputs, created_at FROM results WHERE account = ? AND result_key = ?",
+                    (account, result_key),
+                ).fetchone()
+                if row is None:
+                    return None
+                if time.time() - row[2] > self.ttl_seconds:
+                    conn.execute("DELETE FROM results WHERE account = ? AND result_key = ?", (account, result_key))
+                    conn.commit()
+                    return None
+                return row[0], json.loads(row[1])
+            finally:
+                conn.close()
+
+    def store(self, config, result_key, task_id, outputs):
+        account = account_fingerprint(config["api_key"], config["base_url"])
+        now = time.time()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (account, result_key, task_id, outputs, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (account, result_key, str(task_id), json.dumps(outputs), now),
+                )
+                conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def invalidate(self, config, result_key):
+        account = account_fingerprint(config["api_key"], config["base_url"])
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute("DELETE FROM results WHERE account = ? AND result_key = ?", (account, result_key))
+                conn.commit()
+            finally:
+                conn.close()
+
+
+def outputs_still_available(outputs):
+    """Cheap HEAD check that the first output URL has not expired on the server"""
+    first_url = next((o.get("fileUrl") for o in outputs if isinstance(o, dict) and o.get("fileUrl")), None)
+    if not first_url:
+        return False
+    try:
+        response = get_transport().session.head(first_url, timeout=10, allow_redirects=True)
+        return response.status_code < 400
+    except Exception:
+        return False
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Return the process-wide result cache, or None if unavailable.
+
+    The TTL can be set with `result_cache_ttl_hours` in config.json.
+    """
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            settings = load_plugin_settings()
+            ttl_hours = float(settings.get("result_cache_ttl_hours", DEFAULT_TTL_SECONDS / 3600))
+            try:
+                _cache_instance = ResultCache(ttl_seconds=ttl_hours * 3600)
+            except Exception as e:
+                print(f"⚠️ Result cache unavailable: {e}")
+                _cache_instance = False
+        return _cache_instance or None
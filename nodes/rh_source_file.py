@@ -0,0 +1,102 @@
+"""
+RH Source File - Find the original file behind a loaded IMAGE tensor
+Lets upload nodes send the user's JPEG/WebP/PNG as-is instead of re-encoding decoded pixels
+"""
+
+import os
+import mimetypes
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from .rh_tensor_convert import image_to_uint8
+
+try:
+    import folder_paths
+    FOLDER_PATHS_AVAILABLE = True
+except ImportError:
+    FOLDER_PATHS_AVAILABLE = False
+
+# Loader node class -> name of the input holding the (annotated) file name
+IMAGE_LOADERS = {
+    "LoadImage": "image",
+}
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+
+def resolve_source_path(value):
+    """
+    Turn a path or annotated file name ("photo.jpg [input]") into an existing file path.
+
+    Returns:
+        str | None
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    if os.path.isfile(value):
+        return value
+    if FOLDER_PATHS_AVAILABLE:
+        try:
+            path = folder_paths.get_annotated_filepath(value)
+            if path and os.path.isfile(path):
+                return path
+        except Exception:
+            pass
+    return None
+
+
+def trace_source_image(prompt, unique_id, input_name="image"):
+    """
+    Follow this node's image input back through the prompt graph to a loader node.
+
+    Only direct links from an IMAGE_LOADERS node are traced; anything in
+    between may have modified the pixels.
+
+    Returns:
+        str | None: Path of the loader's source file
+    """
+    if not prompt or unique_id is None:
+        return None
+    node = prompt.get(str(unique_id)) or {}
+    link = (node.get("inputs") or {}).get(input_name)
+    if not isinstance(link, (list, tuple)) or len(link) != 2:
+        return None
+    source = prompt.get(str(link[0])) or {}
+    file_input = IMAGE_LOADERS.get(source.get("class_type"))
+    if file_input is None or link[1] != 0:
+        return None
+    value = (source.get("inputs") or {}).get(file_input)
+    return resolve_source_path(value) if isinstance(value, str) else None
+
+
+def source_matches_tensor(path, image_tensor):
+    """
+    Check that an IMAGE tensor is exactly the decoded content of the file.
+
+    The file is decoded the same way ComfyUI's LoadImage does (EXIF orientation,
+    RGB) and compared pixel by pixel, so edits, resizes or batching upstream
+    are never mistaken for the original.
+    """
+    if os.path.splitext(path)[1].lower() not in IMAGE_EXTENSIONS:
+        return False
+    if image_tensor.ndim == 4 and image_tensor.shape[0] != 1:
+        return False
+    try:
+        with Image.open(path) as img:
+            if getattr(img, "n_frames", 1) > 1:
+                return False
+            decoded = np.asarray(ImageOps.exif_transpose(img).convert("RGB"))
+    except Exception:
+        return False
+
+    pixels = image_to_uint8(image_tensor)
+    if pixels.ndim != 3 or pixels.shape[:2] != decoded.shape[:2] or pixels.shape[2] < 3:
+        return False
+    return np.array_equal(pixels[..., :3], decoded)
+
+
+def source_content_type(path):
+    content_type, _ = mimetypes.guess_type(path)
+    return content_type or "application/octet-stream"
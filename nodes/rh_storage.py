@@ -0,0 +1,61 @@
+"""
+RH Storage - Shared helpers for the plugin's local on-disk state
+Caches, journals and manifests all live in one data directory next to config.json
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+
+_PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATA_DIR_NAME = ".rh_data"
+
+
+def get_plugin_dir():
+    """Return the root directory of the ComfyUI_RH_API plugin"""
+    return _PLUGIN_DIR
+
+
+def get_data_dir():
+    """Return (and create) the directory used for local caches and journals"""
+    data_dir = os.path.join(_PLUGIN_DIR, _DATA_DIR_NAME)
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
+
+def connect_db(db_name):
+    """
+    Open a SQLite database inside the data directory.
+
+    Connections are cheap and short-lived; callers open one per operation so the
+    same database can be used safely from worker threads.
+    """
+    path = os.path.join(get_data_dir(), db_name)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def load_plugin_settings():
+    """
+    Read optional plugin settings from config.json without printing.
+
+    Returns:
+        dict: The parsed config.json contents or an empty dict
+    """
+    config_path = os.path.join(_PLUGIN_DIR, "config.json")
+    if not os.path.exists(config_path):
+        return {}
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Error reading settings from config.json: {e}")
+        return {}
+
+
+def account_fingerprint(api_key, base_url):
+    """Stable, non-reversible identifier for an api_key/base_url pair"""
+    digest = hashlib.sha256(f"{api_key}|{base_url}".encode("utf-8"))
+    return digest.hexdigest()[:16]
@@ -0,0 +1,284 @@
+"""
+RH Task Journal - Durable record of every task created by this plugin
+Lets in-flight cloud work be re-attached and downloaded after a ComfyUI restart
+"""
+
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .rh_storage import connect_db, load_plugin_settings, account_fingerprint
+from .rh_task_monitor import get_task_monitor
+
+# Journal statuses
+STATUS_CREATED = "CREATED"
+STATUS_QUEUED = "QUEUED"
+STATUS_RUNNING = "RUNNING"
+STATUS_COMPLETED = "COMPLETED"
+STATUS_FAILED = "FAILED"
+STATUS_COLLECTED = "COLLECTED"
+
+PENDING_STATUSES = (STATUS_CREATED, STATUS_QUEUED, STATUS_RUNNING)
+RESUME_MAX_AGE = 24 * 3600
+# Resumed tasks are watched by the shared monitor; only their downloads need threads
+RESUME_DOWNLOAD_WORKERS = 2
+
+
+def hash_params(params):
+    """Stable hash of a nodeInfoList, used to recognise identical submissions"""
+    canonical = json.dumps(params or [], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TaskJournal:
+    """
+    SQLite journal of created tasks and what happened to them.
+
+    Rows are written when a task is created, updated by the task monitor as its
+    status changes, and marked COLLECTED once outputs were processed locally.
+    """
+
+    DB_NAME = "task_journal.sqlite3"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS tasks ("
+                    " task_id TEXT PRIMARY KEY,"
+                    " account TEXT NOT NULL,"
+                    " base_url TEXT NOT NULL,"
+                    " workflow_id TEXT,"
+                    " is_ai_app INTEGER DEFAULT 0,"
+                    " params_hash TEXT,"
+                    " source TEXT,"
+                    " status TEXT NOT NULL,"
+                    " error TEXT,"
+                    " outputs TEXT,"
+                    " save_to_local INTEGER DEFAULT 0,"
+                    " output_prefix TEXT,"
+                    " saved_paths TEXT,"
+                    " created_at REAL NOT NULL,"
+                    " updated_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                cursor = conn.execute(sql, args)
+                rows = cursor.fetchall()
+                conn.commit()
+                return rows
+            finally:
+                conn.close()
+
+    def record_created(self, task_id, config, params, source, workflow_id=None):
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO tasks (task_id, account, base_url, workflow_id, is_ai_app,"
+            " params_hash, source, status, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(task_id), account_fingerprint(config["api_key"], config["base_url"]), config["base_url"],
+             str(workflow_id or config.get("workflow_or_app_id", "")), int(bool(config.get("is_ai_app", False))),
+             hash_params(params), source, STATUS_CREATED, now, now),
+        )
+
+    def set_delivery(self, task_id, save_to_local, output_prefix):
+        """Remember how outputs should be saved so a resumed task can finish the job"""
+        self._execute(
+            "UPDATE tasks SET save_to_local = ?, output_prefix = ?, updated_at = ? WHERE task_id = ?",
+            (int(bool(save_to_local)), output_prefix, time.time(), str(task_id)),
+        )
+
+    def update_status(self, task_id, status, outputs=None, error=None):
+        # Never move a collected task back to an earlier state
+        self._execute(
+            "UPDATE tasks SET status = ?, outputs = COALESCE(?, outputs), error = COALESCE(?, error),"
+            " updated_at = ? WHERE task_id = ? AND status != ?",
+            (status, json.dumps(outputs) if outputs is not None else None, error,
+             time.time(), str(task_id), STATUS_COLLECTED),
+        )
+
+    def record_saved(self, task_id, saved_paths):
+        """
+        Mark a task COLLECTED once its outputs were written to disk.
+
+        Without saved files (saving off, or every download failed) the task
+        stays COMPLETED with its output URLs, so a later resume retries them.
+        """
+        if not saved_paths:
+            return
+        self._execute(
+            "UPDATE tasks SET status = ?, saved_paths = ?, updated_at = ? WHERE task_id = ?",
+            (STATUS_COLLECTED, json.dumps(saved_paths), time.time(), str(task_id)),
+        )
+
+    def get(self, task_id):
+        rows = self._execute("SELECT * FROM tasks WHERE task_id = ?", (str(task_id),))
+        return self._row_to_dict(rows[0]) if rows else None
+
+    def list_recent(self, limit=20):
+        rows = self._execute("SELECT * FROM tasks ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [self._row_to_dict(row) for row in rows]
+
+    def list_resumable(self, max_age=RESUME_MAX_AGE):
+        """Tasks still running, or completed but never collected locally"""
+        rows = self._execute(
+            "SELECT * FROM tasks WHERE created_at > ? AND (status IN (?, ?, ?)"
+            " OR (status = ? AND save_to_local = 1))",
+            (time.time() - max_age, *PENDING_STATUSES, STATUS_COMPLETED),
+        )
+        return [self._row_to_dict(row) for row in rows]
+
+    _COLUMNS = ("task_id", "account", "base_url", "workflow_id", "is_ai_app", "params_hash", "source",
+                "status", "error", "outputs", "save_to_local", "output_prefix", "saved_paths",
+                "created_at", "updated_at")
+
+    def _row_to_dict(self, row):
+        entry = dict(zip(self._COLUMNS, row))
+        for key in ("outputs", "saved_paths"):
+            entry[key] = json.loads(entry[key]) if entry[key] else None
+        entry["is_ai_app"] = bool(entry["is_ai_app"])
+        entry["save_to_local"] = bool(entry["save_to_local"])
+        return entry
+
+    def on_task_event(self, task_id, status, outputs=None, error=None):
+        """Task monitor listener: mirror status changes into the journal"""
+        try:
+            if status == "completed":
+                self.update_status(task_id, STATUS_COMPLETED, outputs=outputs or [])
+            elif status == "error":
+                self.update_status(task_id, STATUS_FAILED, error=error)
+            elif status in (STATUS_QUEUED, STATUS_RUNNING):
+                self.update_status(task_id, status)
+        except Exception as e:
+            print(f"⚠️ Could not update task journal for {task_id}: {e}")
+
+
+_journal_instance = None
+_journal_lock = threading.Lock()
+
+
+def get_task_journal():
+    """Return the process-wide journal (hooked into the task monitor), or None if unavailable"""
+    global _journal_instance
+    with _journal_lock:
+        if _journal_instance is None:
+            try:
+                _journal_instance = TaskJournal()
+                get_task_monitor().add_listener(_journal_instance.on_task_event)
+            except Exception as e:
+                print(f"⚠️ Task journal unavailable: {e}")
+                _journal_instance = False
+        return _journal_instance or None
+
+
+def journal_task_created(task_id, config, params, source, workflow_id=None):
+    """Record a newly created task; journal failures never break task submission"""
+    journal = get_task_journal()
+    if journal is None:
+        return
+    try:
+        journal.record_created(task_id, config, params, source, workflow_id=workflow_id)
+    except Exception as e:
+        print(f"⚠️ Could not journal task {task_id}: {e}")
+
+
+def recover_task(config, task_id, timeout=600, save_to_local=None, output_prefix=None):
+    """
+    Re-attach to a journaled (or any known) task and process its outputs.
+
+    Returns:
+        tuple | None: The processed outputs, as returned by _get_outputs
+    """
+    from .rh_utils import _get_outputs
+
+    journal = get_task_journal()
+    entry = journal.get(task_id) if journal else None
+    if save_to_local is None:
+        save_to_local = entry["save_to_local"] if entry else True
+    if output_prefix is None:
+        output_prefix = (entry or {}).get("output_prefix") or "RH_RECOVERED"
+
+    outputs = get_task_monitor().wait(task_id, config, timeout)
+    return _get_outputs(task_id, config, save_to_local, output_prefix, outputs=outputs)
+
+
+def resume_journaled_tasks():
+    """
+    Re-attach monitoring and downloads for tasks left over from a previous run.
+
+    Reads the journal in a background thread at startup and hands every task
+    to the shared task monitor; outputs of finished tasks are downloaded by a
+    small worker pool. Only tasks whose account matches the api_key in
+    config.json can be resumed, since keys are not journaled.
+    Disable with `"resume_tasks_on_startup": false` in config.json.
+    """
+    settings = load_plugin_settings()
+    if not settings.get("resume_tasks_on_startup", True):
+        return None
+
+    def _resume():
+        journal = get_task_journal()
+        if journal is None:
+            return
+        api_key = settings.get("api_key")
+        if not api_key:
+            return
+        try:
+            entries = journal.list_resumable()
+        except Exception as e:
+            print(f"⚠️ Could not read task journal: {e}")
+            return
+
+        monitor = get_task_monitor()
+        downloads = None
+        for entry in entries:
+            if entry["account"] != account_fingerprint(api_key, entry["base_url"]):
+                continue
+            config = {"api_key": api_key, "base_url": entry["base_url"],
+                      "workflow_or_app_id": entry["workflow_id"]}
+            print(f"↻ Resuming journaled task {entry['task_id']} ({entry['status']})")
+            # The journal listener keeps the status up to date; no thread waits on the task
+            remaining = max(60, RESUME_MAX_AGE - (time.time() - entry["created_at"]))
+            future = monitor.watch_until(entry["task_id"], config, remaining)
+            if entry["save_to_local"]:
+                if downloads is None:
+                    downloads = ThreadPoolExecutor(max_workers=RESUME_DOWNLOAD_WORKERS,
+                                                   thread_name_prefix="rh-resume")
+                future.add_done_callback(
+                    lambda f, config=config, entry=entry: downloads.submit(_collect_resumed, config, entry, f)
+                )
+            else:
+                future.add_done_callback(lambda f, entry=entry: _report_resumed(entry, f))
+
+    thread = threading.Thread(target=_resume, name="rh-journal-resume", daemon=True)
+    thread.start()
+    return thread
+
+
+def _report_resumed(entry, future):
+    try:
+        future.result()
+    except Exception as e:
+        print(f"⚠️ Could not resume task {entry['task_id']}: {e}")
+
+
+def _collect_resumed(config, entry, future):
+    from .rh_utils import _get_outputs
+
+    try:
+        outputs = future.result()
+        _get_outputs(entry["task_id"], config, True, entry.get("output_prefix") or "RH_RECOVERED", outputs=outputs)
+        print(f"✓ Resumed task {entry['task_id']} collected")
+    except Exception as e:
+        print(f"⚠️ Could not resume task {entry['task_id']}: {e}")
@@ -2,7 +2,10 @@
 RH_TaskManager Node - Manage RunningHub tasks
 """
 
+from datetime import datetime
 from .rh_utils import get_task_status, cancel_task, _validate_config
+from .rh_task_journal import get_task_journal, recover_task
+from .rh_task_scheduler import describe_schedulers
 
 class RH_TaskManager:
     """
@@ -11,6 +14,9 @@ class RH_TaskManager:
 
     ACTION_GET_STATUS = "Get Status"
     ACTION_CANCEL = "Cancel Task"
+    ACTION_LIST_JOURNAL = "List Journal"
+    ACTION_RECOVER = "Recover Task"
+    ACTION_QUEUE_STATUS = "Queue Status"
 
     @classmethod
     def INPUT_TYPES(cls):
@@ -18,7 +24,8 @@ class RH_TaskManager:
             "required": {
                 "config": ("RH_CONFIG", ),
                 "task_id": ("STRING", {"multiline": False, "default": ""}),
-                "action": ([cls.ACTION_GET_STATUS, cls.ACTION_CANCEL], ),
+                "action": ([cls.ACTION_GET_STATUS, cls.ACTION_CANCEL, cls.ACTION_LIST_JOURNAL, cls.ACTION_RECOVER,
+                            cls.ACTION_QUEUE_STATUS], ),
             }
         }
 
@@ -33,8 +40,9 @@ class RH_TaskManager:
         Performs the selected action on the given task ID.
         """
         _validate_config(config)
-        if not task_id or not task_id.strip():
+        if action not in (self.ACTION_LIST_JOURNAL, self.ACTION_QUEUE_STATUS) and (not task_id or not task_id.strip()):
             raise ValueError("Task ID is required.")
+        task_id = task_id.strip()
 
         print(f"Performing action '{action}' on task '{task_id}'...")
         result_message = ""
@@ -64,6 +72,28 @@ class RH_TaskManager:
                     result_message = f"Failed to cancel task {task_id}. It may have already completed or failed."
                 print(result_message)
 
+            elif action == self.ACTION_LIST_JOURNAL:
+                result_message = self._list_journal()
+                print(result_message)
+
+            elif action == self.ACTION_RECOVER:
+                # Re-attach to the task and download its outputs without re-submitting it
+                outputs = recover_task(config, task_id)
+                if outputs is None:
+                    result_message = f"Task {task_id} completed with no output."
+                else:
+                    journal = get_task_journal()
+                    entry = journal.get(task_id) if journal else None
+                    saved = (entry or {}).get("saved_paths") or []
+                    result_message = f"Recovered task {task_id}."
+                    if saved:
+                        result_message += " Saved files:\n" + "\n".join(saved)
+                print(result_message)
+
+            elif action == self.ACTION_QUEUE_STATUS:
+                result_message = f"Task queue: {describe_schedulers()}"
+                print(result_message)
+
         except Exception as e:
             result_message = f"An error occurred: {e}"
             print(f"❌ {result_message}")
@@ -71,3 +101,19 @@ class RH_TaskManager:
 
         return (result_message,)
 
+    def _list_journal(self, limit=20):
+        """Format the most recent journaled tasks as a table"""
+        journal = get_task_journal()
+        if journal is None:
+            return "Task journal is not available."
+        entries = journal.list_recent(limit)
+        if not entries:
+            return "No journaled tasks."
+        lines = [f"Last {len(entries)} journaled tasks:"]
+        for entry in entries:
+            created = datetime.fromtimestamp(entry["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            line = f"{entry['task_id']}  {entry['status']:<9}  {created}  {entry['source']}  workflow={entry['workflow_id']}"
+            if entry.get("error"):
+                line += f"  error={entry['error']}"
+            lines.append(line)
+        return "\n".join(lines)
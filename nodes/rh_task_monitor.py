@@ -0,0 +1,396 @@
+"""
+RH Task Monitor - One background poller for every in-flight RunningHub task
+RH_Execute, RH_Download and RH_TaskManager subscribe to it instead of polling on their own
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from .rh_poll_policy import PollPolicy, LatencyHistory
+
+MAX_PARALLEL_POLLS = 8
+LOG_INTERVAL = 15
+FINISHED_HISTORY_SIZE = 200
+# Poll interval used while a push channel (WebSocket/webhook) is expected to signal completion
+PUSH_SAFETY_NET_INTERVAL = 30
+
+
+class _WatchedTask:
+    """Book-keeping for one task tracked by the monitor"""
+
+    def __init__(self, task_id, config, timeout=None):
+        self.task_id = task_id
+        self.api_key = config["api_key"]
+        self.base_url = config["base_url"]
+        self.workflow_id = config.get("workflow_or_app_id", "")
+        self.started_at = time.time()
+        self.next_poll_at = self.started_at
+        self.timeout = timeout
+        self.last_status = None
+        self.last_log_time = 0
+        self.polls_made = 0
+        self.queued_polls = 0
+        self.running_since = None
+        self.expected_duration = None
+        self.subscribers = 0
+        self.future = Future()
+
+
+class TaskMonitor:
+    """
+    Process-wide scheduler that polls all in-flight tasks from a single thread.
+
+    Each tick collects every task whose poll is due and checks them together
+    over the shared transport; per-task poll times come from the PollPolicy. Waiters block on a Future that resolves with the
+    task's outputs list, so no caller has to poll /task/openapi/outputs again.
+    """
+
+    def __init__(self, policy=None, history=None, max_parallel_polls=MAX_PARALLEL_POLLS):
+        self.policy = policy or PollPolicy.from_settings()
+        self.history = history or LatencyHistory()
+        self._tasks = {}
+        self._finished = OrderedDict()
+        self._push_active = set()
+        self._listeners = []
+        self._deadlines = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel_polls, thread_name_prefix="rh-poll")
+
+    def watch(self, task_id, config, timeout=None):
+        """
+        Start tracking a task (or join an existing subscription).
+
+        `timeout` lets the poll policy spread a request budget over the wait.
+
+        Returns:
+            Future: Resolves with the outputs list ([] if the task produced none),
+            or raises if the task failed on the server.
+        """
+        with self._cond:
+            finished = self._finished.get(task_id)
+            if finished is not None:
+                return finished
+            task = self._tasks.get(task_id)
+            if task is None:
+                task = _WatchedTask(task_id, config, timeout)
+                task.expected_duration = self.history.estimate(task.workflow_id)
+                self._tasks[task_id] = task
+            task.subscribers += 1
+            self._ensure_thread()
+            self._cond.notify_all()
+            return task.future
+
+    def wait(self, task_id, config, timeout):
+        """Block until the task completes and return its outputs list"""
+        future = self.watch(task_id, config, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Task timeout after {timeout} seconds")
+        finally:
+            self.unwatch(task_id)
+
+    def watch_until(self, task_id, config, timeout):
+        """
+        Like `watch`, but the subscription ends by itself after `timeout` seconds.
+
+        The deadline is enforced by the monitor thread, so no caller thread has
+        to block on the task.
+
+        Returns:
+            Future: Resolves like the task's future, or raises TimeoutError once
+            the deadline passes first.
+        """
+        result = Future()
+        task_future = self.watch(task_id, config, timeout)
+
+        def relay(done):
+            try:
+                error = done.exception()
+                if error is not None:
+                    result.set_exception(error)
+                else:
+                    result.set_result(done.result())
+            except InvalidStateError:
+                # The deadline fired first
+                pass
+
+        task_future.add_done_callback(relay)
+        if not result.done():
+            with self._cond:
+                self._deadlines.append((time.time() + timeout, task_id, result))
+                self._cond.notify_all()
+        return result
+
+    def poke(self, task_id):
+        """Ask for an immediate poll of a task, e.g. after an external completion signal"""
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is not None:
+                task.next_poll_at = time.time()
+                self._cond.notify_all()
+
+    def add_listener(self, callback):
+        """
+        Register `callback(task_id, status, outputs=None, error=None)`.
+
+        Called with "QUEUED"/"RUNNING" on status changes, "completed" with the
+        outputs list, or "error" with the error message.
+        """
+        with self._cond:
+            self._listeners.append(callback)
+
+    def _notify(self, task_id, status, outputs=None, error=None):
+        for callback in list(self._listeners):
+            try:
+                callback(task_id, status, outputs=outputs, error=error)
+            except Exception as e:
+                print(f"⚠️ Task listener failed for {task_id}: {e}")
+
+    def deliver(self, task_id, status):
+        """
+        Feed a status obtained outside the poller (e.g. a webhook callback).
+
+        Tracked tasks are handled exactly like a poll result. A final status for a
+        task nobody is waiting on yet is remembered, so a later `watch` resolves
+        immediately without any status request.
+        """
+        with self._cond:
+            task = self._tasks.get(task_id)
+        if task is not None:
+            self._handle_status(task, status)
+            return
+
+        task_status = status.get("taskStatus") if isinstance(status, dict) else None
+        if isinstance(status, list) or task_status in ("completed_no_output", "error"):
+            future = Future()
+            if task_status == "error":
+                future.set_exception(Exception(f"Task failed on RunningHub server: {status.get('error', 'Unknown error')}"))
+            else:
+                future.set_result(status if isinstance(status, list) else [])
+            with self._cond:
+                self._push_active.discard(task_id)
+                self._finished[task_id] = future
+                while len(self._finished) > FINISHED_HISTORY_SIZE:
+                    self._finished.popitem(last=False)
+            if task_status == "error":
+                self._notify(task_id, "error", error=status.get('error', 'Unknown error'))
+            else:
+                self._notify(task_id, "completed", outputs=future.result())
+
+    def set_push_active(self, task_id, active):
+        """
+        Mark whether a push channel is delivering events for a task.
+
+        While active, the task is only polled every PUSH_SAFETY_NET_INTERVAL
+        seconds; turning it off resumes the normal poll schedule immediately.
+        """
+        with self._cond:
+            if active:
+                self._push_active.add(task_id)
+            else:
+                self._push_active.discard(task_id)
+                task = self._tasks.get(task_id)
+                if task is not None:
+                    task.next_poll_at = min(task.next_poll_at, time.time() + self.policy.initial_interval)
+                    self._cond.notify_all()
+
+    def get_status(self, task_id):
+        """
+        Return the last known status of a tracked task without an HTTP call.
+
+        Returns:
+            list | dict | None: outputs list if completed, a status dict if still
+            in flight, or None if the task is not known to the monitor.
+        """
+        with self._cond:
+            finished = self._finished.get(task_id)
+            task = self._tasks.get(task_id)
+        if finished is not None:
+            try:
+                return finished.result(timeout=0)
+            except Exception as e:
+                return {"taskStatus": "error", "error": str(e)}
+        if task is not None and task.last_status:
+            return {"taskStatus": task.last_status}
+        return None
+
+    def in_flight(self):
+        """Return the IDs of all tasks currently being tracked"""
+        with self._cond:
+            return list(self._tasks.keys())
+
+    def unwatch(self, task_id):
+        """Drop one subscription taken with `watch`; polling stops when none remain"""
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return
+            task.subscribers -= 1
+            if task.subscribers <= 0 and not task.future.done():
+                # Nobody is waiting any more (e.g. timeout); stop polling it
+                del self._tasks[task_id]
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="rh-task-monitor", daemon=True)
+            self._thread.start()
+
+    def _next_interval(self, task, status, now):
+        if task.task_id in self._push_active and task.polls_made >= self.policy.initial_polls:
+            return PUSH_SAFETY_NET_INTERVAL
+        return self.policy.next_interval(
+            status=status,
+            polls_made=task.polls_made,
+            queued_polls=task.queued_polls,
+            elapsed=now - task.started_at,
+            running_for=(now - task.running_since) if task.running_since else None,
+            expected_duration=task.expected_duration,
+            timeout=task.timeout,
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.time()
+                expired = self._pop_expired(now)
+                due = [t for t in self._tasks.values() if t.next_poll_at <= now]
+                if not due and not expired:
+                    wake_times = [t.next_poll_at for t in self._tasks.values()]
+                    wake_times += [deadline for deadline, _, _ in self._deadlines]
+                    self._cond.wait(timeout=max(0.05, min(wake_times) - now) if wake_times else None)
+                    continue
+
+            for task_id, result in expired:
+                try:
+                    result.set_exception(TimeoutError(f"Stopped watching task {task_id}: deadline passed"))
+                except InvalidStateError:
+                    pass
+
+            # Poll every due task in this tick concurrently over the pooled session
+            polls = []
+            for task in due:
+                try:
+                    polls.append((task, self._executor.submit(self._poll, task)))
+                except Exception as e:
+                    self._fail(task, e)
+            for task, poll in polls:
+                # One bad status, policy or listener must not take the only monitor thread down
+                try:
+                    self._handle_status(task, poll.result())
+                except Exception as e:
+                    self._fail(task, e)
+
+    def _pop_expired(self, now):
+        """Drop watch_until subscriptions past their deadline; call with the lock held"""
+        expired, remaining = [], []
+        for deadline, task_id, result in self._deadlines:
+            if result.done():
+                continue
+            if deadline <= now:
+                self.unwatch(task_id)
+                expired.append((task_id, result))
+            else:
+                remaining.append((deadline, task_id, result))
+        self._deadlines = remaining
+        return expired
+
+    def _fail(self, task, error):
+        """Fail only this task's future after an unexpected error while handling it"""
+        print(f"⚠️ Task monitor error for {task.task_id}: {error}")
+        try:
+            self._finish(task, error=Exception(f"Task monitoring failed: {error}"))
+        except Exception:
+            with self._cond:
+                self._tasks.pop(task.task_id, None)
+                self._push_active.discard(task.task_id)
+            if not task.future.done():
+                task.future.set_exception(error)
+
+    def _poll(self, task):
+        from .rh_utils import _check_task_status
+        try:
+            return _check_task_status(task.task_id, task.api_key, task.base_url)
+        except Exception as e:
+            return {"taskStatus": "RUNNING", "poll_error": str(e)}
+
+    def _handle_status(self, task, status):
+        now = time.time()
+        elapsed = int(now - task.started_at)
+        task.polls_made += 1
+
+        if isinstance(status, list):
+            print(f"✓ Task {task.task_id} completed successfully! ({elapsed}s)")
+            self._record_latency(task, now)
+            self._finish(task, result=status)
+            return
+
+        task_status = status.get("taskStatus") if isinstance(status, dict) else None
+        if task_status == "completed_no_output":
+            print(f"✓ Task {task.task_id} completed with no output ({elapsed}s)")
+            self._finish(task, result=[])
+            return
+        if task_status == "error":
+            error_msg = status.get('error', 'Unknown error')
+            self._finish(task, error=Exception(f"Task failed on RunningHub server: {error_msg}"))
+            return
+
+        if task_status is None:
+            if now - task.last_log_time > LOG_INTERVAL:
+                print(f"[{elapsed}s] Task {task.task_id}: unexpected status response. Retrying...")
+                task.last_log_time = now
+        elif task_status != task.last_status:
+            print(f"[{elapsed}s] Task {task.task_id} status changed to: {task_status}")
+            task.last_log_time = now
+            self._notify(task.task_id, task_status)
+        elif now - task.last_log_time > LOG_INTERVAL:
+            print(f"[{elapsed}s] Task {task.task_id} is still {task_status}...")
+            task.last_log_time = now
+        task.last_status = task_status or task.last_status
+        if task_status == "QUEUED":
+            task.queued_polls += 1
+        elif task_status == "RUNNING" and task.running_since is None:
+            task.running_since = now
+
+        with self._cond:
+            task.next_poll_at = now + self._next_interval(task, task.last_status, now)
+
+    def _record_latency(self, task, now):
+        # Only the RUNNING phase is predictable; skip tasks that were never seen running
+        if task.running_since is not None:
+            self.history.record(task.workflow_id, now - task.running_since)
+
+    def _finish(self, task, result=None, error=None):
+        with self._cond:
+            # A push event and a poll can race to report the same completion
+            if task.future.done():
+                return
+            self._tasks.pop(task.task_id, None)
+            self._push_active.discard(task.task_id)
+            self._finished[task.task_id] = task.future
+            while len(self._finished) > FINISHED_HISTORY_SIZE:
+                self._finished.popitem(last=False)
+            if error is not None:
+                task.future.set_exception(error)
+            else:
+                task.future.set_result(result)
+        if error is not None:
+            self._notify(task.task_id, "error", error=str(error))
+        else:
+            self._notify(task.task_id, "completed", outputs=result)
+
+
+_monitor_instance = None
+_monitor_lock = threading.Lock()
+
+
+def get_task_monitor():
+    """Return the process-wide task monitor"""
+    global _monitor_instance
+    with _monitor_lock:
+        if _monitor_instance is None:
+            _monitor_instance = TaskMonitor()
+        return _monitor_instance
@@ -0,0 +1,260 @@
+"""
+RH Task Scheduler - Client-side queue in front of task creation
+Submits tasks only while the account has free concurrent slots and requeues quota rejections
+"""
+
+import time
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .rh_storage import load_plugin_settings, account_fingerprint
+from .rh_transport import get_transport, is_quota_error
+from .rh_task_monitor import get_task_monitor
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+STATUS_REFRESH_INTERVAL = 5
+MAX_PARALLEL_SUBMISSIONS = 8
+# Retry delay for a rejected job while the running count cannot be read
+REQUEUE_BACKOFF_BASE = 5
+REQUEUE_BACKOFF_MAX = 60
+# A slot is released after this long even if the task's status cannot be read
+SLOT_RELEASE_TIMEOUT = 2 * 3600
+
+
+class _Job:
+    def __init__(self, priority, seq, create_fn):
+        self.priority = priority
+        self.seq = seq
+        self.create_fn = create_fn
+        self.future = Future()
+        self.rejections = 0
+        self.not_before = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class TaskScheduler:
+    """
+    Priority queue of pending task creations for one account.
+
+    Capacity is either fixed (`max_concurrent_tasks` in config.json) or learned:
+    the scheduler starts optimistic and, on the first quota rejection, sets its
+    capacity to the number of tasks the account was running at that moment.
+    While all slots are busy it refreshes the running count from RunningHub's
+    account status endpoint, and slots are also released as soon as the task
+    monitor sees one of our tasks finish. When the running count cannot be
+    read, the next queued job is simply tried again after a backoff, so a
+    stale count never stalls the queue.
+    """
+
+    def __init__(self, config, capacity=None):
+        self.api_key = config["api_key"]
+        self.base_url = config["base_url"]
+        self.capacity = capacity
+        self._queue = []
+        self._seq = itertools.count()
+        self._in_use = 0
+        self._submitting = 0
+        self._our_tasks = set()
+        self._last_refresh = 0
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_SUBMISSIONS, thread_name_prefix="rh-submit")
+        self._thread = threading.Thread(target=self._run, name="rh-task-scheduler", daemon=True)
+        self._thread.start()
+        get_task_monitor().add_listener(self._on_task_event)
+
+    def submit(self, create_fn, priority=PRIORITY_INTERACTIVE):
+        """
+        Queue a task creation.
+
+        Args:
+            create_fn: Callable that creates the task and returns (task_id, task_info)
+            priority: Lower numbers are submitted first
+
+        Returns:
+            Future: Resolves with create_fn's result once the task was accepted
+        """
+        with self._cond:
+            job = _Job(priority, next(self._seq), create_fn)
+            heapq.heappush(self._queue, job)
+            self._cond.notify_all()
+            return job.future
+
+    def cancel(self, future):
+        """
+        Drop a job that is still waiting in the queue.
+
+        Returns:
+            bool: False if the job was already being submitted (or done)
+        """
+        with self._cond:
+            for index, job in enumerate(self._queue):
+                if job.future is future:
+                    self._queue.pop(index)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                    break
+            else:
+                return False
+        future.cancel()
+        return True
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def describe(self):
+        """Human-readable summary of the queue state"""
+        with self._cond:
+            capacity = self.capacity if self.capacity else "unknown (learning)"
+            return (f"Queued: {len(self._queue)}, submitting: {self._submitting}, "
+                    f"running: {self._in_use}, capacity: {capacity}")
+
+    def _free_slots(self):
+        if not self.capacity:
+            return MAX_PARALLEL_SUBMISSIONS - self._submitting
+        return self.capacity - self._in_use - self._submitting
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                now = time.time()
+                if self._queue[0].not_before > now:
+                    # Rejected job backing off; the account is full, so everything waits behind it
+                    self._cond.wait(timeout=self._queue[0].not_before - now)
+                    continue
+                needs_refresh = False
+                if self._free_slots() <= 0:
+                    needs_refresh = now - self._last_refresh >= STATUS_REFRESH_INTERVAL
+                    if not needs_refresh:
+                        self._cond.wait(timeout=STATUS_REFRESH_INTERVAL)
+                        continue
+                    job = None
+                else:
+                    job = heapq.heappop(self._queue)
+                    self._submitting += 1
+
+            if needs_refresh:
+                if self._refresh_running_count() is not None:
+                    continue
+                with self._cond:
+                    # Count unknown: don't trust the stale one, probe with the next job instead
+                    if not self._queue or self._submitting or self._queue[0].not_before > time.time():
+                        continue
+                    job = heapq.heappop(self._queue)
+                    self._submitting += 1
+            self._executor.submit(self._dispatch, job)
+
+    def _dispatch(self, job):
+        try:
+            result = job.create_fn()
+        except Exception as e:
+            if not is_quota_error(e):
+                with self._cond:
+                    self._submitting -= 1
+                    self._cond.notify_all()
+                job.future.set_exception(e)
+                return
+
+            # The account is full: learn the capacity from what it is running and try again later
+            count = self._refresh_running_count()
+            with self._cond:
+                self._submitting -= 1
+                job.rejections += 1
+                if count is None:
+                    # Without a fresh count neither learn nor block on the old one; just back off
+                    delay = min(REQUEUE_BACKOFF_MAX, REQUEUE_BACKOFF_BASE * 2 ** (job.rejections - 1))
+                    job.not_before = time.time() + delay
+                    print(f"ℹ No free task slot on RunningHub, retrying in {delay}s")
+                else:
+                    if not self.capacity:
+                        self.capacity = max(1, count)
+                        print(f"ℹ Learned concurrent task capacity: {self.capacity}")
+                    print("ℹ No free task slot on RunningHub, task requeued")
+                    self._in_use = max(self._in_use, self.capacity)
+                heapq.heappush(self._queue, job)
+                self._cond.notify_all()
+            return
+
+        task_id = result[0]
+        with self._cond:
+            self._submitting -= 1
+            self._in_use += 1
+            self._our_tasks.add(task_id)
+            self._cond.notify_all()
+        # Make sure the monitor sees this task finish, so its slot is released promptly; a task
+        # whose status cannot be read gives its slot back after SLOT_RELEASE_TIMEOUT
+        get_task_monitor().watch_until(
+            task_id, {"api_key": self.api_key, "base_url": self.base_url}, SLOT_RELEASE_TIMEOUT
+        ).add_done_callback(lambda _: self._release(task_id))
+        job.future.set_result(result)
+
+    def _refresh_running_count(self):
+        """
+        Ask RunningHub how many tasks the account is running right now.
+
+        Returns:
+            int | None: The count, or None if it could not be read
+        """
+        url = f"{self.base_url}/uc/openapi/accountStatus"
+        try:
+            response = get_transport(self.base_url).post(url, json={"apikey": self.api_key}, timeout=10)
+            response.raise_for_status()
+            result = response.json()
+            count = (result.get("data") or {}).get("currentTaskCounts")
+            if count is None:
+                raise ValueError("response has no currentTaskCounts")
+            count = int(count)
+        except Exception as e:
+            count = None
+            print(f"⚠️ Could not query account status: {e}")
+        with self._cond:
+            self._last_refresh = time.time()
+            if count is not None:
+                self._in_use = count
+            self._cond.notify_all()
+        return count
+
+    def _on_task_event(self, task_id, status, outputs=None, error=None):
+        if status in ("completed", "error"):
+            self._release(task_id)
+
+    def _release(self, task_id):
+        """Give back the slot of one of our tasks (once)"""
+        with self._cond:
+            if task_id in self._our_tasks:
+                self._our_tasks.discard(task_id)
+                self._in_use = max(0, self._in_use - 1)
+                self._cond.notify_all()
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_task_scheduler(config):
+    """Return the scheduler for the config's account, creating it on first use"""
+    key = account_fingerprint(config["api_key"], config["base_url"])
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            capacity = load_plugin_settings().get("max_concurrent_tasks")
+            scheduler = TaskScheduler(config, capacity=int(capacity) if capacity else None)
+            _schedulers[key] = scheduler
+        return scheduler
+
+
+def describe_schedulers():
+    """Summary of every account's queue, for RH_TaskManager"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    if not schedulers:
+        return "No tasks have been scheduled in this session."
+    return "\n".join(s.describe() for s in schedulers)
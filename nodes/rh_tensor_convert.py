@@ -0,0 +1,137 @@
+"""
+RH Tensor Convert - IMAGE/MASK tensors to uint8 arrays for encoding
+One clamped, rounded torch operation per batch, on the tensor's own device
+"""
+
+import threading
+
+import numpy as np
+import torch
+
+# Largest scratch buffer kept per thread; bigger images allocate per call, so a
+# long-lived thread (e.g. ComfyUI's executor) never holds more than this
+MAX_SCRATCH_BYTES = 32 * 1024 * 1024
+
+_buffers = threading.local()
+
+
+def _buffer(name, shape, dtype):
+    """Per-thread CPU scratch tensor, reallocated only when the shape changes"""
+    cache = getattr(_buffers, "cache", None)
+    if cache is None:
+        cache = _buffers.cache = {}
+    buf = cache.get(name)
+    if buf is None or buf.dtype != dtype or tuple(buf.shape) != tuple(shape):
+        buf = torch.empty(shape, dtype=dtype)
+        if buf.numel() * buf.element_size() <= MAX_SCRATCH_BYTES:
+            cache[name] = buf
+        else:
+            cache.pop(name, None)
+    return buf
+
+
+def to_uint8(tensor, reuse_buffers=False):
+    """
+    Convert a float tensor in [0, 1] to a contiguous uint8 numpy array.
+
+    Scaling, clamping and rounding happen in place on one float copy (on the
+    GPU if the tensor lives there), and only the uint8 result is moved to the
+    CPU. With reuse_buffers, CPU tensors use per-thread scratch buffers (up to
+    MAX_SCRATCH_BYTES each), so the returned array is only valid until the next
+    reusing call in the same thread; the upload nodes encode it right away.
+    GPU tensors never keep scratch memory past the call.
+
+    Args:
+        tensor: torch.Tensor (any shape) or array-like
+        reuse_buffers: Reuse this thread's scratch buffers instead of allocating
+
+    Returns:
+        np.ndarray: uint8 array with the same shape
+    """
+    if not isinstance(tensor, torch.Tensor):
+        tensor = torch.as_tensor(np.asarray(tensor))
+    tensor = tensor.detach()
+    if tensor.dtype == torch.uint8:
+        return tensor.cpu().contiguous().numpy()
+    if not tensor.is_floating_point():
+        tensor = tensor.float()
+
+    reuse_buffers = reuse_buffers and tensor.device.type == "cpu"
+    if reuse_buffers:
+        scaled = torch.mul(tensor, 255.0, out=_buffer("float", tensor.shape, tensor.dtype))
+    else:
+        scaled = tensor.mul(255.0)
+    scaled.clamp_(0, 255).round_()
+
+    if reuse_buffers:
+        result = _buffer("uint8", scaled.shape, torch.uint8).copy_(scaled)
+    else:
+        result = scaled.to(torch.uint8).cpu()
+    return result.contiguous().numpy()
+
+
+def image_batch_to_uint8(images):
+    """Whole IMAGE batch [B, H, W, C] as one uint8 array [B, H, W, C]"""
+    if images.ndim == 3:
+        images = images.unsqueeze(0)
+    return to_uint8(images)
+
+
+def image_to_uint8(image, index=0, reuse_buffers=True):
+    """
+    One image of an IMAGE batch as [H, W, C] uint8 ([H, W] for single-channel).
+
+    Only the selected image is converted, not the whole batch.
+    """
+    if not isinstance(image, torch.Tensor):
+        image = torch.as_tensor(np.asarray(image))
+    if image.ndim == 4:
+        image = image[index]
+    array = to_uint8(image, reuse_buffers=reuse_buffers)
+    if array.ndim == 3 and array.shape[-1] == 1:
+        array = array[..., 0]
+    return array
+
+
+def mask_to_uint8(mask, index=0, reuse_buffers=True):
+    """One mask of a MASK batch [B, H, W] as [H, W] uint8"""
+    if not isinstance(mask, torch.Tensor):
+        mask = torch.as_tensor(np.asarray(mask))
+    if mask.ndim == 3:
+        mask = mask[index]
+    array = to_uint8(mask, reuse_buffers=reuse_buffers)
+    if array.ndim != 2:
+        raise ValueError(f"Mask must be 2D after batch removal, got shape: {array.shape}")
+    return array
+
+
+def image_mask_to_rgba(image, mask, index=0):
+    """
+    One image with its mask packed into the alpha channel, as [H, W, 4] uint8.
+
+    Alpha is 1 - mask, the convention ComfyUI's LoadImage uses to read masks,
+    so loading the file on RunningHub gives back the same mask. A mask of a
+    different size is resized to the image (bilinear) before packing.
+    """
+    if not isinstance(image, torch.Tensor):
+        image = torch.as_tensor(np.asarray(image))
+    if not isinstance(mask, torch.Tensor):
+        mask = torch.as_tensor(np.asarray(mask))
+    if image.ndim == 4:
+        image = image[index]
+    if mask.ndim == 3:
+        mask = mask[min(index, mask.shape[0] - 1)]
+    if image.ndim == 2:
+        image = image.unsqueeze(-1)
+    image = image.detach().float()
+    mask = mask.detach().to(device=image.device, dtype=image.dtype)
+
+    height, width = image.shape[:2]
+    if tuple(mask.shape) != (height, width):
+        mask = torch.nn.functional.interpolate(
+            mask[None, None], size=(height, width), mode="bilinear", align_corners=False
+        )[0, 0]
+
+    rgb = image[..., :3] if image.shape[-1] >= 3 else image[..., :1].expand(height, width, 3)
+    rgba = torch.cat([rgb, (1.0 - mask).unsqueeze(-1)], dim=-1)
+    return to_uint8(rgba)
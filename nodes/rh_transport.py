@@ -0,0 +1,212 @@
+"""
+RH Transport - Pooled, keep-alive HTTP transport shared by all RunningHub calls
+One requests.Session per base URL with a unified retry/backoff policy
+"""
+
+import time
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Business errors returned by RunningHub that will not go away by retrying
+NON_RETRYABLE_ERRORS = [
+    "WORKFLOW_NOT_SAVED_OR_NOT_RUNNING",
+    "WORKFLOW_NOT_FOUND",
+    "INVALID_WORKFLOW_ID",
+    "INVALID_API_KEY",
+    "INSUFFICIENT_BALANCE",
+]
+
+
+# Rejections meaning the account's concurrent task slots are all in use
+QUOTA_ERRORS = [
+    "TASK_QUEUE_MAXED",
+    "TASK_INSTANCE_MAXED",
+]
+
+
+class RHAPIError(Exception):
+    """Error reported by the RunningHub API (non-zero `code` or HTTP error)"""
+
+    def __init__(self, message, retryable=True, result=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.result = result
+
+
+def is_quota_error(message):
+    """Return True if a RunningHub error means no task slot is free right now"""
+    return any(err in str(message) for err in QUOTA_ERRORS)
+
+
+def is_retryable_error(message):
+    """
+    Return False for RunningHub business errors that should not be retried.
+
+    Quota rejections are not retried here either; the task scheduler requeues
+    them once a slot frees up instead of hammering the API.
+    """
+    if is_quota_error(message):
+        return False
+    return not any(err in str(message) for err in NON_RETRYABLE_ERRORS)
+
+
+class RHTransport:
+    """
+    Keep-alive HTTP client for RunningHub.
+
+    Wraps a pooled requests.Session so status polls, uploads and downloads reuse
+    TCP+TLS connections, and provides `call_api` with retry, exponential backoff
+    with jitter and shared error classification.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff capped at backoff_max, randomized to avoid synchronized retries"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def call_api(self, url, json_payload=None, data=None, files=None, timeout=30,
+                 max_retries=None, before_attempt=None, label="Request", headers=None):
+        """
+        POST to a RunningHub API endpoint and return the decoded result.
+
+        Args:
+            url: Full endpoint URL
+            json_payload: JSON body (mutually exclusive with data/files)
+            data: Form fields for multipart requests, or a prepared streaming body
+            files: Files for multipart requests
+            timeout: Per-attempt timeout in seconds, or a (connect, read) tuple
+            max_retries: Number of attempts (defaults to the transport's setting)
+            before_attempt: Optional callable run before every attempt (e.g. rewind a buffer)
+            label: Text used in progress messages
+            headers: Extra request headers (e.g. the Content-Type of a streaming body)
+
+        Returns:
+            dict: The API result with `code == 0`
+
+        Raises:
+            RHAPIError: On a non-retryable error (`retryable=False`) or after all
+                attempts fail (`retryable=True`)
+        """
+        attempts = max_retries or self.max_retries
+        last_error = None
+        for attempt in range(attempts):
+            try:
+                print(f"{label} (attempt {attempt + 1}/{attempts})...")
+                if before_attempt:
+                    before_attempt()
+                if json_payload is not None:
+                    response = self.session.post(url, json=json_payload, headers=headers, timeout=timeout)
+                else:
+                    response = self.session.post(url, data=data, files=files, headers=headers, timeout=timeout)
+
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RHAPIError(f"HTTP {response.status_code}", retryable=True)
+                if response.status_code >= 400:
+                    raise RHAPIError(f"HTTP {response.status_code}: {response.text[:200]}", retryable=False)
+
+                result = response.json()
+                if result.get("code") == 0:
+                    return result
+
+                error_msg = result.get("msg", "Unknown error")
+                raise RHAPIError(error_msg, retryable=is_retryable_error(error_msg), result=result)
+
+            except RHAPIError as e:
+                last_error = e
+                if not e.retryable:
+                    print(f"❌ Business error (not retrying): {e}")
+                    raise
+            except (requests.exceptions.RequestException, ValueError) as e:
+                last_error = RHAPIError(str(e), retryable=True)
+
+            print(f"{label} attempt {attempt + 1} failed: {last_error}")
+            if attempt < attempts - 1:
+                wait_time = self.backoff_delay(attempt)
+                print(f"Retry in {wait_time:.1f} seconds...")
+                time.sleep(wait_time)
+
+        # Still a transient error, the retry budget is just used up
+        raise RHAPIError(f"{label} failed after {attempts} attempts: {last_error}",
+                         retryable=True, result=getattr(last_error, "result", None))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Allows bursts of up to `capacity` requests and a sustained `rate` per second.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(base_url=None, pool_size=None):
+    """
+    Return the shared transport for a base URL, creating it on first use.
+
+    RH_Config creates the transport with its configured pool size; every other
+    call site just looks it up by base URL. Output downloads, which go to CDN
+    hosts rather than the API, use the default transport (base_url=None).
+
+    The pool only grows: a larger pool_size replaces the transport and closes
+    the old session (requests in flight finish normally), a smaller one keeps
+    the existing pool.
+    """
+    key = (base_url or "").rstrip("/")
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None or (pool_size and pool_size > transport.pool_size):
+            previous = transport
+            transport = RHTransport(pool_size=pool_size or DEFAULT_POOL_SIZE)
+            _transports[key] = transport
+            if previous is not None:
+                previous.session.close()
+        return transport
@@ -1,14 +1,20 @@
 """
 RH_UploadAudio Node - Upload audio files to RunningHub
+Also uploads ComfyUI AUDIO inputs, encoded in memory
 """
 
 import os
+import mimetypes
 import folder_paths
 from .rh_utils import upload_file_to_rh
+from .rh_upload_cache import file_stat_key, hash_tensor, find_cached_upload
+from .rh_deferred_upload import DeferredUpload, filename_output
+from .rh_audio_encoder import encode_audio, clip_waveform, AUDIO_FORMATS, DEFAULT_OPUS_BITRATE_KBPS
 
 class RH_UploadAudio:
     """
     Accepts an audio file path, uploads it to RunningHub, and returns the server filename.
+    An AUDIO input (waveform + sample_rate) is encoded to FLAC/Opus in memory and uploaded instead.
     """
 
     @classmethod
@@ -26,6 +32,33 @@ class RH_UploadAudio:
                 "field_name": (field_names, {"default": "audio"}),
                 "custom_field_name": ("STRING", {"default": ""}),
                 "previous_params": ("RH_PARAMS", {"default": None}),
+                "defer_upload": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Put a pending upload into params instead of uploading now; RH_Execute/RH_BatchExecute upload all pending files in parallel before creating the task (the filename output is then empty; use params)"
+                }),
+                "audio": ("AUDIO", {
+                    "tooltip": "Audio from another node; encoded in memory and uploaded instead of audio_path"
+                }),
+                "audio_format": (AUDIO_FORMATS, {
+                    "default": "flac",
+                    "tooltip": "Encoding for the audio input: flac (lossless), opus (compact) or wav"
+                }),
+                "sample_rate": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 192000,
+                    "tooltip": "Resample the audio input to this rate (0 = keep; Opus uses 48000 unless the rate is one it supports)"
+                }),
+                "mono": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Downmix the audio input to one channel"
+                }),
+                "opus_bitrate_kbps": ("INT", {
+                    "default": DEFAULT_OPUS_BITRATE_KBPS,
+                    "min": 6,
+                    "max": 510,
+                    "tooltip": "Bitrate for opus"
+                }),
             }
         }
 
@@ -34,7 +67,13 @@ class RH_UploadAudio:
     FUNCTION = "upload"
     CATEGORY = "Ken-Chen/RH-API"
 
-    def upload(self, config, audio_path, node_id="", field_name="audio", custom_field_name="", previous_params=None):
+    def upload(self, config, audio_path, node_id="", field_name="audio", custom_field_name="", previous_params=None,
+               defer_upload=False, audio=None, audio_format="flac", sample_rate=0, mono=False,
+               opus_bitrate_kbps=DEFAULT_OPUS_BITRATE_KBPS):
+        if audio is not None:
+            return self._upload_audio_input(config, audio, node_id, field_name, custom_field_name, previous_params,
+                                            defer_upload, audio_format, sample_rate, mono, opus_bitrate_kbps)
+
         if not audio_path or not isinstance(audio_path, str) or not os.path.exists(audio_path):
             print("RH_UploadAudio: No valid audio path provided. Skipping upload.")
             return ("", previous_params if previous_params else [])
@@ -42,23 +81,17 @@ class RH_UploadAudio:
         if not isinstance(config, dict) or "api_key" not in config or "base_url" not in config:
             raise ValueError("Invalid config: must be from RH_Config node")
 
-        print(f"📤 Uploading audio from path: {audio_path}")
-        api_key = config["api_key"]
-        base_url = config["base_url"]
+        if defer_upload and node_id and node_id.strip():
+            print("⏳ Audio upload deferred until task submission")
+            filename = DeferredUpload(lambda: self._upload(config, audio_path),
+                                      f"audio:{file_stat_key(audio_path)}", os.path.basename(audio_path))
+        else:
+            filename = self._upload(config, audio_path)
 
-        try:
-            with open(audio_path, 'rb') as f:
-                filename = upload_file_to_rh(
-                    api_key=api_key,
-                    base_url=base_url,
-                    file_buffer=f,
-                    file_name=os.path.basename(audio_path),
-                    content_type='application/octet-stream',
-                    file_type='audio'
-                )
-        except Exception as e:
-            raise Exception(f"Failed to upload audio: {e}")
+        return (filename_output(filename), self._add_param(filename, node_id, field_name, custom_field_name, previous_params))
 
+    def _add_param(self, filename, node_id, field_name, custom_field_name, previous_params):
+        """Append the uploaded file to previous_params if node_id is provided"""
         params = previous_params if previous_params else []
         if node_id and node_id.strip():
             actual_field_name = custom_field_name.strip() if field_name == "custom" else field_name
@@ -73,4 +106,80 @@ class RH_UploadAudio:
                 params.append(new_param)
                 print(f"✓ RH Param added: Node {node_id}.{actual_field_name} = {filename}")
 
-        return (filename, params)
+        return params
+
+    def _upload_audio_input(self, config, audio, node_id, field_name, custom_field_name, previous_params,
+                            defer_upload, audio_format, sample_rate, mono, opus_bitrate_kbps):
+        """Upload an AUDIO dict, encoded in memory (no temporary files)"""
+        if not isinstance(config, dict) or "api_key" not in config or "base_url" not in config:
+            raise ValueError("Invalid config: must be from RH_Config node")
+        if not isinstance(audio, dict) or "waveform" not in audio:
+            raise ValueError("Invalid audio input: expected an AUDIO dict with 'waveform' and 'sample_rate'")
+
+        # Cached by the samples of the clip that gets encoded (the first of a batch) plus every
+        # setting that changes the encoded file
+        audio_key = hash_tensor(clip_waveform(audio), audio.get("sample_rate"), audio_format, sample_rate, mono,
+                                opus_bitrate_kbps if audio_format == "opus" else None)
+
+        def upload_encoded():
+            api_key = config["api_key"]
+            base_url = config["base_url"]
+            use_cache = config.get("use_upload_cache", True)
+            filename = find_cached_upload(api_key, base_url, audio_key) if use_cache else None
+            if filename:
+                print(f"✓ Audio unchanged since last upload, reusing: {filename}")
+                return filename
+
+            buffer, extension, content_type = encode_audio(audio, audio_format, sample_rate, mono, opus_bitrate_kbps)
+            print(f"📤 Uploading audio ({audio_format}, {buffer.getbuffer().nbytes / 1024 / 1024:.2f}MB)...")
+            try:
+                return upload_file_to_rh(
+                    api_key=api_key,
+                    base_url=base_url,
+                    file_buffer=buffer,
+                    file_name=f"audio{extension}",
+                    content_type=content_type,
+                    file_type='audio',
+                    use_cache=use_cache,
+                    cache_key=audio_key
+                )
+            except Exception as e:
+                raise Exception(f"Failed to upload audio: {e}")
+
+        if defer_upload and node_id and node_id.strip():
+            print("⏳ Audio upload deferred until task submission")
+            filename = DeferredUpload(upload_encoded, f"audio:{audio_key}", f"audio.{audio_format}")
+        else:
+            filename = upload_encoded()
+
+        return (filename_output(filename), self._add_param(filename, node_id, field_name, custom_field_name, previous_params))
+
+    def _upload(self, config, audio_path):
+        """Upload the audio file (or reuse a cached upload) and return its RunningHub fileName"""
+        print(f"📤 Uploading audio from path: {audio_path}")
+        api_key = config["api_key"]
+        base_url = config["base_url"]
+
+        use_cache = config.get("use_upload_cache", True)
+        stat_key = file_stat_key(audio_path) if use_cache else None
+        filename = find_cached_upload(api_key, base_url, stat_key) if use_cache else None
+
+        if filename:
+            print(f"✓ Audio unchanged since last upload, reusing: {filename}")
+        else:
+            try:
+                with open(audio_path, 'rb') as f:
+                    filename = upload_file_to_rh(
+                        api_key=api_key,
+                        base_url=base_url,
+                        file_buffer=f,
+                        file_name=os.path.basename(audio_path),
+                        content_type=mimetypes.guess_type(audio_path)[0] or 'application/octet-stream',
+                        file_type='audio',
+                        use_cache=use_cache,
+                        cache_key=stat_key
+                    )
+            except Exception as e:
+                raise Exception(f"Failed to upload audio: {e}")
+
+        return filename
@@ -0,0 +1,267 @@
+"""
+RH Upload Cache - Content-addressed cache in front of the RunningHub upload endpoint
+Identical payloads are uploaded once and the returned fileName is reused until it expires
+"""
+
+import io
+import os
+import time
+import hashlib
+import threading
+
+from .rh_storage import connect_db, load_plugin_settings, account_fingerprint
+
+# RunningHub removes uploaded files after a while, so cached names must expire
+# well before the server-side copy does.
+DEFAULT_TTL_SECONDS = 12 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_payload(file_buffer):
+    """
+    Compute the SHA-256 of an upload payload.
+
+    Args:
+        file_buffer: bytes-like object or a readable/seekable file object
+
+    Returns:
+        str: Hex digest of the payload
+    """
+    digest = hashlib.sha256()
+    if isinstance(file_buffer, (bytes, bytearray, memoryview)):
+        digest.update(file_buffer)
+        return digest.hexdigest()
+
+    file_buffer.seek(0)
+    while True:
+        chunk = file_buffer.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file_buffer.seek(0)
+    return digest.hexdigest()
+
+
+def hash_tensor(tensor, *extra):
+    """
+    Hash the raw contents of a tensor plus any settings that affect its encoding.
+
+    Lets upload nodes look up a previous upload before spending time on encoding.
+    """
+    digest = hashlib.sha256()
+    array = tensor.detach().cpu().contiguous().numpy()
+    digest.update(str(array.shape).encode("utf-8"))
+    digest.update(str(array.dtype).encode("utf-8"))
+    digest.update(memoryview(array).cast("B"))
+    for item in extra:
+        digest.update(b"|")
+        digest.update(str(item).encode("utf-8"))
+    return "tensor:" + digest.hexdigest()
+
+
+def file_stat_key(path):
+    """Cheap cache key for a file on disk based on its path, size and mtime"""
+    stat = os.stat(path)
+    return f"file:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class UploadCache:
+    """
+    SQLite-backed map of (account, content hash) -> RunningHub fileName.
+
+    Entries expire after `ttl_seconds` counted from the original upload, and the
+    least recently used entries are evicted once `max_entries` is exceeded.
+    """
+
+    DB_NAME = "upload_cache.sqlite3"
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS uploads ("
+                    " account TEXT NOT NULL,"
+                    " cache_key TEXT NOT NULL,"
+                    " file_name TEXT NOT NULL,"
+                    " file_type TEXT,"
+                    " created_at REAL NOT NULL,"
+                    " last_used REAL NOT NULL,"
+                    " PRIMARY KEY (account, cache_key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_uploads_last_used ON uploads (last_used)")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def lookup(self, api_key, base_url, cache_key):
+        """Return the cached fileName for a key, or None if missing or expired"""
+        account = account_fingerprint(api_key, base_url)
+        now = time.time()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                row = conn.execute(
+                    "SELECT file_name, created_at FROM uploads WHERE account = ? AND cache_key = ?",
+                    (account, cache_key),
+                ).fetchone()
+                if row is None:
+                    return None
+                file_name, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM uploads WHERE account = ? AND cache_key = ?", (account, cache_key))
+                    conn.commit()
+                    return None
+                conn.execute(
+                    "UPDATE uploads SET last_used = ? WHERE account = ? AND cache_key = ?",
+                    (now, account, cache_key),
+                )
+                conn.commit()
+                return file_name
+            finally:
+                conn.close()
+
+    def store(self, api_key, base_url, cache_keys, file_name, file_type=None):
+        """
+        Record an uploaded fileName under one or more cache keys.
+
+        A fileName that is already cached keeps its original upload time, so
+        aliasing it under a new key never extends its TTL.
+        """
+        account = account_fingerprint(api_key, base_url)
+        now = time.time()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                created_at = self._uploaded_at(conn, account, file_name) or now
+                for cache_key in cache_keys:
+                    if not cache_key:
+                        continue
+                    conn.execute(
+                        "INSERT OR REPLACE INTO uploads"
+                        " (account, cache_key, file_name, file_type, created_at, last_used)"
+                        " VALUES (?, ?, ?, ?, ?, ?)",
+                        (account, cache_key, file_name, file_type, created_at, now),
+                    )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+
+    def uploaded_at(self, api_key, base_url, file_name):
+        """Time the fileName was originally uploaded, or None if it is not cached"""
+        account = account_fingerprint(api_key, base_url)
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                return self._uploaded_at(conn, account, file_name)
+            finally:
+                conn.close()
+
+    def find_key(self, api_key, base_url, file_name):
+        """
+        Reverse lookup: return a content key that produced `file_name`, if known.
+
+        Payload hashes are preferred over tensor hashes and file path keys, so
+        the same bytes map to the same key regardless of where they came from.
+        """
+        account = account_fingerprint(api_key, base_url)
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                rows = conn.execute(
+                    "SELECT cache_key FROM uploads WHERE account = ? AND file_name = ?",
+                    (account, file_name),
+                ).fetchall()
+            finally:
+                conn.close()
+        if not rows:
+            return None
+
+        def priority(key):
+            if key.startswith("file:"):
+                return 2
+            if key.startswith("tensor:"):
+                return 1
+            return 0
+
+        return sorted((row[0] for row in rows), key=lambda k: (priority(k), k))[0]
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute("DELETE FROM uploads")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _uploaded_at(self, conn, account, file_name):
+        row = conn.execute(
+            "SELECT MIN(created_at) FROM uploads WHERE account = ? AND file_name = ?",
+            (account, file_name),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM uploads WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM uploads WHERE rowid IN"
+                " (SELECT rowid FROM uploads ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+
+
+_cache_instance = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache():
+    """
+    Return the process-wide upload cache, or None if it is disabled.
+
+    TTL and size can be tuned in config.json with `upload_cache_ttl_hours`,
+    `upload_cache_max_entries` and `upload_cache_enabled`.
+    """
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            settings = load_plugin_settings()
+            if not settings.get("upload_cache_enabled", True):
+                _cache_instance = False
+            else:
+                ttl_hours = float(settings.get("upload_cache_ttl_hours", DEFAULT_TTL_SECONDS / 3600))
+                max_entries = int(settings.get("upload_cache_max_entries", DEFAULT_MAX_ENTRIES))
+                try:
+                    _cache_instance = UploadCache(ttl_seconds=ttl_hours * 3600, max_entries=max_entries)
+                except Exception as e:
+                    print(f"⚠️ Upload cache unavailable, uploads will not be cached: {e}")
+                    _cache_instance = False
+        return _cache_instance or None
+
+
+def find_cached_upload(api_key, base_url, cache_key):
+    """Return a still-valid cached fileName for `cache_key`, or None"""
+    cache = get_upload_cache()
+    if cache is None or not cache_key:
+        return None
+    try:
+        return cache.lookup(api_key, base_url, cache_key)
+    except Exception as e:
+        print(f"⚠️ Upload cache lookup failed: {e}")
+        return None
+
+
+def as_upload_buffer(file_buffer):
+    """Wrap raw bytes in a BytesIO so uploads can rewind between retries"""
+    if isinstance(file_buffer, (bytes, bytearray, memoryview)):
+        return io.BytesIO(file_buffer)
+    return file_buffer
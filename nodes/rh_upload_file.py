@@ -6,6 +6,9 @@ import os
 import mimetypes
 import json
 from .rh_utils import upload_file_to_rh
+from .rh_remote_files import resolve_remote_file, select_remote_file
+from .rh_upload_cache import file_stat_key
+from .rh_deferred_upload import DeferredUpload
 
 class RH_UploadFile:
     """
@@ -21,6 +24,16 @@ class RH_UploadFile:
                 "node_id": ("STRING", {"multiline": False, "default": ""}),
                 "field_name": (["text", "image", "audio", "video", "latent", "mask", "file"],),
                 "file_path": ("STRING", {"multiline": False, "default": ""}),
+            },
+            "optional": {
+                "remote_files": ("RH_REMOTE_FILES", {
+                    "tooltip": "Outputs of a previous RH_Execute/RH_Download to upload instead of file_path (copied as-is, without decoding)"
+                }),
+                "remote_index": ("INT", {"default": 0, "min": 0, "max": 1000}),
+                "defer_upload": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Put a pending upload into the param instead of uploading now; RH_Execute/RH_BatchExecute upload all pending files in parallel before creating the task"
+                }),
             }
         }
 
@@ -28,13 +41,48 @@ class RH_UploadFile:
     FUNCTION = "upload"
     CATEGORY = "Ken-Chen/RH-API"
 
-    def upload(self, config, node_id, field_name, file_path):
+    def upload(self, config, node_id, field_name, file_path, remote_files=None, remote_index=0, defer_upload=False):
         """
-        Uploads the specified file and returns a parameter string.
+        Uploads the specified file (or a file of remote_files) and returns a parameter string.
+        With defer_upload, the upload runs when RH_Execute/RH_BatchExecute submits the task.
         """
+        if remote_files:
+            if defer_upload:
+                entry = select_remote_file(remote_files, remote_index)
+                rh_file_path = DeferredUpload(
+                    lambda: resolve_remote_file(config, remote_files, remote_index, "reupload"),
+                    f"remote:{entry['fileUrl']}", entry["fileName"])
+            else:
+                rh_file_path = resolve_remote_file(config, remote_files, remote_index, "reupload")
+            param = [{
+                "nodeId": node_id,
+                "fieldName": field_name,
+                "fieldValue": rh_file_path
+            }]
+            print(f"✓ RH Param added: Node {node_id}.{field_name} = {rh_file_path}")
+            return (param,)
+
         if not os.path.exists(file_path) or not os.path.isfile(file_path):
             raise FileNotFoundError(f"File not found at path: {file_path}")
 
+        if defer_upload:
+            rh_file_path = DeferredUpload(lambda: self._upload(config, file_path),
+                                          f"file:{file_stat_key(file_path)}", os.path.basename(file_path))
+        else:
+            rh_file_path = self._upload(config, file_path)
+
+        # Create the parameter dictionary
+        param = [{
+            "nodeId": node_id,
+            "fieldName": field_name,
+            "fieldValue": rh_file_path
+        }]
+
+        print(f"✓ RH Param added: Node {node_id}.{field_name} = {rh_file_path}")
+        return (param,)
+
+    def _upload(self, config, file_path):
+        """Upload a local file and return its RunningHub fileName"""
         api_key = config.get("api_key")
         base_url = config.get("base_url")
 
@@ -44,30 +92,19 @@ class RH_UploadFile:
         if content_type is None:
             content_type = "application/octet-stream" # Generic binary type
 
-        # Read file into buffer
+        # Upload using the utility function; the file is streamed from disk
         with open(file_path, 'rb') as f:
-            file_buffer = f.read()
-
-        # Upload using the utility function
-        rh_file_path = upload_file_to_rh(
-            api_key=api_key,
-            base_url=base_url,
-            file_buffer=file_buffer,
-            file_name=file_name,
-            content_type=content_type,
-            file_type='file' # Generic file type for logging
-        )
+            rh_file_path = upload_file_to_rh(
+                api_key=api_key,
+                base_url=base_url,
+                file_buffer=f,
+                file_name=file_name,
+                content_type=content_type,
+                file_type='file', # Generic file type for logging
+                use_cache=config.get("use_upload_cache", True)
+            )
 
         if not rh_file_path:
             raise Exception("File upload failed. Check logs for details.")
 
-        # Create the parameter dictionary
-        param = [{
-            "nodeId": node_id,
-            "fieldName": field_name,
-            "fieldValue": rh_file_path
-        }]
-
-        print(f"✓ RH Param added: Node {node_id}.{field_name} = {rh_file_path}")
-        return (param,)
-
+        return rh_file_path
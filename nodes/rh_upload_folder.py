@@ -0,0 +1,263 @@
+"""
+RH_UploadFolder Node - Upload every file of a folder (or glob) for batch execution
+Uploads run concurrently and are recorded in a manifest, so an interrupted or repeated run resumes
+"""
+
+import os
+import glob
+import json
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .rh_utils import upload_file_to_rh
+from .rh_upload_cache import hash_payload, get_upload_cache
+from .rh_upload_manifest import get_upload_manifest
+from .rh_upload_pipeline import get_upload_concurrency
+
+DEFAULT_PATTERN = "*.png;*.jpg;*.jpeg;*.webp"
+
+
+def _has_glob(path):
+    return any(char in path for char in "*?[")
+
+
+def find_files(folder, pattern=DEFAULT_PATTERN, recursive=False):
+    """
+    List the files to upload, sorted by path.
+
+    Args:
+        folder: Directory, or a glob such as "D:/data/**/*.png" (then pattern is ignored)
+        pattern: File name patterns separated by ';' (e.g. "*.png;*.jpg")
+        recursive: Also search sub-directories of folder
+
+    Returns:
+        list: Absolute file paths; hidden files are skipped
+    """
+    folder = os.path.expanduser((folder or "").strip().strip('"'))
+    if _has_glob(folder):
+        candidates = glob.glob(folder, recursive=True)
+    else:
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"Folder not found: {folder}")
+        patterns = [p.strip() for p in (pattern or "*").replace(",", ";").split(";") if p.strip()] or ["*"]
+        candidates = []
+        for p in patterns:
+            candidates.extend(glob.glob(os.path.join(folder, "**", p) if recursive else os.path.join(folder, p),
+                                        recursive=recursive))
+    files = {
+        os.path.abspath(path) for path in candidates
+        if os.path.isfile(path) and not os.path.basename(path).startswith(".")
+    }
+    return sorted(files)
+
+
+def _file_type(path):
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    major = content_type.split("/")[0]
+    return content_type, major if major in ("image", "video", "audio") else "file"
+
+
+class RH_UploadFolder:
+    """
+    Upload all files of a folder or glob to RunningHub and bundle them for RH_BatchExecute.
+    Each file becomes one run. Finished uploads are recorded (path, size, mtime, SHA-256),
+    so files that were already uploaded are skipped on the next run.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        field_names = ["image", "control_image", "mask", "video", "audio", "file", "custom"]
+        return {
+            "required": {
+                "config": ("RH_CONFIG", {
+                    "tooltip": "RunningHub configuration from RH_Config node"
+                }),
+                "folder": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "tooltip": "Folder to upload, or a glob such as D:/dataset/**/*.png"
+                }),
+                "node_id": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "tooltip": "Node ID that receives each file"
+                }),
+                "field_name": (field_names, {
+                    "default": "image",
+                    "tooltip": "Field name that receives each file"
+                }),
+            },
+            "optional": {
+                "pattern": ("STRING", {
+                    "default": DEFAULT_PATTERN,
+                    "multiline": False,
+                    "tooltip": "File name patterns separated by ';' (ignored when folder is a glob)"
+                }),
+                "recursive": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Include files in sub-folders"
+                }),
+                "custom_field_name": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "tooltip": "Custom field name (only used when field_name is 'custom')"
+                }),
+                "max_files": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 1000000,
+                    "tooltip": "Upload at most this many files, in path order (0 = all)"
+                }),
+                "max_workers": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 32,
+                    "tooltip": "Uploads in flight (0 = upload_concurrency from config.json)"
+                }),
+                "force_reupload": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Ignore the manifest and the upload cache and upload every file again (e.g. after the remote files expired)"
+                }),
+            }
+        }
+
+    RETURN_TYPES = ("RH_PARAM_BUNDLE", "STRING")
+    RETURN_NAMES = ("param_bundle", "file_list")
+    FUNCTION = "upload_folder"
+    CATEGORY = "Ken-Chen/RH-API"
+
+    @classmethod
+    def IS_CHANGED(cls, folder, pattern=DEFAULT_PATTERN, recursive=False, max_files=0, **kwargs):
+        # Re-run when files are added, removed or modified, not only when the inputs change
+        try:
+            files = find_files(folder, pattern, recursive)
+        except Exception:
+            return float("nan")
+        if max_files:
+            files = files[:max_files]
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed or renamed since the glob; still part of what changed
+                signature.append(f"{path}:missing")
+                continue
+            signature.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hash("\n".join(signature))
+
+    def upload_folder(self, config, folder, node_id, field_name, pattern=DEFAULT_PATTERN, recursive=False,
+                      custom_field_name="", max_files=0, max_workers=0, force_reupload=False):
+        """
+        Upload the matching files concurrently and return one param set per file.
+
+        Returns:
+            Tuple of (param_bundle, file_list) where file_list is a JSON list of
+            {"path", "fileName"} in bundle order
+        """
+        if not isinstance(config, dict) or "api_key" not in config or "base_url" not in config:
+            raise ValueError("Invalid config: must be from RH_Config node")
+        if not node_id or not node_id.strip():
+            raise ValueError("node_id is required")
+
+        actual_field_name = field_name
+        if field_name == "custom" and custom_field_name.strip():
+            actual_field_name = custom_field_name.strip()
+        elif field_name == "custom" and not custom_field_name.strip():
+            print("⚠ Warning: field_name is 'custom' but custom_field_name is empty. Using 'custom' as field name.")
+
+        files = find_files(folder, pattern, recursive)
+        if max_files:
+            files = files[:max_files]
+        if not files:
+            print(f"[Warning] RH_UploadFolder: No files matched in {folder}")
+            return ([], "[]")
+
+        api_key = config["api_key"]
+        base_url = config["base_url"]
+        # Forcing must bypass the upload cache too, or it would hand back the old fileName
+        use_cache = config.get("use_upload_cache", True) and not force_reupload
+        cache = get_upload_cache() if use_cache else None
+        manifest = get_upload_manifest()
+        if manifest is not None and force_reupload:
+            manifest.forget(api_key, base_url, files)
+        workers = min(len(files), max_workers or get_upload_concurrency())
+
+        total = len(files)
+        counts = {"done": 0, "skipped": 0, "uploaded": 0, "failed": 0}
+        counts_lock = threading.Lock()
+        report_every = max(1, total // 10)
+        print(f"📤 Uploading {total} files from {folder} ({workers} in parallel)...")
+
+        def count(key):
+            with counts_lock:
+                counts[key] += 1
+                counts["done"] += 1
+                if counts["done"] % report_every == 0 or counts["done"] == total:
+                    print(f"📤 {counts['done']}/{total} files ({counts['uploaded']} uploaded, "
+                          f"{counts['skipped']} already uploaded, {counts['failed']} failed)")
+
+        def upload_one(path):
+            try:
+                stat = os.stat(path)
+                entry = manifest.lookup(api_key, base_url, path) if manifest is not None else None
+                if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    count("skipped")
+                    return entry["file_name"]
+
+                content_type, file_type = _file_type(path)
+                with open(path, "rb") as f:
+                    sha256 = hash_payload(f)
+                    if entry and entry["sha256"] == sha256:
+                        # Touched but identical; refresh the stat and keep the upload (and its age)
+                        file_name = entry["file_name"]
+                        uploaded_at = entry["uploaded_at"]
+                        uploaded = False
+                    else:
+                        file_name = upload_file_to_rh(
+                            api_key=api_key,
+                            base_url=base_url,
+                            file_buffer=f,
+                            file_name=os.path.basename(path),
+                            content_type=content_type,
+                            file_type=file_type,
+                            use_cache=use_cache,
+                            content_hash=sha256
+                        )
+                        # An upload cache hit returns an older file; keep its original upload time
+                        uploaded_at = None
+                        if cache is not None and file_name:
+                            try:
+                                uploaded_at = cache.uploaded_at(api_key, base_url, file_name)
+                            except Exception as e:
+                                print(f"⚠️ Upload cache lookup failed: {e}")
+                        uploaded = True
+                if not file_name:
+                    raise Exception("upload returned no file name")
+                if manifest is not None:
+                    manifest.record(api_key, base_url, path, stat.st_size, stat.st_mtime_ns, sha256, file_name,
+                                    uploaded_at=uploaded_at)
+                count("uploaded" if uploaded else "skipped")
+                return file_name
+            except Exception as e:
+                count("failed")
+                print(f"[Error] Failed to upload {path}: {e}. Skipping this run.")
+                return None
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rh-folder") as executor:
+            results = list(executor.map(upload_one, files))
+
+        bundle = []
+        file_list = []
+        for path, file_name in zip(files, results):
+            if file_name:
+                bundle.append([{"nodeId": node_id.strip(), "fieldName": actual_field_name, "fieldValue": file_name}])
+                file_list.append({"path": path, "fileName": file_name})
+
+        if not bundle:
+            raise Exception("All uploads failed for the folder.")
+
+        print(f"[Info] Bundled {len(bundle)} runs for batch execution "
+              f"({counts['uploaded']} uploaded, {counts['skipped']} reused from the manifest).")
+        return (bundle, json.dumps(file_list, ensure_ascii=False, indent=2))
@@ -3,17 +3,20 @@ RH_UploadImage Node - Upload images to RunningHub
 Simplified image upload with automatic format handling
 """
 
-import torch
-import numpy as np
-from PIL import Image
-from io import BytesIO
+import os
+
 from .rh_utils import upload_file_to_rh
+from .rh_upload_cache import hash_tensor, find_cached_upload
+from .rh_image_encoder import get_encode_options, encoding_tag, fit_encode, UPLOAD_SIZE_LIMIT
+from .rh_tensor_convert import image_to_uint8
+from .rh_source_file import resolve_source_path, trace_source_image, source_matches_tensor, source_content_type
+from .rh_deferred_upload import DeferredUpload, filename_output
 
 
 class RH_UploadImage:
     """
     Upload image to RunningHub and get filename for use in workflows.
-    Automatically handles image format conversion and size limits.
+    Automatically handles image format conversion and fits images under the 10MB upload limit.
     """
     
     @classmethod
@@ -56,6 +59,29 @@ class RH_UploadImage:
                     "default": None,
                     "tooltip": "Connect previous params to chain parameters"
                 }),
+                "max_resolution": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 16384,
+                    "tooltip": "Downscale so the longer side is at most this many pixels (0 = keep); images over 10MB are fitted automatically"
+                }),
+                "upload_source_file": ("BOOLEAN", {
+                    "default": True,
+                    "tooltip": "If the image comes unmodified from a LoadImage node (or source_file), upload the original file as-is instead of re-encoding it"
+                }),
+                "source_file": ("STRING", {
+                    "default": "",
+                    "multiline": False,
+                    "tooltip": "Optional path or annotated file name (e.g. 'photo.jpg [input]') of the original image file"
+                }),
+                "defer_upload": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Put a pending upload into params instead of uploading now; RH_Execute/RH_BatchExecute upload all pending files in parallel before creating the task (the filename output is then empty; use params)"
+                }),
+            },
+            "hidden": {
+                "prompt": "PROMPT",
+                "unique_id": "UNIQUE_ID",
             }
         }
 
@@ -64,7 +90,8 @@ class RH_UploadImage:
     FUNCTION = "upload"
     CATEGORY = "Ken-Chen/RH-API"
     
-    def upload(self, config, image, node_id="", field_name="image", custom_field_name="", previous_params=None):
+    def upload(self, config, image, node_id="", field_name="image", custom_field_name="", previous_params=None,
+               max_resolution=0, upload_source_file=True, source_file="", defer_upload=False, prompt=None, unique_id=None):
         """
         Upload image to RunningHub and optionally set parameter
 
@@ -75,49 +102,34 @@ class RH_UploadImage:
             field_name: Field name to set (optional)
             custom_field_name: Custom field name (optional)
             previous_params: Previous parameter list (optional)
+            max_resolution: Limit for the longer side, 0 to keep (optional)
+            upload_source_file: Upload the unmodified original file instead of encoding (optional)
+            source_file: Path or annotated file name of the original file (optional)
+            defer_upload: Put a pending upload resolved at task submission into params; filename is then empty (optional)
 
         Returns:
             Tuple of (filename, params)
         """
-        print("📤 Uploading image to RunningHub...")
-
         # Validate config
         if not isinstance(config, dict) or "api_key" not in config or "base_url" not in config:
             raise ValueError("Invalid config: must be from RH_Config node")
 
-        api_key = config["api_key"]
-        base_url = config["base_url"]
+        use_cache = config.get("use_upload_cache", True)
+        options = get_encode_options(config)
+        # A pending upload is only useful if it ends up in params
+        defer_upload = defer_upload and bool(node_id and node_id.strip())
+        tensor_key = hash_tensor(image, encoding_tag(options), max_resolution, upload_source_file) \
+            if use_cache or defer_upload else None
 
-        # Convert tensor to PIL Image
-        pil_image = self._tensor_to_pil(image)
-        print(f"📤 Image dimensions: {pil_image.width}W x {pil_image.height}H")
-
-        # Convert to bytes
-        buffer = BytesIO()
-        pil_image.save(buffer, format='PNG')
-        buffer_size = buffer.tell()
-        buffer.seek(0)
-
-        # Check size limit (10MB)
-        max_size = 10 * 1024 * 1024
-        if buffer_size > max_size:
-            raise ValueError(f"Image size {buffer_size / 1024 / 1024:.2f}MB exceeds 10MB limit")
-
-        print(f"📤 Image file size: {buffer_size / 1024 / 1024:.2f}MB")
-
-        # Upload using the utility function
-        try:
-            filename = upload_file_to_rh(
-                api_key=api_key,
-                base_url=base_url,
-                file_buffer=buffer,
-                file_name="image.png",
-                content_type="image/png",
-                file_type="image"
-            )
-        except Exception as e:
-            # Re-raise with a more specific context
-            raise Exception(f"Failed to upload image: {e}")
+        def do_upload():
+            return self._upload(config, image, options, tensor_key, max_resolution, upload_source_file,
+                                source_file, prompt, unique_id)
+
+        if defer_upload:
+            print("⏳ Image upload deferred until task submission")
+            filename = DeferredUpload(do_upload, f"image:{tensor_key}", "image")
+        else:
+            filename = do_upload()
 
         # Create parameter if node_id is provided
         params = previous_params if previous_params else []
@@ -139,35 +151,82 @@ class RH_UploadImage:
             params.append(new_param)
             print(f"✓ RH Param added: Node {node_id}.{actual_field_name} = {filename}")
 
-        return (filename, params)
-    
-    def _tensor_to_pil(self, tensor):
-        """Convert ComfyUI image tensor to PIL Image"""
-        # Handle batch dimension
-        if tensor.ndim == 4:
-            tensor = tensor[0]
-        
-        # Convert to numpy
-        img_np = tensor.cpu().numpy()
-        
-        # Ensure [H, W, C] format
-        if img_np.shape[0] in [1, 3, 4]:
-            img_np = np.transpose(img_np, (1, 2, 0))
-        
-        # Convert to uint8
-        if img_np.dtype == np.float32 or img_np.dtype == np.float64:
-            img_np = (img_np * 255).astype(np.uint8)
-        
-        # Determine mode
-        if img_np.shape[2] == 1:
-            img_np = img_np.squeeze(-1)
-            mode = 'L'
-        elif img_np.shape[2] == 3:
-            mode = 'RGB'
-        elif img_np.shape[2] == 4:
-            mode = 'RGBA'
-        else:
-            raise ValueError(f"Unsupported channel count: {img_np.shape[2]}")
-        
-        return Image.fromarray(img_np, mode)
+        return (filename_output(filename), params)
+
+    def _upload(self, config, image, options, tensor_key, max_resolution, upload_source_file,
+                source_file, prompt, unique_id):
+        """Upload the image (cached, original file or encoded) and return its RunningHub fileName"""
+        print("📤 Uploading image to RunningHub...")
 
+        api_key = config["api_key"]
+        base_url = config["base_url"]
+        use_cache = config.get("use_upload_cache", True)
+
+        filename = find_cached_upload(api_key, base_url, tensor_key) if use_cache else None
+
+        if filename:
+            print(f"✓ Image unchanged since last upload, reusing: {filename}")
+        else:
+            source_path = self._find_source_file(image, source_file, prompt, unique_id, max_resolution) \
+                if upload_source_file else None
+            if source_path:
+                # Send the original bytes; no decode/encode round trip
+                print(f"📤 Uploading original file: {source_path}")
+                try:
+                    with open(source_path, 'rb') as f:
+                        filename = upload_file_to_rh(
+                            api_key=api_key,
+                            base_url=base_url,
+                            file_buffer=f,
+                            file_name=os.path.basename(source_path),
+                            content_type=source_content_type(source_path),
+                            file_type="image",
+                            use_cache=use_cache,
+                            cache_key=tensor_key
+                        )
+                except Exception as e:
+                    raise Exception(f"Failed to upload image: {e}")
+
+        if not filename:
+            # Encode with the backend/format selected on RH_Config
+            image_np = image_to_uint8(image)
+            print(f"📤 Image dimensions: {image_np.shape[1]}W x {image_np.shape[0]}H")
+            # Fitted under the 10MB upload limit (quality first, then resolution)
+            buffer, extension, content_type = fit_encode(image_np, options, max_resolution=max_resolution or None)
+            buffer_size = buffer.getbuffer().nbytes
+            print(f"📤 Image file size: {buffer_size / 1024 / 1024:.2f}MB ({content_type})")
+
+            # Upload using the utility function
+            try:
+                filename = upload_file_to_rh(
+                    api_key=api_key,
+                    base_url=base_url,
+                    file_buffer=buffer,
+                    file_name=f"image{extension}",
+                    content_type=content_type,
+                    file_type="image",
+                    use_cache=use_cache,
+                    cache_key=tensor_key
+                )
+            except Exception as e:
+                # Re-raise with a more specific context
+                raise Exception(f"Failed to upload image: {e}")
+
+        return filename
+
+    def _find_source_file(self, image, source_file, prompt, unique_id, max_resolution):
+        """Path of the original file if it can be uploaded in place of the tensor, else None"""
+        path = resolve_source_path(source_file) or trace_source_image(prompt, unique_id)
+        if not path:
+            if source_file and source_file.strip():
+                print(f"⚠ source_file not found: {source_file}, encoding the image instead")
+            return None
+        if os.path.getsize(path) > UPLOAD_SIZE_LIMIT:
+            print("ℹ Original file exceeds the 10MB upload limit, encoding the image instead")
+            return None
+        if max_resolution and max(image.shape[-3], image.shape[-2]) > max_resolution:
+            return None
+        if not source_matches_tensor(path, image):
+            print("ℹ Image was modified after loading, encoding it instead of uploading the original file")
+            return None
+        return path
@@ -2,19 +2,13 @@
 RH_UploadLatent Node - Upload a latent tensor as a .safetensors file
 """
 
-import os
-import torch
-import tempfile
-import json
 from .rh_utils import upload_file_to_rh
-
-# Safetensors is a core dependency of ComfyUI, so it should be available
-from safetensors.torch import save_file
+from .rh_latent_codec import encode_latent, file_extension, DOWNCAST_OPTIONS, COMPRESSION_OPTIONS
 
 class RH_UploadLatent:
     """
-    A node to upload a latent tensor to RunningHub by saving it as a temporary
-    .safetensors file.
+    A node to upload a latent tensor to RunningHub as a .safetensors file,
+    serialized in memory.
     """
 
     @classmethod
@@ -25,6 +19,16 @@ class RH_UploadLatent:
                 "latent": ("LATENT", ),
                 "node_id": ("STRING", {"multiline": False, "default": ""}),
                 "field_name": ("STRING", {"multiline": False, "default": ""}),
+            },
+            "optional": {
+                "downcast": (DOWNCAST_OPTIONS, {
+                    "default": "none",
+                    "tooltip": "Send the latent as fp16/bf16 to halve the upload; the original dtype is recorded in the file metadata"
+                }),
+                "compression": (COMPRESSION_OPTIONS, {
+                    "default": "none",
+                    "tooltip": "Compress the payload (deflate/zstd). Only use this if the receiving workflow decodes RH-compressed latents; plain .safetensors is sent otherwise"
+                }),
             }
         }
 
@@ -32,40 +36,30 @@ class RH_UploadLatent:
     FUNCTION = "upload"
     CATEGORY = "Ken-Chen/RH-API"
 
-    def upload(self, config, latent, node_id, field_name):
+    def upload(self, config, latent, node_id, field_name, downcast="none", compression="none"):
         """
-        Saves the latent to a temporary file, uploads it, and returns a parameter string.
+        Serializes the latent in memory, uploads it, and returns a parameter string.
         """
         api_key = config.get("api_key")
         base_url = config.get("base_url")
 
-        # Create a temporary file to save the latent tensor
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".safetensors") as tmp:
-            tmp_path = tmp.name
-            # The `latent` object is a dictionary, e.g., {'samples': tensor}
-            save_file(latent, tmp_path)
-
-        try:
-            # Read the file content into a buffer
-            with open(tmp_path, 'rb') as f:
-                file_buffer = f.read()
-
-            # Upload the file using the shared utility function
-            rh_file_path = upload_file_to_rh(
-                api_key=api_key,
-                base_url=base_url,
-                file_buffer=file_buffer,
-                file_name="latent.safetensors",
-                content_type="application/octet-stream",
-                file_type='latent'
-            )
+        # The `latent` object is a dictionary, e.g., {'samples': tensor}
+        payload = encode_latent(latent, downcast=downcast, compression=compression)
+        print(f"📤 Latent payload: {len(payload) / 1024 / 1024:.2f}MB (downcast={downcast}, compression={compression})")
 
-            if not rh_file_path:
-                raise Exception("Latent upload failed. Check logs for details.")
+        # Upload the bytes using the shared utility function
+        rh_file_path = upload_file_to_rh(
+            api_key=api_key,
+            base_url=base_url,
+            file_buffer=payload,
+            file_name="latent" + file_extension(compression),
+            content_type="application/octet-stream",
+            file_type='latent',
+            use_cache=config.get("use_upload_cache", True)
+        )
 
-        finally:
-            # Ensure the temporary file is deleted
-            os.unlink(tmp_path)
+        if not rh_file_path:
+            raise Exception("Latent upload failed. Check logs for details.")
 
         # Create the parameter dictionary
         param = [{
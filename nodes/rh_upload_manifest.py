@@ -0,0 +1,131 @@
+"""
+RH Upload Manifest - Per-file record of folder uploads
+Maps a local path (with its size, mtime and hash) to the RunningHub fileName, so re-runs skip finished files
+"""
+
+import os
+import time
+import threading
+
+from .rh_storage import connect_db, load_plugin_settings, account_fingerprint
+from .rh_upload_cache import DEFAULT_TTL_SECONDS
+
+
+class UploadManifest:
+    """
+    SQLite-backed map of (account, absolute path) -> uploaded file.
+
+    Each entry keeps the file's size, mtime and SHA-256 at upload time. A file
+    whose size and mtime are unchanged is skipped without reading it; a file
+    that was touched but has the same hash is skipped after hashing. Entries
+    expire with the same TTL as the upload cache, since RunningHub removes
+    uploaded files after a while.
+    """
+
+    DB_NAME = "upload_manifest.sqlite3"
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS files ("
+                    " account TEXT NOT NULL,"
+                    " path TEXT NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " mtime_ns INTEGER NOT NULL,"
+                    " sha256 TEXT NOT NULL,"
+                    " file_name TEXT NOT NULL,"
+                    " uploaded_at REAL NOT NULL,"
+                    " PRIMARY KEY (account, path))"
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+    def lookup(self, api_key, base_url, path):
+        """
+        Return the recorded entry for a path, or None if missing or expired.
+
+        Returns:
+            dict | None: {"size", "mtime_ns", "sha256", "file_name", "uploaded_at"}
+        """
+        account = account_fingerprint(api_key, base_url)
+        path = os.path.abspath(path)
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                row = conn.execute(
+                    "SELECT size, mtime_ns, sha256, file_name, uploaded_at FROM files WHERE account = ? AND path = ?",
+                    (account, path),
+                ).fetchone()
+                if row is None:
+                    return None
+                if time.time() - row[4] > self.ttl_seconds:
+                    conn.execute("DELETE FROM files WHERE account = ? AND path = ?", (account, path))
+                    conn.commit()
+                    return None
+            finally:
+                conn.close()
+        return {"size": row[0], "mtime_ns": row[1], "sha256": row[2], "file_name": row[3], "uploaded_at": row[4]}
+
+    def record(self, api_key, base_url, path, size, mtime_ns, sha256, file_name, uploaded_at=None):
+        """
+        Record (or refresh) the upload of a file.
+
+        Pass the original `uploaded_at` when re-recording an earlier upload, so
+        the entry still expires with the server-side file.
+        """
+        account = account_fingerprint(api_key, base_url)
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO files"
+                    " (account, path, size, mtime_ns, sha256, file_name, uploaded_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (account, os.path.abspath(path), size, mtime_ns, sha256, file_name, uploaded_at or time.time()),
+                )
+                conn.execute("DELETE FROM files WHERE uploaded_at < ?", (time.time() - self.ttl_seconds,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def forget(self, api_key, base_url, paths):
+        """Drop the entries of the given paths so they are uploaded again"""
+        account = account_fingerprint(api_key, base_url)
+        with self._lock:
+            conn = connect_db(self.DB_NAME)
+            try:
+                conn.executemany(
+                    "DELETE FROM files WHERE account = ? AND path = ?",
+                    [(account, os.path.abspath(path)) for path in paths],
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+
+_manifest_instance = None
+_manifest_lock = threading.Lock()
+
+
+def get_upload_manifest():
+    """
+    Return the process-wide upload manifest, or None if it cannot be opened.
+
+    Entries expire after `upload_cache_ttl_hours` from config.json.
+    """
+    global _manifest_instance
+    with _manifest_lock:
+        if _manifest_instance is None:
+            settings = load_plugin_settings()
+            ttl_hours = float(settings.get("upload_cache_ttl_hours", DEFAULT_TTL_SECONDS / 3600))
+            try:
+                _manifest_instance = UploadManifest(ttl_seconds=ttl_hours * 3600)
+            except Exception as e:
+                print(f"⚠️ Upload manifest unavailable, folder uploads will not be resumable: {e}")
+                _manifest_instance = False
+        return _manifest_instance or None
@@ -3,17 +3,23 @@ RH_UploadMask Node - Upload mask images to RunningHub
 Supports uploading mask/alpha channel images for inpainting and masking operations
 """
 
-import torch
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 from PIL import Image
-from io import BytesIO
+
 from .rh_utils import upload_file_to_rh
+from .rh_tensor_convert import mask_to_uint8, image_to_uint8, image_mask_to_rgba
+from .rh_image_encoder import get_encode_options, fit_encode
+
+UPLOAD_MODES = ["separate", "rgba"]
 
 
 class RH_UploadMask:
     """
     📤 Upload mask images to RunningHub for inpainting/masking operations.
     Automatically converts images to grayscale masks.
+    Mask and image are uploaded concurrently, or packed into one RGBA file.
     """
     
     @classmethod
@@ -71,6 +77,16 @@ class RH_UploadMask:
                     "default": None,
                     "tooltip": "Connect previous params to chain parameters"
                 }),
+                "max_resolution": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 16384,
+                    "tooltip": "Downscale so the longer side is at most this many pixels (0 = keep); images over 10MB are fitted automatically"
+                }),
+                "upload_mode": (UPLOAD_MODES, {
+                    "default": "separate",
+                    "tooltip": "separate: mask and image as two files, uploaded in parallel; rgba: one PNG with the mask in the alpha channel (alpha = 1 - mask, as LoadImage reads it), set on image_field_name"
+                }),
             }
         }
 
@@ -80,7 +96,8 @@ class RH_UploadMask:
     CATEGORY = "Ken-Chen/RH-API"
     
     def upload_mask(self, config, mask, image=None, node_id="", mask_field_name="mask", custom_mask_field_name="",
-                    image_field_name="image", custom_image_field_name="", previous_params=None):
+                    image_field_name="image", custom_image_field_name="", previous_params=None, max_resolution=0,
+                    upload_mode="separate"):
         """
         Upload mask and optionally image to RunningHub and set parameters
 
@@ -94,6 +111,8 @@ class RH_UploadMask:
             image_field_name: Field name for image (optional)
             custom_image_field_name: Custom image field name (optional)
             previous_params: Previous parameter list (optional)
+            max_resolution: Limit for the longer side of mask and image, 0 to keep (optional)
+            upload_mode: "separate" (two files) or "rgba" (image with the mask as alpha) (optional)
 
         Returns:
             Tuple of (mask_hash, image_hash, params)
@@ -105,125 +124,42 @@ class RH_UploadMask:
             
             if not api_key:
                 raise ValueError("API key is required")
-            
-            # ========== Upload Mask ==========
-            # Convert mask tensor to numpy
-            if isinstance(mask, torch.Tensor):
-                mask_np = mask.detach().cpu().numpy()
-            else:
-                mask_np = np.array(mask)
-            
-            print(f"📤 Original mask shape: {mask_np.shape}")
-            
-            # Handle batch dimension
-            if mask_np.ndim == 3:
-                # Take first mask from batch [B, H, W]
-                mask_np = mask_np[0]
-                print(f"📤 Removed batch dimension: {mask_np.shape}")
-            
-            # Ensure mask is 2D [H, W]
-            if mask_np.ndim != 2:
-                raise ValueError(f"Mask must be 2D after batch removal, got shape: {mask_np.shape}")
-            
-            # Convert to 0-255 range
-            if mask_np.max() <= 1.0:
-                mask_np = (mask_np * 255).astype(np.uint8)
-            else:
-                mask_np = mask_np.astype(np.uint8)
-            
-            # Create PIL Image from mask (grayscale - single channel)
-            mask_pil = Image.fromarray(mask_np, mode='L')
-            print(f"📤 Created PIL mask image: {mask_pil.size} (width x height), mode: {mask_pil.mode}")
-            print(f"📤 Mask is single-channel grayscale (required by Qwen Edit nodes)")
-            
-            # Save mask to BytesIO buffer
-            mask_buffer = BytesIO()
-            mask_pil.save(mask_buffer, format='PNG')
-            mask_buffer_size = mask_buffer.tell()
-            mask_buffer.seek(0)
-            
-            # Print size
-            mask_size_mb = mask_buffer_size / (1024 * 1024)
-            print(f"📤 Mask size: {mask_size_mb:.2f} MB")
-            
-            # Check size limit (10MB)
-            max_size_bytes = 10 * 1024 * 1024
-            if mask_buffer_size > max_size_bytes:
-                raise Exception(f"Mask size {mask_size_mb:.2f}MB exceeds 10MB limit")
-            
-            # Upload mask
-            try:
-                mask_hash = upload_file_to_rh(
-                    api_key=api_key,
-                    base_url=base_url,
-                    file_buffer=mask_buffer,
-                    file_name="mask.png",
-                    content_type="image/png",
-                    file_type="image"
-                )
-                print(f"✅ Mask uploaded successfully: {mask_hash}")
-            except Exception as e:
-                raise Exception(f"Failed to upload mask: {e}")
 
-            # ========== Upload Image (if provided) ==========
-            image_hash = ""
-            if image is not None:
-                print(f"📤 Uploading image...")
-                
-                # Convert image tensor to numpy
-                if isinstance(image, torch.Tensor):
-                    image_np = image.detach().cpu().numpy()
-                else:
-                    image_np = np.array(image)
-                
-                print(f"📤 Original image shape: {image_np.shape}")
-                
-                # Handle batch dimension [B, H, W, C]
-                if image_np.ndim == 4:
-                    image_np = image_np[0]
-                    print(f"📤 Removed batch dimension: {image_np.shape}")
-                
-                # Ensure image is 3D [H, W, C]
-                if image_np.ndim != 3:
-                    raise ValueError(f"Image must be 3D after batch removal, got shape: {image_np.shape}")
-                
-                # Convert to 0-255 range
-                if image_np.max() <= 1.0:
-                    image_np = (image_np * 255).astype(np.uint8)
-                else:
-                    image_np = image_np.astype(np.uint8)
-                
-                # Create PIL Image
-                image_pil = Image.fromarray(image_np, mode='RGB')
-                print(f"📤 Created PIL image: {image_pil.size} (width x height), mode: {image_pil.mode}")
-                
-                # Save image to BytesIO buffer
-                image_buffer = BytesIO()
-                image_pil.save(image_buffer, format='PNG')
-                image_buffer_size = image_buffer.tell()
-                image_buffer.seek(0)
-                
-                # Print size
-                image_size_mb = image_buffer_size / (1024 * 1024)
-                print(f"📤 Image size: {image_size_mb:.2f} MB")
-                
-                # Check size limit (10MB)
-                if image_buffer_size > max_size_bytes:
-                    raise Exception(f"Image size {image_size_mb:.2f}MB exceeds 10MB limit")
-                
-                # Upload image
+            use_cache = config.get("use_upload_cache", True)
+            options = get_encode_options(config)
+            # Masks (and alpha) always stay lossless
+            lossless_options = dict(options, format=options["format"] if options["format"] in ("png", "webp_lossless") else "png")
+
+            def upload(buffer, name, extension, content_type):
                 try:
-                    image_hash = upload_file_to_rh(
+                    filename = upload_file_to_rh(
                         api_key=api_key,
                         base_url=base_url,
-                        file_buffer=image_buffer,
-                        file_name="image.png",
-                        content_type="image/png",
-                        file_type="image"
+                        file_buffer=buffer,
+                        file_name=f"{name}{extension}",
+                        content_type=content_type,
+                        file_type="image",
+                        use_cache=use_cache
                     )
-                    print(f"✅ Image uploaded successfully: {image_hash}")
+                    print(f"✅ {name.capitalize()} uploaded successfully: {filename}")
+                    return filename
                 except Exception as e:
-                    raise Exception(f"Failed to upload image: {e}")
+                    raise Exception(f"Failed to upload {name}: {e}")
+
+            if upload_mode == "rgba":
+                if image is None:
+                    raise ValueError("upload_mode 'rgba' requires an image to pack the mask into")
+                # ========== Upload Image + Mask as one RGBA file ==========
+                rgba_np = image_mask_to_rgba(image, mask)
+                print(f"📤 RGBA image: {rgba_np.shape[1]}x{rgba_np.shape[0]} (width x height), mask in alpha")
+                rgba_buffer, rgba_extension, rgba_content_type = fit_encode(
+                    rgba_np, lossless_options, lossless_only=True, max_resolution=max_resolution or None
+                )
+                print(f"📤 RGBA size: {rgba_buffer.getbuffer().nbytes / (1024 * 1024):.2f} MB")
+                image_hash = mask_hash = upload(rgba_buffer, "image", rgba_extension, rgba_content_type)
+            else:
+                mask_hash, image_hash = self._upload_separate(mask, image, options, lossless_options,
+                                                              max_resolution, upload)
 
             # ========== Create Parameters ==========
             params = previous_params if previous_params else []
@@ -231,20 +167,21 @@ class RH_UploadMask:
             if node_id and node_id.strip():
                 node_id_str = str(node_id).strip()
                 
-                # Add mask parameter
-                actual_mask_field = mask_field_name
-                if mask_field_name == "custom" and custom_mask_field_name.strip():
-                    actual_mask_field = custom_mask_field_name.strip()
-                elif mask_field_name == "custom" and not custom_mask_field_name.strip():
-                    print("⚠ Warning: mask_field_name is 'custom' but custom_mask_field_name is empty. Using 'custom' as field name.")
+                # Add mask parameter (an RGBA upload carries the mask in the image itself)
+                if upload_mode != "rgba":
+                    actual_mask_field = mask_field_name
+                    if mask_field_name == "custom" and custom_mask_field_name.strip():
+                        actual_mask_field = custom_mask_field_name.strip()
+                    elif mask_field_name == "custom" and not custom_mask_field_name.strip():
+                        print("⚠ Warning: mask_field_name is 'custom' but custom_mask_field_name is empty. Using 'custom' as field name.")
 
-                mask_param = {
-                    "nodeId": node_id_str,
-                    "fieldName": actual_mask_field,
-                    "fieldValue": mask_hash
-                }
-                params.append(mask_param)
-                print(f"✓ RH Param added: Node {node_id_str}.{actual_mask_field} = {mask_hash}")
+                    mask_param = {
+                        "nodeId": node_id_str,
+                        "fieldName": actual_mask_field,
+                        "fieldValue": mask_hash
+                    }
+                    params.append(mask_param)
+                    print(f"✓ RH Param added: Node {node_id_str}.{actual_mask_field} = {mask_hash}")
                 
                 # Add image parameter if image was uploaded
                 if image_hash:
@@ -268,6 +205,58 @@ class RH_UploadMask:
             print(f"❌ Error uploading mask: {str(e)}")
             raise
 
+    def _upload_separate(self, mask, image, options, lossless_options, max_resolution, upload):
+        """
+        Encode and upload mask and image as two files; returns (mask_hash, image_hash).
+
+        The image is encoded first and its upload starts right away, so the
+        mask is encoded and uploaded while the image is still in flight. If
+        fitting the image under the size limit shrank it, the mask is resized
+        to the same dimensions so both still line up.
+        """
+        print(f"📤 Original mask shape: {tuple(mask.shape)}")
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="rh-mask") as executor:
+            image_future = None
+            image_size = None
+            if image is not None:
+                # Convert image tensor to uint8 [H, W, C] (first image of the batch)
+                print(f"📤 Original image shape: {tuple(image.shape)}")
+                image_np = image_to_uint8(image)
+                if image_np.ndim != 3:
+                    raise ValueError(f"Image must be 3D after batch removal, got shape: {image_np.shape}")
+                original_image_size = (image_np.shape[1], image_np.shape[0])
+
+                # Encode with the backend/format selected on RH_Config
+                print(f"📤 Image: {image_np.shape[1]}x{image_np.shape[0]} (width x height)")
+                image_buffer, image_extension, image_content_type = fit_encode(
+                    image_np, options, max_resolution=max_resolution or None
+                )
+                print(f"📤 Image size: {image_buffer.getbuffer().nbytes / (1024 * 1024):.2f} MB")
+                with Image.open(image_buffer) as encoded:
+                    image_size = encoded.size
+                image_buffer.seek(0)
+                image_future = executor.submit(upload, image_buffer, "image", image_extension, image_content_type)
+
+            # Convert mask tensor to uint8 [H, W] (first mask of the batch)
+            mask_np = mask_to_uint8(mask)
+            mask_resolution = max_resolution or None
+            if image_size and (mask_np.shape[1], mask_np.shape[0]) == original_image_size \
+                    and image_size != original_image_size:
+                # Follow the image's final size exactly
+                mask_np = np.asarray(Image.fromarray(mask_np, "L").resize(image_size, Image.BOX))
+                mask_resolution = None
+
+            print(f"📤 Mask image: {mask_np.shape[1]}x{mask_np.shape[0]} (width x height), single-channel grayscale (required by Qwen Edit nodes)")
+            mask_buffer, mask_extension, mask_content_type = fit_encode(
+                mask_np, lossless_options, lossless_only=True, max_resolution=mask_resolution
+            )
+            print(f"📤 Mask size: {mask_buffer.getbuffer().nbytes / (1024 * 1024):.2f} MB")
+            mask_future = executor.submit(upload, mask_buffer, "mask", mask_extension, mask_content_type)
+
+            mask_hash = mask_future.result()
+            image_hash = image_future.result() if image_future is not None else ""
+        return mask_hash, image_hash
+
 
 NODE_CLASS_MAPPINGS = {
     "RH_UploadMask": RH_UploadMask
@@ -0,0 +1,95 @@
+"""
+RH Upload Pipeline - Encode and upload several images concurrently
+Encoding of the next image overlaps with the upload of the previous one
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .rh_utils import upload_file_to_rh
+from .rh_upload_cache import hash_tensor, find_cached_upload
+from .rh_storage import load_plugin_settings
+from .rh_image_encoder import get_encode_options, encoding_tag, encode_image_tensor
+
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
+
+def get_upload_concurrency():
+    """Number of uploads kept in flight; `upload_concurrency` in config.json"""
+    try:
+        return max(1, int(load_plugin_settings().get("upload_concurrency", DEFAULT_UPLOAD_CONCURRENCY)))
+    except (TypeError, ValueError):
+        return DEFAULT_UPLOAD_CONCURRENCY
+
+
+def upload_images_parallel(config, jobs, max_workers=None):
+    """
+    Encode and upload IMAGE tensors through a bounded two-stage pipeline.
+
+    Encoding runs on a small pool and each encoded buffer is handed straight to
+    the upload pool, so compression of one image overlaps the network round
+    trip of another. At most `2 * max_workers` encoded buffers are held in
+    memory at once. Unchanged tensors are resolved from the upload cache
+    without encoding at all.
+
+    Args:
+        config: Configuration from RH_Config node
+        jobs: List of (slot, image_tensor, base_name) tuples; the extension of the
+            chosen image format is appended to base_name
+        max_workers: Uploads in flight (defaults to `upload_concurrency` in config.json)
+
+    Returns:
+        dict: slot -> RunningHub file name, or the Exception raised for that slot
+    """
+    api_key = config.get("api_key")
+    base_url = config.get("base_url")
+    use_cache = config.get("use_upload_cache", True)
+    max_workers = max_workers or get_upload_concurrency()
+    options = get_encode_options(config)
+
+    results = {}
+    results_lock = threading.Lock()
+    in_memory = threading.BoundedSemaphore(max_workers * 2)
+
+    def set_result(slot, value):
+        with results_lock:
+            results[slot] = value
+
+    def upload(slot, buffer, file_name, content_type, tensor_key):
+        try:
+            set_result(slot, upload_file_to_rh(
+                api_key=api_key, base_url=base_url, file_buffer=buffer,
+                file_name=file_name, content_type=content_type, file_type='image',
+                use_cache=use_cache, cache_key=tensor_key
+            ))
+        except Exception as e:
+            set_result(slot, e)
+        finally:
+            in_memory.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rh-upload") as upload_pool:
+
+        def encode(slot, image_tensor, base_name):
+            try:
+                tensor_key = hash_tensor(image_tensor, encoding_tag(options)) if use_cache else None
+                cached = find_cached_upload(api_key, base_url, tensor_key) if use_cache else None
+                if cached:
+                    print(f"[Info] {base_name} unchanged since last upload, reusing: {cached}")
+                    set_result(slot, cached)
+                    return
+                in_memory.acquire()
+                try:
+                    buffer, extension, content_type = encode_image_tensor(image_tensor, options)
+                except Exception:
+                    in_memory.release()
+                    raise
+                upload_pool.submit(upload, slot, buffer, base_name + extension, content_type, tensor_key)
+            except Exception as e:
+                set_result(slot, e)
+
+        encode_workers = max(1, min(len(jobs), max_workers // 2 or 1))
+        with ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="rh-encode") as encode_pool:
+            for slot, image_tensor, base_name in jobs:
+                encode_pool.submit(encode, slot, image_tensor, base_name)
+
+    return results
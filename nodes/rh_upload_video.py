@@ -1,16 +1,22 @@
 """
 RH_UploadVideo Node - Upload videos to RunningHub
-Simplified video upload
+Simplified video upload, from a video file or an IMAGE batch encoded locally
 """
 
 import os
+import tempfile
 import folder_paths
 from .rh_utils import upload_file_to_rh
+from .rh_upload_cache import file_stat_key, hash_tensor, find_cached_upload
+from .rh_deferred_upload import DeferredUpload, filename_output
+from .rh_video_encoder import (encode_frames_to_video, probe_video, plan_transcode, transcode_video,
+                               VIDEO_FORMATS, VIDEO_FORMAT_INFO, DEFAULT_VIDEO_QUALITY)
 
 
 class RH_UploadVideo:
     """
     Upload video file to RunningHub and get filename for use in workflows.
+    An IMAGE batch can be uploaded instead; it is encoded into one video file first.
     """
     
     @classmethod
@@ -28,11 +34,11 @@ class RH_UploadVideo:
                 "config": ("RH_CONFIG", {
                     "tooltip": "RunningHub configuration from RH_Config node"
                 }),
+            },
+            "optional": {
                 "video": ("VIDEO", {
                     "tooltip": "Video input from Load_AF_Video or other video nodes"
                 }),
-            },
-            "optional": {
                 "node_id": ("STRING", {
                     "default": "",
                     "multiline": False,
@@ -51,6 +57,63 @@ class RH_UploadVideo:
                     "default": None,
                     "tooltip": "Connect previous params to chain parameters"
                 }),
+                "defer_upload": ("BOOLEAN", {
+                    "default": False,
+                    "tooltip": "Put a pending upload into params instead of uploading now; RH_Execute/RH_BatchExecute upload all pending files in parallel before creating the task (the filename output is then empty; use params)"
+                }),
+                "images": ("IMAGE", {
+                    "tooltip": "Frame sequence to encode into one video and upload (used instead of video)"
+                }),
+                "fps": ("FLOAT", {
+                    "default": 24.0,
+                    "min": 1.0,
+                    "max": 120.0,
+                    "step": 0.5,
+                    "tooltip": "Frame rate of the video encoded from images"
+                }),
+                "video_format": (VIDEO_FORMATS, {
+                    "default": "mp4",
+                    "tooltip": "Container/codec for images and transcoded videos: mp4 (H.264) or webm (VP9); OpenCV fallback uses mp4v/VP8"
+                }),
+                "video_quality": ("INT", {
+                    "default": DEFAULT_VIDEO_QUALITY,
+                    "min": 0,
+                    "max": 100,
+                    "tooltip": "Quality of encoded/transcoded video (mapped to CRF with ffmpeg)"
+                }),
+                "max_resolution": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 8192,
+                    "tooltip": "Transcode the video so the shorter side is at most this many pixels, e.g. 720 for 720p (0 = keep)"
+                }),
+                "max_fps": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 120.0,
+                    "step": 0.5,
+                    "tooltip": "Transcode the video down to this frame rate if it is higher (0 = keep)"
+                }),
+                "trim_start": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 86400.0,
+                    "step": 0.1,
+                    "tooltip": "Only upload the video from this many seconds on"
+                }),
+                "trim_end": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 86400.0,
+                    "step": 0.1,
+                    "tooltip": "Only upload the video up to this many seconds (0 = until the end)"
+                }),
+                "max_bitrate_kbps": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 200000,
+                    "tooltip": "Transcode the video if its bitrate is above this (0 = keep)"
+                }),
             }
         }
 
@@ -59,7 +122,9 @@ class RH_UploadVideo:
     FUNCTION = "upload"
     CATEGORY = "Ken-Chen/RH-API"
     
-    def upload(self, config, video, node_id="", field_name="video", custom_field_name="", previous_params=None):
+    def upload(self, config, video=None, node_id="", field_name="video", custom_field_name="", previous_params=None,
+               defer_upload=False, images=None, fps=24.0, video_format="mp4", video_quality=DEFAULT_VIDEO_QUALITY,
+               max_resolution=0, max_fps=0.0, trim_start=0.0, trim_end=0.0, max_bitrate_kbps=0):
         """
         Upload video to RunningHub and optionally set parameter
 
@@ -70,21 +135,43 @@ class RH_UploadVideo:
             field_name: Field name to set (optional)
             custom_field_name: Custom field name (optional)
             previous_params: Previous parameter list (optional)
+            defer_upload: Put a pending upload resolved at task submission into params; filename is then empty (optional)
+            images: IMAGE batch to encode into a video instead of video (optional)
+            fps: Frame rate for images (optional)
+            video_format: "mp4" or "webm" for images (optional)
+            video_quality: 0-100 quality for images and transcoding (optional)
+            max_resolution: Shorter side limit for the video file (720 = 720p), 0 to keep (optional)
+            max_fps: Frame rate cap for the video file, 0 to keep (optional)
+            trim_start: Start of the part of the video file to upload, in seconds (optional)
+            trim_end: End of the part of the video file to upload, 0 for the end (optional)
+            max_bitrate_kbps: Bitrate cap for the video file, 0 to keep (optional)
 
         Returns:
             Tuple of (filename, params)
         """
-        print("📤 Uploading video to RunningHub...")
-
         # Validate config
         if not isinstance(config, dict) or "api_key" not in config or "base_url" not in config:
             raise ValueError("Invalid config: must be from RH_Config node")
 
-        if not video:
-            raise ValueError("Video input is required")
+        defer_upload = defer_upload and bool(node_id and node_id.strip())
 
-        api_key = config["api_key"]
-        base_url = config["base_url"]
+        if images is not None:
+            # Encode the frame sequence into one video; cached by tensor content and encoding settings
+            frames_key = hash_tensor(images, video_format, fps, video_quality)
+            print(f"🎞️ Frames: {images.shape[0]} x {images.shape[2]}x{images.shape[1]} -> {video_format} @ {fps:g} fps")
+
+            def upload_frames():
+                return self._upload_frames(config, images, frames_key, fps, video_format, video_quality)
+
+            if defer_upload:
+                print("⏳ Video upload deferred until task submission")
+                filename = DeferredUpload(upload_frames, f"video:{frames_key}", f"frames.{video_format}")
+            else:
+                filename = upload_frames()
+            return (filename_output(filename), self._add_param(filename, node_id, field_name, custom_field_name, previous_params))
+
+        if not video:
+            raise ValueError("Video input is required (connect video or images)")
 
         # Extract video path from VIDEO object or use string directly
         video_path = None
@@ -109,20 +196,30 @@ class RH_UploadVideo:
 
         print(f"📹 Found video: {video_path}")
 
-        # Upload using the utility function
-        try:
-            with open(video_path, 'rb') as f:
-                filename = upload_file_to_rh(
-                    api_key=api_key,
-                    base_url=base_url,
-                    file_buffer=f,
-                    file_name=os.path.basename(video_path),
-                    content_type='application/octet-stream',  # Generic content type
-                    file_type='video'
-                )
-        except Exception as e:
-            raise Exception(f"Failed to upload video: {e}")
+        # Shrink the file before upload if it exceeds any of these (all off by default)
+        limits = {
+            "max_resolution": max_resolution,
+            "max_fps": max_fps,
+            "trim_start": trim_start,
+            "trim_end": trim_end,
+            "max_bitrate_kbps": max_bitrate_kbps,
+        }
+        limits = dict(limits, video_format=video_format, video_quality=video_quality) if any(limits.values()) else None
+        source_key = file_stat_key(video_path)
+        if limits:
+            source_key += "|" + ",".join(f"{k}={v}" for k, v in sorted(limits.items()))
+
+        if defer_upload:
+            print("⏳ Video upload deferred until task submission")
+            filename = DeferredUpload(lambda: self._upload(config, video_path, source_key, limits),
+                                      f"video:{source_key}", os.path.basename(video_path))
+        else:
+            filename = self._upload(config, video_path, source_key, limits)
 
+        return (filename_output(filename), self._add_param(filename, node_id, field_name, custom_field_name, previous_params))
+
+    def _add_param(self, filename, node_id, field_name, custom_field_name, previous_params):
+        """Append the uploaded file to previous_params if node_id is provided"""
         # Create parameter if node_id is provided
         params = previous_params if previous_params else []
 
@@ -143,5 +240,106 @@ class RH_UploadVideo:
             params.append(new_param)
             print(f"✓ RH Param added: Node {node_id}.{actual_field_name} = {filename}")
 
-        return (filename, params)
+        return params
+
+    def _upload_frames(self, config, images, frames_key, fps, video_format, video_quality):
+        """Encode an IMAGE batch into a temporary video file, upload it and return its RunningHub fileName"""
+        api_key = config["api_key"]
+        base_url = config["base_url"]
+
+        use_cache = config.get("use_upload_cache", True)
+        filename = find_cached_upload(api_key, base_url, frames_key) if use_cache else None
+        if filename:
+            print(f"✓ Frames unchanged since last upload, reusing: {filename}")
+            return filename
+
+        extension, content_type = VIDEO_FORMAT_INFO[video_format]
+        with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            backend = encode_frames_to_video(images, tmp_path, fps, video_format, video_quality)
+            print(f"🎞️ Encoded {images.shape[0]} frames with {backend}: "
+                  f"{os.path.getsize(tmp_path) / 1024 / 1024:.2f}MB")
+            print("📤 Uploading video to RunningHub...")
+            with open(tmp_path, 'rb') as f:
+                return upload_file_to_rh(
+                    api_key=api_key,
+                    base_url=base_url,
+                    file_buffer=f,
+                    file_name=f"frames{extension}",
+                    content_type=content_type,
+                    file_type='video',
+                    use_cache=use_cache,
+                    cache_key=frames_key
+                )
+        except Exception as e:
+            raise Exception(f"Failed to upload video: {e}")
+        finally:
+            os.unlink(tmp_path)
+
+    def _upload(self, config, video_path, source_key, limits=None):
+        """
+        Upload the video file (or reuse a cached upload) and return its RunningHub fileName.
+
+        With limits, the file is probed first and transcoded into a temporary
+        file only if it exceeds them; a file that already fits is sent as-is.
+        """
+        print("📤 Uploading video to RunningHub...")
+
+        api_key = config["api_key"]
+        base_url = config["base_url"]
+
+        use_cache = config.get("use_upload_cache", True)
+        filename = find_cached_upload(api_key, base_url, source_key) if use_cache else None
+
+        if filename:
+            print(f"✓ Video unchanged since last upload, reusing: {filename}")
+            return filename
+
+        plan = self._plan_transcode(video_path, limits) if limits else None
+        tmp_path = None
+        try:
+            upload_path = video_path
+            content_type = 'application/octet-stream'  # Generic content type
+            if plan:
+                extension, content_type = VIDEO_FORMAT_INFO[limits["video_format"]]
+                with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp:
+                    tmp_path = tmp.name
+                print(f"🎞️ Transcoding video before upload: {', '.join(plan['reasons'])}")
+                backend = transcode_video(video_path, tmp_path, plan, limits["video_format"], limits["video_quality"])
+                print(f"🎞️ Transcoded with {backend}: {os.path.getsize(video_path) / 1024 / 1024:.2f}MB -> "
+                      f"{os.path.getsize(tmp_path) / 1024 / 1024:.2f}MB")
+                upload_path = tmp_path
+
+            # Upload using the utility function
+            with open(upload_path, 'rb') as f:
+                filename = upload_file_to_rh(
+                    api_key=api_key,
+                    base_url=base_url,
+                    file_buffer=f,
+                    file_name=os.path.splitext(os.path.basename(video_path))[0] + os.path.splitext(upload_path)[1],
+                    content_type=content_type,
+                    file_type='video',
+                    use_cache=use_cache,
+                    cache_key=source_key
+                )
+        except Exception as e:
+            raise Exception(f"Failed to upload video: {e}")
+        finally:
+            if tmp_path:
+                os.unlink(tmp_path)
+
+        return filename
 
+    def _plan_transcode(self, video_path, limits):
+        """Transcode plan for the file, or None if it already fits (or cannot be probed)"""
+        info = probe_video(video_path)
+        if info is None:
+            print("⚠ Could not read the video's properties, uploading it unchanged")
+            return None
+        plan = plan_transcode(info, limits["max_resolution"], limits["max_fps"], limits["trim_start"],
+                              limits["trim_end"], limits["max_bitrate_kbps"])
+        if plan is None:
+            print(f"✓ Video already fits the limits ({info['width']}x{info['height']}, {info['fps']:.3g} fps), "
+                  f"uploading it unchanged")
+        return plan
@@ -8,8 +8,9 @@ import time
 import json
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
 import os
+import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -32,23 +33,35 @@ try:
 except ImportError:
     AUDIO_AVAILABLE = False
 
-try:
-    from safetensors.torch import load
-    SAFETENSORS_AVAILABLE = True
-except ImportError:
-    SAFETENSORS_AVAILABLE = False
+from .rh_upload_cache import get_upload_cache, hash_payload, as_upload_buffer
+from .rh_transport import get_transport, RHAPIError
+from .rh_multipart import MultipartFileStream, upload_timeout
+from .rh_latent_codec import SAFETENSORS_AVAILABLE, decode_latent
+from .rh_task_monitor import get_task_monitor
+from .rh_task_journal import get_task_journal, journal_task_created
+from .rh_webhook import get_webhook_url
 
-def upload_file_to_rh(api_key, base_url, file_buffer, file_name, content_type, file_type):
+def upload_file_to_rh(api_key, base_url, file_buffer, file_name, content_type, file_type,
+                      use_cache=True, cache_key=None, content_hash=None):
     """
     Uploads a file to RunningHub with retry logic.
 
+    Identical payloads are served from the local upload cache instead of being
+    sent again, as long as the cached server-side file has not expired.
+
     Args:
         api_key (str): The API key for authentication.
         base_url (str): The base URL of the RunningHub API.
-        file_buffer (BytesIO): The file content in a byte buffer.
+        file_buffer (BytesIO | bytes | file): The file content in a byte buffer, or an
+            open binary file, which is streamed from disk in chunks.
         file_name (str): The name of the file to be sent.
         content_type (str): The MIME type of the file (e.g., 'image/png').
         file_type (str): The type of file for RunningHub API ('image', 'video', etc.).
+        use_cache (bool): Reuse a previous upload of the same content if available.
+        cache_key (str): Optional extra key (e.g. a raw tensor hash) to record the
+            upload under, so callers can skip encoding next time.
+        content_hash (str): SHA-256 of the payload if the caller already computed it
+            (see hash_payload), so the file is not read an extra time.
 
     Returns:
         str: The filename returned by the API upon successful upload.
@@ -56,51 +69,188 @@ def upload_file_to_rh(api_key, base_url, file_buffer, file_name, content_type, f
     Raises:
         Exception: If the upload fails after all retries.
     """
-    url = f"{base_url}/task/openapi/upload"
-    files = {'file': (file_name, file_buffer, content_type)}
-    data = {
-        'apiKey': api_key,
-        'fileType': file_type,
-    }
+    file_buffer = as_upload_buffer(file_buffer)
 
-    max_retries = 5
-    filename = None
-    for attempt in range(max_retries):
+    cache = get_upload_cache() if use_cache else None
+    content_key = None
+    if cache is not None:
         try:
-            print(f"Upload attempt {attempt + 1}/{max_retries}...")
-            # Rewind buffer before each attempt
-            file_buffer.seek(0)
-            response = requests.post(url, data=data, files=files, timeout=60)
-            response.raise_for_status()
-
-            result = response.json()
-
-            if result.get('code') == 0:
-                filename = result.get('data', {}).get('fileName')
-                if filename:
-                    print(f"✓ File uploaded successfully: {filename}")
-                    return filename
-                else:
-                    raise ValueError("API response did not contain a fileName.")
-            else:
-                raise Exception(f"API returned an error: {result.get('msg')}")
+            extension = os.path.splitext(file_name)[1].lower()
+            content_key = f"{file_type}{extension}:{content_hash or hash_payload(file_buffer)}"
+            cached_name = cache.lookup(api_key, base_url, content_key)
+            if cached_name:
+                print(f"✓ Reusing cached upload: {cached_name}")
+                if cache_key:
+                    cache.store(api_key, base_url, [cache_key], cached_name, file_type)
+                return cached_name
+        except Exception as e:
+            print(f"⚠️ Upload cache lookup failed, uploading normally: {e}")
+            content_key = None
 
+    url = f"{base_url}/task/openapi/upload"
+    file_buffer.seek(0)
+    # Stream the body from the buffer/file instead of building it in memory
+    body = MultipartFileStream(
+        {'apiKey': api_key, 'fileType': file_type}, 'file', file_name, file_buffer, content_type
+    )
+
+    started_at = time.time()
+    try:
+        result = get_transport(base_url).call_api(
+            url, data=body, headers={'Content-Type': body.content_type},
+            timeout=upload_timeout(len(body)),
+            # Rewind body before each attempt
+            before_attempt=body.rewind,
+            label="Uploading file"
+        )
+    except RHAPIError as e:
+        raise Exception(f"Failed to upload file: {e}")
+
+    filename = (result.get('data') or {}).get('fileName')
+    if not filename:
+        raise Exception("API response did not contain a fileName.")
+
+    elapsed = max(time.time() - started_at, 1e-6)
+    print(f"✓ File uploaded successfully: {filename} "
+          f"({body.file_size / 1e6:.1f} MB in {elapsed:.1f}s, {body.file_size / elapsed / 1e6:.2f} MB/s)")
+    if cache is not None:
+        try:
+            cache.store(api_key, base_url, [content_key, cache_key], filename, file_type)
         except Exception as e:
-            print(f"Upload attempt {attempt + 1} failed: {e}")
-            if attempt == max_retries - 1:
-                raise Exception(f"Failed to upload file after {max_retries} attempts: {e}")
+            print(f"⚠️ Could not record upload in cache: {e}")
+    return filename
+
+
+def create_task(config, params, use_high_performance=False, workflow_id=None, source="RH_Execute",
+                max_retries=None, rate_limiter=None):
+    """
+    Create a workflow or AI app task on RunningHub.
+
+    Args:
+        config: Configuration from RH_Config node
+        params: nodeInfoList for the task
+        use_high_performance: Request the "plus" instance type
+        workflow_id: Override for config["workflow_or_app_id"]
+        source: Name of the calling node, recorded in the task journal
+        max_retries: Number of attempts (defaults to the transport's setting)
+        rate_limiter: Optional TokenBucket acquired before every attempt
+
+    Returns:
+        Tuple of (task_id, task_info) where task_info is the API's data dict
+        (includes e.g. netWssUrl for WebSocket monitoring)
+    """
+    api_key = config["api_key"]
+    base_url = config["base_url"]
+    workflow_or_app_id = workflow_id or config["workflow_or_app_id"]
+    is_ai_app = config.get("is_ai_app", False)
+
+    # Choose endpoint based on task type
+    if is_ai_app:
+        url = f"{base_url}/task/openapi/ai-app/run"
+        payload = {
+            "webappId": int(workflow_or_app_id),
+            "apiKey": api_key,
+            "nodeInfoList": params,
+        }
+    else:
+        url = f"{base_url}/task/openapi/create"
+        payload = {
+            "workflowId": workflow_or_app_id,
+            "apiKey": api_key,
+            "nodeInfoList": params,
+        }
+
+    # Add instance type if high performance requested
+    if use_high_performance:
+        payload["instanceType"] = "plus"
+
+    # Ask RunningHub to call us back on completion if webhooks are configured
+    webhook_url = get_webhook_url(config)
+    if webhook_url:
+        payload["webhookUrl"] = webhook_url
+
+    # Send request with retry
+    try:
+        result = get_transport(base_url).call_api(
+            url, json_payload=payload, timeout=30, max_retries=max_retries,
+            before_attempt=rate_limiter.acquire if rate_limiter else None,
+            label="Creating task"
+        )
+    except RHAPIError as e:
+        error_msg = str(e)
+        if e.retryable:
+            raise Exception(f"Failed to create task: {e}")
+
+        # Provide helpful messages for business errors
+        if "WORKFLOW_NOT_SAVED_OR_NOT_RUNNING" in error_msg:
+            raise Exception(
+                f"Workflow error: {error_msg}\n"
+                f"Please check:\n"
+                f"1. Workflow ID '{workflow_or_app_id}' exists on RunningHub\n"
+                f"2. Workflow is saved\n"
+                f"3. Workflow status is set to 'Running' (not Draft)\n"
+                f"4. You have access to this workflow"
+            )
+        elif "INVALID_API_KEY" in error_msg:
+            raise Exception(f"Invalid API key. Please check your RH_Config node.")
+        elif "INSUFFICIENT_BALANCE" in error_msg:
+            raise Exception(f"Insufficient balance. Please top up your RunningHub account.")
+        else:
+            raise Exception(f"API error: {error_msg}")
+
+    data = result.get("data") or {}
+    task_id = data.get("taskId")
+    if not task_id:
+        raise Exception("Failed to create task: no taskId in response")
+
+    journal_task_created(task_id, config, params, source=source, workflow_id=workflow_or_app_id)
 
-            wait_time = 2 ** attempt
-            print(f"Retrying in {wait_time} seconds...")
-            time.sleep(wait_time)
+    if webhook_url:
+        # Polling only acts as a safety net until the callback arrives
+        get_task_monitor().set_push_active(task_id, True)
 
-    # This line should not be reached if logic is correct, but as a safeguard:
-    raise Exception("Failed to upload file and exhausted all retries.")
+    return task_id, data
 
 
 # --- Task Monitoring and Output Processing Logic ---
 # These functions are moved from rh_execute.py to be shared with rh_download.py
 
+def _parse_task_result(result):
+    """
+    Translate an /task/openapi/outputs style result into a task status.
+
+    Returns:
+        list | dict: The outputs list when the task has completed, otherwise a
+        dict with a `taskStatus` key.
+    """
+    code = result.get("code")
+    msg = result.get("msg", "")
+    data = result.get("data")
+
+    if msg == "APIKEY_TASK_IS_QUEUED":
+        return {"taskStatus": "QUEUED"}
+
+    if msg == "APIKEY_TASK_IS_RUNNING":
+        return {"taskStatus": "RUNNING"}
+
+    if code == 0 and isinstance(data, list) and data:
+        return data
+
+    if code == 0 and isinstance(data, list) and not data:
+        return {"taskStatus": "completed_no_output"}
+
+    if code == 0 and data is None:
+        return {"taskStatus": "RUNNING"}
+
+    if code != 0:
+        error_details = msg
+        if isinstance(data, dict):
+            error_details = f"{msg}: {data.get('error', data)}"
+        return {"taskStatus": "error", "error": error_details, "error_data": data}
+
+    return {"taskStatus": "RUNNING"}
+
+
 def _check_task_status(task_id, api_key, base_url):
     """Check task status via HTTP"""
     url = f"{base_url}/task/openapi/outputs"
@@ -110,36 +260,9 @@ def _check_task_status(task_id, api_key, base_url):
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=20)
+        response = get_transport(base_url).post(url, json=payload, timeout=20)
         response.raise_for_status()
-        result = response.json()
-
-        code = result.get("code")
-        msg = result.get("msg", "")
-        data = result.get("data")
-
-        if msg == "APIKEY_TASK_IS_QUEUED":
-            return {"taskStatus": "QUEUED"}
-
-        if msg == "APIKEY_TASK_IS_RUNNING":
-            return {"taskStatus": "RUNNING"}
-
-        if code == 0 and isinstance(data, list) and data:
-            return data
-
-        if code == 0 and isinstance(data, list) and not data:
-            return {"taskStatus": "completed_no_output"}
-
-        if code == 0 and data is None:
-            return {"taskStatus": "RUNNING"}
-
-        if code != 0:
-            error_details = msg
-            if isinstance(data, dict):
-                error_details = f"{msg}: {data.get('error', data)}"
-            return {"taskStatus": "error", "error": error_details, "error_data": data}
-
-        return {"taskStatus": "RUNNING"}
+        return _parse_task_result(response.json())
 
     except requests.exceptions.Timeout:
         return {"taskStatus": "RUNNING"} # Treat timeout as still running
@@ -148,56 +271,30 @@ def _check_task_status(task_id, api_key, base_url):
 
 
 def _monitor_task(task_id, config, timeout):
-    """Monitor task until completion"""
-    api_key = config["api_key"]
-    base_url = config["base_url"]
-
-    start_time = time.time()
-    poll_interval = 5
-    last_poll = 0
-    last_status = None
-    last_log_time = 0
-    log_interval = 15
+    """
+    Wait for a task to finish using the shared task monitor.
 
+    Returns:
+        list: The task's outputs list ([] if it completed without output)
+    """
     print("Monitoring task...")
     print(f"Task URL: https://www.runninghub.cn/task/detail/{task_id}")
+    return get_task_monitor().wait(task_id, config, timeout)
+
+
+def _get_outputs(task_id, config, save_to_local, output_prefix, outputs=None):
+    """
+    Get and process task outputs.
+
+    If the outputs list is already known (handed over by the task monitor), it is
+    processed directly instead of polling /task/openapi/outputs again.
+    """
+    if outputs is not None:
+        if not outputs:
+            print("Task completed but produced no output.")
+            return None
+        return _process_outputs(outputs, save_to_local, output_prefix, task_id=task_id)
 
-    while True:
-        elapsed = time.time() - start_time
-        if elapsed > timeout:
-            raise TimeoutError(f"Task timeout after {timeout} seconds")
-
-        if time.time() - last_poll >= poll_interval:
-            last_poll = time.time()
-            status = _check_task_status(task_id, api_key, base_url)
-
-            if isinstance(status, list):
-                print(f"✓ Task completed successfully!")
-                break
-            elif isinstance(status, dict):
-                task_status = status.get("taskStatus")
-
-                if task_status != last_status:
-                    print(f"[{int(elapsed)}s] Task status changed to: {task_status}")
-                    last_status = task_status
-                    last_log_time = time.time()
-                elif time.time() - last_log_time > log_interval:
-                    print(f"[{int(elapsed)}s] Task is still {task_status}...")
-                    last_log_time = time.time()
-
-                if task_status == "error":
-                    error_msg = status.get('error', 'Unknown error')
-                    raise Exception(f"Task failed on RunningHub server: {error_msg}")
-            else:
-                if time.time() - last_log_time > log_interval:
-                    print(f"[{int(elapsed)}s] Unexpected status response. Retrying...")
-                    last_log_time = time.time()
-
-        time.sleep(0.5)
-
-
-def _get_outputs(task_id, config, save_to_local, output_prefix):
-    """Get and process task outputs"""
     api_key = config["api_key"]
     base_url = config["base_url"]
 
@@ -206,7 +303,7 @@ def _get_outputs(task_id, config, save_to_local, output_prefix):
         status = _check_task_status(task_id, api_key, base_url)
 
         if isinstance(status, list):
-            return _process_outputs(status, save_to_local, output_prefix)
+            return _process_outputs(status, save_to_local, output_prefix, task_id=task_id)
 
         if isinstance(status, dict):
             task_status = status.get("taskStatus")
@@ -220,56 +317,82 @@ def _get_outputs(task_id, config, save_to_local, output_prefix):
 
     raise Exception("Timeout waiting for outputs")
 
-def _download_and_process_file(output):
-    """Downloads and processes a single file, returning the data and type."""
+IMAGE_TYPES = ["png", "jpg", "jpeg", "webp", "bmp"]
+VIDEO_TYPES = ["mp4", "avi", "mov", "webm"]
+AUDIO_TYPES = ["wav", "mp3", "flac", "ogg"]
+LATENT_TYPES = ["safetensors", "latent", "zst", "zlib"]
+
+
+def _download_and_process_file(output, save_path=None):
+    """
+    Downloads and processes a single file, returning the data and type.
+
+    With save_path the original bytes are written there in the same pass
+    (one GET per output); "saved_path" is set in the result once the file
+    is complete.
+    """
     file_url = output.get("fileUrl")
     file_type = output.get("fileType", "").lower()
     if not file_url:
         return None
 
     try:
-        if file_type in ["png", "jpg", "jpeg", "webp", "bmp"]:
-            data = _download_image(file_url)
-            return {"type": "image", "data": data, "original_type": file_type} if data is not None else None
-        elif file_type in ["mp4", "avi", "mov", "webm"]:
-            frames = _extract_video_frames(file_url) if CV2_AVAILABLE else []
-            # Also return the original URL for direct saving
-            return {"type": "video", "frames": frames, "url": file_url, "original_type": file_type}
+        if file_type in IMAGE_TYPES:
+            data = _download_image(file_url, save_path)
+            result = {"type": "image", "data": data, "original_type": file_type} if data is not None else None
+        elif file_type in VIDEO_TYPES:
+            frames = _extract_video_frames(file_url, save_path)
+            result = {"type": "video", "frames": frames, "url": file_url, "original_type": file_type}
         elif file_type == "txt":
             data = _download_text(file_url)
             return {"type": "text", "data": data} if data is not None else None
-        elif file_type in ["wav", "mp3", "flac", "ogg"] and AUDIO_AVAILABLE:
-            data = _download_audio(file_url)
-            return {"type": "audio", "data": data} if data is not None else None
-        elif file_type == "safetensors" and SAFETENSORS_AVAILABLE:
+        elif file_type in AUDIO_TYPES and (AUDIO_AVAILABLE or save_path):
+            data = _download_audio(file_url, save_path)
+            result = {"type": "audio", "data": data}
+        elif file_type in LATENT_TYPES and SAFETENSORS_AVAILABLE:
             data = _download_latent(file_url)
             return {"type": "latent", "data": data} if data is not None else None
+        else:
+            return None
     except Exception as e:
         print(f"Warning: Failed to download or process {file_type} file from {file_url}: {e}")
-    return None
+        return None
 
-def _process_outputs(outputs, save_to_local, output_prefix):
-    """Process task outputs into ComfyUI format using parallel downloads."""
+    if save_path and os.path.exists(save_path):
+        result = result or {"type": file_type, "data": None}
+        result["saved_path"] = save_path
+    return result
+
+
+def _output_save_paths(outputs, output_dir, output_prefix, timestamp):
+    """Local file name for each savable output, numbered per type in output order"""
+    counters = {"image": 0, "video": 0, "audio": 0}
+    paths = []
+    for output in outputs:
+        file_type = (output.get("fileType") or "").lower()
+        kind = ("image" if file_type in IMAGE_TYPES else "video" if file_type in VIDEO_TYPES
+                else "audio" if file_type in AUDIO_TYPES else None)
+        if kind is None or not output_dir:
+            paths.append(None)
+            continue
+        counters[kind] += 1
+        infix = "" if kind == "image" else f"{kind}_"
+        paths.append(os.path.join(output_dir, f"{output_prefix}_{timestamp}_{infix}{counters[kind]:03d}.{file_type}"))
+    return paths
+
+
+def _process_outputs(outputs, save_to_local, output_prefix, task_id=None):
+    """
+    Process task outputs into ComfyUI format using parallel downloads.
+    If task_id is given, the saved file paths are recorded in the task journal.
+    """
     if not outputs:
         outputs = []
     print(f"Processing {len(outputs)} output files in parallel...")
 
-    # --- Parallel Download Step ---
-    results = []
-    with ThreadPoolExecutor(max_workers=min(10, len(outputs) or 1)) as executor:
-        future_to_output = {executor.submit(_download_and_process_file, o): o for o in outputs}
-        for future in as_completed(future_to_output):
-            try:
-                result = future.result()
-                if result:
-                    results.append(result)
-            except Exception as e:
-                print(f"An exception occurred during file processing: {e}")
-
-    # --- Sequential Processing and Saving Step ---
     images, video_frames = [], []
     text_content, audio_data, video_data, latent_data = None, None, None, None
-    image_counter, video_counter = 0, 0
+    saved_paths = []
     output_dir = None
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
@@ -282,39 +405,53 @@ def _process_outputs(outputs, save_to_local, output_prefix):
         os.makedirs(output_dir, exist_ok=True)
         print(f"✓ Saving outputs to: {output_dir}")
 
-    for res in sorted(results, key=lambda r: r.get('type')):
+    # --- Parallel Download Step ---
+    # Each output is fetched once; saved files are written while downloading, from the original bytes
+    save_paths = _output_save_paths(outputs, output_dir, output_prefix, timestamp)
+    results = [None] * len(outputs)
+    with ThreadPoolExecutor(max_workers=min(10, len(outputs) or 1)) as executor:
+        future_to_index = {
+            executor.submit(_download_and_process_file, o, save_path): i
+            for i, (o, save_path) in enumerate(zip(outputs, save_paths))
+        }
+        for future in as_completed(future_to_index):
+            try:
+                results[future_to_index[future]] = future.result()
+            except Exception as e:
+                print(f"An exception occurred during file processing: {e}")
+
+    # --- Sequential Processing Step ---
+    for res in sorted((r for r in results if r), key=lambda r: r.get('type')):
         res_type = res.get("type")
+        if res.get("saved_path"):
+            saved_paths.append(res["saved_path"])
+            print(f"✓ Saved {res_type}: {os.path.basename(res['saved_path'])}")
         if res_type == "image":
             images.append(res["data"])
-            if save_to_local and output_dir:
-                image_counter += 1
-                filename = f"{output_prefix}_{timestamp}_{image_counter:03d}.{res['original_type']}"
-                _save_image_to_file(res["data"], os.path.join(output_dir, filename))
-                print(f"✓ Saved image: {filename}")
         elif res_type == "video":
             if res.get("frames") and not video_frames:
                 video_frames.extend(res["frames"])
-            if save_to_local and output_dir:
-                video_counter += 1
-                filename = f"{output_prefix}_{timestamp}_video_{video_counter:03d}.{res['original_type']}"
-                _download_and_save_video(res["url"], os.path.join(output_dir, filename))
-                print(f"✓ Saved video: {filename}")
         elif res_type == "text" and not text_content:
             text_content = res["data"]
             if save_to_local and output_dir:
                 filename = f"{output_prefix}_{timestamp}_text.txt"
                 with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
                     f.write(text_content)
+                saved_paths.append(os.path.join(output_dir, filename))
                 print(f"✓ Saved text: {filename}")
         elif res_type == "audio" and not audio_data:
             audio_data = res["data"]
-            if save_to_local and output_dir and audio_data:
-                filename = f"{output_prefix}_{timestamp}_audio.wav" # Default to wav for saving
-                _save_audio_to_file(audio_data, os.path.join(output_dir, filename))
-                print(f"✓ Saved audio: {filename}")
         elif res_type == "latent" and not latent_data:
             latent_data = res["data"]
 
+    if task_id:
+        journal = get_task_journal()
+        if journal is not None:
+            try:
+                journal.record_saved(task_id, saved_paths)
+            except Exception as e:
+                print(f"⚠️ Could not record saved outputs in journal: {e}")
+
     # --- Final Aggregation Step ---
     if not images: images.append(_create_placeholder_image("No images"))
     if not video_frames: video_frames.append(_create_placeholder_image("No video frames"))
@@ -325,61 +462,109 @@ def _process_outputs(outputs, save_to_local, output_prefix):
     return (torch.cat(images, dim=0), torch.cat(video_frames, dim=0), text_content, audio_data, video_data, latent_data)
 
 
-def _download_image(url):
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Downloads that are only decoded stay in memory up to this size
+SPOOL_MAX_MEMORY = 32 * 1024 * 1024
+
+
+def _stream_to(url, file_obj, timeout):
+    response = get_transport().get(url, timeout=timeout, stream=True)
     try:
-        response = requests.get(url, timeout=30)
         response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert("RGB")
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if chunk:
+                file_obj.write(chunk)
+    finally:
+        response.close()
+
+
+@contextmanager
+def _downloaded(url, save_path=None, suffix="", need_path=False, timeout=60):
+    """
+    Download a URL once and yield something the decoder can read.
+
+    With save_path the bytes stream straight into the saved output (through a
+    .part file renamed when complete) and its path is yielded, so saving needs
+    no second request. Otherwise a decoder that needs a real file (OpenCV,
+    torchaudio) gets a temporary file removed afterwards, and anything else
+    a spooled buffer that stays in memory for small files.
+    """
+    if save_path:
+        part_path = save_path + ".part"
+        try:
+            with open(part_path, "wb") as f:
+                _stream_to(url, f, timeout)
+            os.replace(part_path, save_path)
+        finally:
+            if os.path.exists(part_path):
+                os.unlink(part_path)
+        yield save_path
+    elif need_path:
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                _stream_to(url, f, timeout)
+            yield tmp_path
+        finally:
+            os.unlink(tmp_path)
+    else:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as buffer:
+            _stream_to(url, buffer, timeout)
+            buffer.seek(0)
+            yield buffer
+
+
+def _download_image(url, save_path=None):
+    try:
+        with _downloaded(url, save_path, timeout=30) as source:
+            img = Image.open(source).convert("RGB")
         return torch.from_numpy(np.array(img).astype(np.float32) / 255.0).unsqueeze(0)
     except Exception as e:
         print(f"Error downloading image: {e}")
         return None
 
-def _extract_video_frames(url):
-    if not CV2_AVAILABLE: return []
+def _extract_video_frames(url, save_path=None):
+    if not CV2_AVAILABLE:
+        if save_path:
+            with _downloaded(url, save_path, timeout=120):
+                pass
+        return []
     try:
-        import tempfile
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
-        cap = cv2.VideoCapture(tmp_path)
-        frames = []
-        while True:
-            ret, frame = cap.read()
-            if not ret: break
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(torch.from_numpy(frame_rgb.astype(np.float32) / 255.0).unsqueeze(0))
-        cap.release()
-        os.unlink(tmp_path)
-        return frames
+        suffix = os.path.splitext(url.split("?")[0])[1] or ".mp4"
+        with _downloaded(url, save_path, suffix=suffix, need_path=True, timeout=120) as path:
+            cap = cv2.VideoCapture(path)
+            frames = []
+            while True:
+                ret, frame = cap.read()
+                if not ret: break
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            cap.release()
+        if not frames:
+            return []
+        # One float conversion for the whole clip instead of one tensor per frame
+        return [torch.from_numpy(np.stack(frames)).float().div_(255.0)]
     except Exception as e:
         print(f"Error extracting video frames: {e}")
         return []
 
 def _download_text(url):
     try:
-        response = requests.get(url, timeout=30)
+        response = get_transport().get(url, timeout=30)
         response.raise_for_status()
         return response.text
     except Exception as e:
         print(f"Error downloading text: {e}")
         return ""
 
-def _download_audio(url):
-    if not AUDIO_AVAILABLE: return None
+def _download_audio(url, save_path=None):
     try:
-        import tempfile
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
-        waveform, sample_rate = torchaudio.load(tmp_path)
+        suffix = os.path.splitext(url.split("?")[0])[1] or ".wav"
+        with _downloaded(url, save_path, suffix=suffix, need_path=True) as path:
+            if not AUDIO_AVAILABLE:
+                return None
+            waveform, sample_rate = torchaudio.load(path)
 
         if waveform.shape[0] == 1: waveform = waveform.repeat(2, 1)
-        os.unlink(tmp_path)
         return {"waveform": waveform.unsqueeze(0), "sample_rate": sample_rate}
     except Exception as e:
         print(f"Error downloading audio: {e}")
@@ -388,16 +573,9 @@ def _download_audio(url):
 def _download_latent(url):
     if not SAFETENSORS_AVAILABLE: return None
     try:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status()
-        # safetensors.torch.load expects a file path, so we use a temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".safetensors") as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
-
-        latent = load(tmp_path)
-        os.unlink(tmp_path)
-        return latent
+        # Decoded from memory; compressed/downcast latents are restored
+        with _downloaded(url) as buffer:
+            return decode_latent(buffer.read())
     except Exception as e:
         print(f"Error downloading latent: {e}")
         return None
@@ -418,36 +596,9 @@ def _create_placeholder_audio():
     waveform = torch.zeros(1, 2, sample_rate, dtype=torch.float32)
     return {"waveform": waveform, "sample_rate": sample_rate}
 
-def _save_image_to_file(img_tensor, filepath):
-    try:
-        img_np = (img_tensor.squeeze(0).cpu().numpy() * 255).astype(np.uint8)
-        Image.fromarray(img_np, 'RGB').save(filepath)
-    except Exception as e:
-        print(f"Error saving image to {filepath}: {e}")
-
-
 def _create_placeholder_latent():
     # Create an empty latent structure
     return {"samples": torch.zeros(1, 4, 64, 64)}
-def _download_and_save_video(url, filepath):
-    try:
-        response = requests.get(url, timeout=120, stream=True)
-        response.raise_for_status()
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk: f.write(chunk)
-    except Exception as e:
-        print(f"Error saving video to {filepath}: {e}")
-
-def _save_audio_to_file(audio_data, filepath):
-    if not AUDIO_AVAILABLE or not audio_data: return
-    try:
-        waveform = audio_data.get("waveform").squeeze(0)
-        sample_rate = audio_data.get("sample_rate", 44100)
-        torchaudio.save(filepath, waveform, sample_rate)
-    except Exception as e:
-        print(f"Error saving audio to {filepath}: {e}")
-
 
 
 class RH_ImageSelector:
@@ -554,7 +705,12 @@ def _validate_config(config):
 def get_task_status(config, task_id):
     """
     Gets the current status of a single task without waiting.
+    Uses the task monitor's last known status when the task is being tracked.
     """
+    known_status = get_task_monitor().get_status(task_id)
+    if known_status is not None:
+        return known_status
+
     api_key = config["api_key"]
     base_url = config["base_url"]
     return _check_task_status(task_id, api_key, base_url)
@@ -571,7 +727,7 @@ def cancel_task(config, task_id):
         "apiKey": api_key
     }
     try:
-        response = requests.post(url, json=payload, timeout=20)
+        response = get_transport(base_url).post(url, json=payload, timeout=20)
         response.raise_for_status()
         result = response.json()
         if result.get("code") == 0:
@@ -0,0 +1,317 @@
+"""
+RH Video Encoder - Encode IMAGE batches into a video file and shrink videos before upload
+Uses ffmpeg (H.264 / VP9 with a CRF quality target) when it is on PATH, OpenCV's VideoWriter otherwise
+"""
+
+import os
+import json
+import shutil
+import subprocess
+
+import numpy as np
+
+from .rh_tensor_convert import image_batch_to_uint8
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFPROBE_PATH = shutil.which("ffprobe")
+
+VIDEO_FORMATS = ["mp4", "webm"]
+DEFAULT_VIDEO_QUALITY = 80
+# Frames converted to uint8 per step, so long batches are never copied whole
+FRAME_CHUNK = 16
+
+# format -> (file extension, content type)
+VIDEO_FORMAT_INFO = {
+    "mp4": (".mp4", "video/mp4"),
+    "webm": (".webm", "video/webm"),
+}
+
+# format -> (ffmpeg codec arguments, CRF at quality 0, CRF at quality 100)
+_FFMPEG_CODECS = {
+    "mp4": (["-c:v", "libx264", "-preset", "veryfast", "-movflags", "+faststart"], 40, 12),
+    "webm": (["-c:v", "libvpx-vp9", "-b:v", "0", "-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1"], 55, 15),
+}
+
+_OPENCV_FOURCC = {
+    "mp4": "mp4v",
+    "webm": "VP80",
+}
+
+
+def video_backend():
+    """Name of the backend encode_frames_to_video will use, or None if neither is available"""
+    if FFMPEG_PATH:
+        return "ffmpeg"
+    if CV2_AVAILABLE:
+        return "opencv"
+    return None
+
+
+def quality_to_crf(video_format, quality):
+    """Map a 0-100 quality to the codec's CRF scale (higher quality, lower CRF)"""
+    _, worst, best = _FFMPEG_CODECS[video_format]
+    quality = min(max(int(quality), 0), 100)
+    return round(worst + (best - worst) * quality / 100)
+
+
+def _frame_chunks(images):
+    """uint8 RGB frames [n, H, W, 3] in chunks of FRAME_CHUNK, cropped to even dimensions for yuv420p"""
+    height, width = images.shape[-3] // 2 * 2, images.shape[-2] // 2 * 2
+    for start in range(0, images.shape[0], FRAME_CHUNK):
+        chunk = image_batch_to_uint8(images[start:start + FRAME_CHUNK])[:, :height, :width]
+        if chunk.shape[-1] == 1:
+            chunk = np.repeat(chunk, 3, axis=-1)
+        yield np.ascontiguousarray(chunk[..., :3])
+
+
+def _encode_ffmpeg(images, path, fps, video_format, quality):
+    height, width = images.shape[-3] // 2 * 2, images.shape[-2] // 2 * 2
+    codec_args, _, _ = _FFMPEG_CODECS[video_format]
+    command = [
+        FFMPEG_PATH, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", f"{fps:g}", "-i", "-",
+        "-an", *codec_args, "-crf", str(quality_to_crf(video_format, quality)), "-pix_fmt", "yuv420p",
+        path,
+    ]
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for chunk in _frame_chunks(images):
+            process.stdin.write(memoryview(chunk).cast("B"))
+    except BrokenPipeError:
+        pass
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise Exception(f"ffmpeg failed to encode video: {stderr.decode('utf-8', 'replace').strip()}")
+
+
+def _encode_opencv(images, path, fps, video_format, quality):
+    height, width = images.shape[-3] // 2 * 2, images.shape[-2] // 2 * 2
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*_OPENCV_FOURCC[video_format]), fps, (width, height))
+    if not writer.isOpened():
+        raise Exception(f"OpenCV cannot write {video_format} video (codec {_OPENCV_FOURCC[video_format]} unavailable)")
+    try:
+        # Honoured by backends that support it (ignored otherwise)
+        writer.set(cv2.VIDEOWRITER_PROP_QUALITY, int(quality))
+        for chunk in _frame_chunks(images):
+            for frame in chunk:
+                writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+
+
+def encode_frames_to_video(images, path, fps=24.0, video_format="mp4", quality=DEFAULT_VIDEO_QUALITY):
+    """
+    Encode an IMAGE batch [B, H, W, C] into a video file.
+
+    Frames are converted and sent to the encoder a chunk at a time. Odd
+    widths/heights are cropped by one pixel, as yuv420p requires even sizes.
+
+    Args:
+        images: IMAGE tensor, one frame per batch entry
+        path: Output file path (extension should match video_format)
+        fps: Frame rate of the video
+        video_format: "mp4" (H.264, mp4v with OpenCV) or "webm" (VP9, VP8 with OpenCV)
+        quality: 0-100, mapped to CRF with ffmpeg
+
+    Returns:
+        str: Name of the backend used
+    """
+    if images.ndim == 3:
+        images = images.unsqueeze(0)
+    if images.shape[-3] < 2 or images.shape[-2] < 2:
+        raise ValueError(f"Frames are too small to encode as video: {tuple(images.shape)}")
+    backend = video_backend()
+    if backend == "ffmpeg":
+        _encode_ffmpeg(images, path, fps, video_format, quality)
+    elif backend == "opencv":
+        _encode_opencv(images, path, fps, video_format, quality)
+    else:
+        raise Exception("Encoding frames to video needs ffmpeg on PATH or opencv-python")
+    return backend
+
+
+def probe_video(path):
+    """
+    Read the size, frame rate and duration of a video file.
+
+    Returns:
+        dict | None: {"width", "height", "fps", "duration", "bitrate_kbps"}, None if it cannot be read
+    """
+    info = None
+    if CV2_AVAILABLE:
+        cap = cv2.VideoCapture(path)
+        try:
+            if cap.isOpened():
+                fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+                frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+                info = {
+                    "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    "fps": fps,
+                    "duration": frames / fps if fps else 0.0,
+                }
+        finally:
+            cap.release()
+    elif FFPROBE_PATH:
+        result = subprocess.run(
+            [FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-show_entries",
+             "stream=width,height,avg_frame_rate:format=duration", "-of", "json", path],
+            capture_output=True
+        )
+        if result.returncode == 0:
+            data = json.loads(result.stdout or b"{}")
+            stream = (data.get("streams") or [{}])[0]
+            num, _, den = str(stream.get("avg_frame_rate", "0/1")).partition("/")
+            info = {
+                "width": int(stream.get("width") or 0),
+                "height": int(stream.get("height") or 0),
+                "fps": float(num) / float(den or 1) if float(den or 1) else 0.0,
+                "duration": float((data.get("format") or {}).get("duration") or 0.0),
+            }
+    if not info or not info["width"] or not info["height"]:
+        return None
+    info["bitrate_kbps"] = os.path.getsize(path) * 8 / 1000 / info["duration"] if info["duration"] else 0.0
+    return info
+
+
+def plan_transcode(info, max_resolution=0, max_fps=0.0, trim_start=0.0, trim_end=0.0, max_bitrate_kbps=0):
+    """
+    Work out what a video needs to fit the limits; None if it already fits.
+
+    Args:
+        info: Result of probe_video
+        max_resolution: Limit for the shorter side, like "720p" (0 = keep)
+        max_fps: Frame rate cap (0 = keep)
+        trim_start, trim_end: Seconds to keep (trim_end 0 = until the end)
+        max_bitrate_kbps: Video bitrate cap (0 = keep)
+
+    Returns:
+        dict | None: {"width", "height", "fps" (0 = keep), "start", "duration" (0 = until the end),
+                      "max_bitrate_kbps" (0 = no cap), "reasons"}
+    """
+    reasons = []
+    # yuv420p needs even dimensions
+    width, height = max(2, info["width"] // 2 * 2), max(2, info["height"] // 2 * 2)
+    if max_resolution and min(width, height) > max_resolution:
+        scale = max_resolution / min(info["width"], info["height"])
+        width, height = max(2, int(info["width"] * scale) // 2 * 2), max(2, int(info["height"] * scale) // 2 * 2)
+        reasons.append(f"{info['width']}x{info['height']} -> {width}x{height}")
+    fps = 0.0
+    if max_fps and info["fps"] > max_fps + 0.01:
+        fps = float(max_fps)
+        reasons.append(f"{info['fps']:.3g} -> {fps:g} fps")
+    start = max(float(trim_start or 0.0), 0.0)
+    end = float(trim_end or 0.0)
+    if info["duration"] and end >= info["duration"]:
+        end = 0.0
+    if end and end <= start:
+        raise ValueError(f"trim_end ({end:g}s) must be after trim_start ({start:g}s)")
+    if start or end:
+        reasons.append(f"trim {start:g}s-{f'{end:g}s' if end else 'end'}")
+    bitrate = 0
+    if max_bitrate_kbps and info["bitrate_kbps"] > max_bitrate_kbps:
+        bitrate = int(max_bitrate_kbps)
+        reasons.append(f"{info['bitrate_kbps']:.0f} -> {bitrate} kbps")
+    if not reasons:
+        return None
+    return {
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "start": start,
+        "duration": end - start if end else 0.0,
+        "max_bitrate_kbps": bitrate,
+        "reasons": reasons,
+    }
+
+
+def _transcode_ffmpeg(path, out_path, plan, video_format, quality):
+    codec_args, _, _ = _FFMPEG_CODECS[video_format]
+    command = [FFMPEG_PATH, "-y", "-loglevel", "error"]
+    if plan["start"]:
+        command += ["-ss", f"{plan['start']:g}"]
+    command += ["-i", path]
+    if plan["duration"]:
+        command += ["-t", f"{plan['duration']:g}"]
+    filters = [f"scale={plan['width']}:{plan['height']}:flags=area"]
+    if plan["fps"]:
+        filters.append(f"fps={plan['fps']:g}")
+    command += ["-vf", ",".join(filters), *codec_args,
+                "-crf", str(quality_to_crf(video_format, quality)), "-pix_fmt", "yuv420p"]
+    if plan["max_bitrate_kbps"]:
+        if video_format == "webm":
+            # libvpx-vp9 ignores -maxrate with -b:v 0 (pure CRF); a target bitrate turns on
+            # constrained quality, where the bitrate is the ceiling
+            index = command.index("-b:v")
+            command[index + 1] = f"{plan['max_bitrate_kbps']}k"
+        else:
+            # Capped CRF: quality target, but never above the bitrate limit
+            command += ["-maxrate", f"{plan['max_bitrate_kbps']}k", "-bufsize", f"{plan['max_bitrate_kbps'] * 2}k"]
+    command += ["-c:a", "libopus" if video_format == "webm" else "aac", "-b:a", "128k", out_path]
+    result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg failed to transcode video: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+
+def _transcode_opencv(path, out_path, plan, video_format, quality):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise Exception(f"OpenCV cannot read video: {path}")
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or plan["fps"] or 24.0
+    out_fps = plan["fps"] or source_fps
+    size = (plan["width"], plan["height"])
+    writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*_OPENCV_FOURCC[video_format]), out_fps, size)
+    if not writer.isOpened():
+        cap.release()
+        raise Exception(f"OpenCV cannot write {video_format} video (codec {_OPENCV_FOURCC[video_format]} unavailable)")
+    try:
+        writer.set(cv2.VIDEOWRITER_PROP_QUALITY, int(quality))
+        if plan["start"]:
+            cap.set(cv2.CAP_PROP_POS_MSEC, plan["start"] * 1000)
+        end = plan["start"] + plan["duration"] if plan["duration"] else None
+        next_time = None
+        # One frame at a time: decode, drop to the frame rate cap, resize, encode
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if end is not None and timestamp > end:
+                break
+            if next_time is not None and timestamp + 1e-6 < next_time:
+                continue
+            next_time = (next_time if next_time is not None else timestamp) + 1 / out_fps
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            writer.write(frame)
+    finally:
+        writer.release()
+        cap.release()
+
+
+def transcode_video(path, out_path, plan, video_format="mp4", quality=DEFAULT_VIDEO_QUALITY):
+    """
+    Transcode a video file according to a plan_transcode() plan.
+
+    Decoding and encoding stream frame by frame, so the video is never held
+    in memory. ffmpeg keeps the audio track (AAC/Opus); the OpenCV fallback
+    writes video only.
+
+    Returns:
+        str: Name of the backend used
+    """
+    backend = video_backend()
+    if backend == "ffmpeg":
+        _transcode_ffmpeg(path, out_path, plan, video_format, quality)
+    elif backend == "opencv":
+        print("⚠️ ffmpeg not found, transcoding with OpenCV (the audio track is dropped)")
+        _transcode_opencv(path, out_path, plan, video_format, quality)
+    else:
+        raise Exception("Transcoding video needs ffmpeg on PATH or opencv-python")
+    return backend
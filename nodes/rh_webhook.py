@@ -0,0 +1,188 @@
+"""
+RH Webhook - Local receiver for RunningHub task completion callbacks
+Registers a route on ComfyUI's PromptServer (or a small embedded listener) and wakes waiting nodes
+"""
+
+import os
+import hmac
+import json
+import asyncio
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .rh_storage import get_data_dir, load_plugin_settings
+from .rh_task_monitor import get_task_monitor
+
+WEBHOOK_ROUTE = "/rh_api/webhook"
+DEFAULT_EMBEDDED_PORT = 8190
+_TOKEN_FILE = "webhook_token"
+# RunningHub callbacks are small JSON documents; anything larger is rejected unread
+MAX_BODY_BYTES = 1024 * 1024
+
+_embedded_server = None
+_embedded_lock = threading.Lock()
+_token = None
+_token_lock = threading.Lock()
+
+
+def _get_token():
+    """Secret that callback URLs must carry, loaded (or created) on first use"""
+    global _token
+    with _token_lock:
+        if _token is None:
+            _token = _load_token()
+        return _token
+
+
+def _token_matches(token):
+    return bool(token) and hmac.compare_digest(str(token).encode("utf-8"), _get_token().encode("utf-8"))
+
+
+def _load_token():
+    """Persisted so callback URLs of tasks still in flight survive restarts"""
+    path = os.path.join(get_data_dir(), _TOKEN_FILE)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                token = f.read().strip()
+                if token:
+                    return token
+        token = secrets.token_urlsafe(24)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(token)
+        return token
+    except Exception as e:
+        print(f"⚠️ Could not persist webhook token, using a per-process token: {e}")
+        return secrets.token_urlsafe(24)
+
+
+def handle_callback(body):
+    """
+    Process one RunningHub webhook payload.
+
+    The payload carries `taskId` and `eventData` (a JSON string in the same shape
+    as an /task/openapi/outputs response). Final results are handed straight to
+    the task monitor; anything else just triggers an immediate poll.
+
+    Returns:
+        bool: True if the payload referenced a task
+    """
+    from .rh_utils import _parse_task_result
+
+    if not isinstance(body, dict):
+        return False
+    task_id = body.get("taskId")
+    if not task_id:
+        return False
+    task_id = str(task_id)
+
+    event_data = body.get("eventData")
+    if isinstance(event_data, str):
+        try:
+            event_data = json.loads(event_data)
+        except ValueError:
+            event_data = None
+
+    monitor = get_task_monitor()
+    if isinstance(event_data, dict):
+        print(f"✓ Webhook received for task {task_id} ({body.get('event', 'event')})")
+        monitor.deliver(task_id, _parse_task_result(event_data))
+    else:
+        monitor.poke(task_id)
+    return True
+
+
+def _register_prompt_server_route():
+    try:
+        from aiohttp import web
+        from server import PromptServer
+        routes = PromptServer.instance.routes
+    except Exception:
+        return False
+
+    @routes.post(WEBHOOK_ROUTE)
+    async def rh_webhook(request):
+        if not _token_matches(request.query.get("token")):
+            return web.json_response({"code": 403, "msg": "invalid token"}, status=403)
+        try:
+            body = await request.json()
+        except Exception:
+            return web.json_response({"code": 400, "msg": "invalid body"}, status=400)
+        # Journal writes and listeners are blocking; keep them off ComfyUI's event loop
+        await asyncio.get_running_loop().run_in_executor(None, handle_callback, body)
+        return web.json_response({"code": 0, "msg": "success"})
+
+    return True
+
+
+# ComfyUI only accepts routes added while custom nodes are imported, so this cannot
+# wait until the first callback URL is requested. Registering is cheap; the token
+# file is only created once a URL is handed out.
+_ROUTE_REGISTERED = _register_prompt_server_route()
+
+
+class _EmbeddedHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        if path != WEBHOOK_ROUTE or not _token_matches(params.get("token")):
+            self.send_response(403)
+            self.end_headers()
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self.send_response(413)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            self.send_response(400)
+            self.end_headers()
+            return
+        handle_callback(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b'{"code": 0, "msg": "success"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _ensure_embedded_listener(port):
+    global _embedded_server
+    with _embedded_lock:
+        if _embedded_server is None:
+            _embedded_server = ThreadingHTTPServer(("0.0.0.0", port), _EmbeddedHandler)
+            threading.Thread(target=_embedded_server.serve_forever, name="rh-webhook", daemon=True).start()
+            print(f"✓ RH webhook listener started on port {port}")
+
+
+def get_webhook_url(config):
+    """
+    Return the callback URL to pass as `webhookUrl`, or None if webhooks are off.
+
+    Webhooks are opt-in: set `webhook_public_url` on RH_Config or in config.json
+    to the externally reachable base URL of this ComfyUI instance. Outside
+    ComfyUI an embedded listener is started on `webhook_port` instead.
+    """
+    public_url = (config.get("webhook_public_url") or "").strip()
+    if not public_url:
+        return None
+
+    if not _ROUTE_REGISTERED:
+        port = int(load_plugin_settings().get("webhook_port", DEFAULT_EMBEDDED_PORT))
+        try:
+            _ensure_embedded_listener(port)
+        except Exception as e:
+            print(f"⚠️ Could not start webhook listener, using polling only: {e}")
+            return None
+
+    return f"{public_url.rstrip('/')}{WEBHOOK_ROUTE}?token={_get_token()}"
@@ -0,0 +1,130 @@
+"""
+RH WebSocket - Optional push-based progress channel for RunningHub tasks
+Completion events wake the task monitor immediately; HTTP polling remains the fallback
+"""
+
+import json
+import time
+import threading
+
+try:
+    import websocket
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
+from .rh_task_monitor import get_task_monitor
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_STALL_TIMEOUT = 60
+PROGRESS_LOG_INTERVAL = 5
+
+# ComfyUI message types that mean the prompt has finished one way or another
+_FINISHED_TYPES = ("execution_success", "execution_error", "execution_interrupted")
+
+
+class TaskProgressChannel:
+    """
+    Listens on a task's WebSocket URL in a daemon thread.
+
+    While connected, the task monitor only polls as a safety net. On a
+    completion event the monitor is poked to fetch outputs right away. If the
+    connection fails, is blocked by a proxy, or goes silent for longer than
+    `stall_timeout`, the channel closes and the monitor resumes normal polling.
+    """
+
+    def __init__(self, task_id, wss_url, monitor=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 stall_timeout=DEFAULT_STALL_TIMEOUT):
+        self.task_id = task_id
+        self.wss_url = wss_url
+        self.monitor = monitor or get_task_monitor()
+        self.connect_timeout = connect_timeout
+        self.stall_timeout = stall_timeout
+        self._ws = None
+        self._closed = threading.Event()
+        self._thread = None
+        self._last_progress_log = 0
+
+    def start(self):
+        self.monitor.set_push_active(self.task_id, True)
+        self._thread = threading.Thread(target=self._run, name=f"rh-ws-{self.task_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._closed.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        try:
+            self._ws = websocket.create_connection(self.wss_url, timeout=self.connect_timeout)
+            # Every recv() must return within stall_timeout, otherwise we treat the channel as stalled
+            self._ws.settimeout(self.stall_timeout)
+            print(f"✓ WebSocket progress channel connected for task {self.task_id}")
+
+            while not self._closed.is_set():
+                try:
+                    message = self._ws.recv()
+                except websocket.WebSocketTimeoutException:
+                    print(f"⚠️ WebSocket silent for {self.stall_timeout}s, falling back to HTTP polling")
+                    return
+                if not message:
+                    print("⚠️ WebSocket closed by server, falling back to HTTP polling")
+                    return
+                if isinstance(message, bytes):
+                    # Binary frames are image previews; nothing to do with them here
+                    continue
+                if self._handle_message(message):
+                    return
+        except Exception as e:
+            if not self._closed.is_set():
+                print(f"⚠️ WebSocket unavailable ({e}), falling back to HTTP polling")
+        finally:
+            self.monitor.set_push_active(self.task_id, False)
+            self.close()
+
+    def _handle_message(self, message):
+        """Process one text frame; return True once the task has finished"""
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return False
+
+        msg_type = payload.get("type")
+        data = payload.get("data") or {}
+
+        if msg_type == "progress":
+            now = time.time()
+            if now - self._last_progress_log >= PROGRESS_LOG_INTERVAL:
+                print(f"  Progress: node {data.get('node')} {data.get('value')}/{data.get('max')}")
+                self._last_progress_log = now
+            return False
+
+        finished = msg_type in _FINISHED_TYPES or (msg_type == "executing" and data.get("node") is None)
+        if finished:
+            print(f"✓ WebSocket reported task {self.task_id} finished ({msg_type})")
+            self.monitor.poke(self.task_id)
+            return True
+        return False
+
+
+def start_progress_channel(task_id, wss_url, **kwargs):
+    """
+    Start a progress channel if websocket-client is installed and a URL is known.
+
+    Returns:
+        TaskProgressChannel | None: The running channel, or None when push
+        monitoring is not possible and plain HTTP polling should be used.
+    """
+    if not WEBSOCKET_AVAILABLE:
+        print("ℹ websocket-client is not installed, using HTTP polling")
+        return None
+    if not wss_url:
+        print("ℹ No WebSocket URL returned for this task, using HTTP polling")
+        return None
+    return TaskProgressChannel(task_id, wss_url, **kwargs).start()
@@ -0,0 +1,20 @@
+"""
+Test setup: make the plugin's node modules importable outside ComfyUI.
+
+The plugin root and nodes/__init__.py import every node, some of which need
+ComfyUI itself (folder_paths, comfy.utils). pytest.ini in this directory keeps
+the plugin root out of collection, and `nodes` is registered by path so each
+test imports only the module it exercises.
+"""
+
+import os
+import sys
+import types
+
+_PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "nodes" not in sys.modules:
+    _package = types.ModuleType("nodes")
+    _package.__path__ = [os.path.join(_PLUGIN_DIR, "nodes")]
+    sys.modules["nodes"] = _package
+
@@ -0,0 +1,154 @@
+"""
+TaskProgressChannel against a local WebSocket stand-in.
+
+The stand-in speaks just enough of RFC 6455 to play a scripted sequence of
+text frames (progress, completion) and then stall or disconnect.
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("websocket")
+
+from nodes.rh_websocket import TaskProgressChannel
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class LocalWebSocketServer:
+    """Accepts one connection and plays `script`: ("send", dict), ("sleep", s) or ("close",)"""
+
+    def __init__(self, script):
+        self.script = script
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self._sock.getsockname()[1]}/ws"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._sock.close()
+        self._thread.join(timeout=5)
+
+    def _serve(self):
+        try:
+            conn, _ = self._sock.accept()
+        except OSError:
+            return
+        with conn:
+            request = b""
+            while b"\r\n\r\n" not in request:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+            key = next(line.split(":", 1)[1].strip() for line in request.decode("latin-1").split("\r\n")
+                       if line.lower().startswith("sec-websocket-key:"))
+            accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+            conn.sendall(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("ascii"))
+
+            for step in self.script:
+                if step[0] == "send":
+                    conn.sendall(self._text_frame(json.dumps(step[1])))
+                elif step[0] == "sleep":
+                    time.sleep(step[1])
+                elif step[0] == "close":
+                    conn.sendall(b"\x88\x00")
+                    return
+            # Script done without closing: stay connected but silent
+            self._stop.wait(timeout=10)
+
+    @staticmethod
+    def _text_frame(text):
+        payload = text.encode("utf-8")
+        if len(payload) < 126:
+            header = struct.pack("!BB", 0x81, len(payload))
+        else:
+            header = struct.pack("!BBH", 0x81, 126, len(payload))
+        return header + payload
+
+
+class RecordingMonitor:
+    """Stands in for TaskMonitor and records what the channel tells it"""
+
+    def __init__(self):
+        self.calls = []
+        self.push_off = threading.Event()
+
+    def set_push_active(self, task_id, active):
+        self.calls.append(("push_active", task_id, active))
+        if not active:
+            self.push_off.set()
+
+    def poke(self, task_id):
+        self.calls.append(("poke", task_id))
+
+
+def _progress(value, maximum=20):
+    return {"type": "progress", "data": {"node": "3", "value": value, "max": maximum}}
+
+
+def _run_channel(script, stall_timeout=5.0):
+    monitor = RecordingMonitor()
+    with LocalWebSocketServer(script) as server:
+        channel = TaskProgressChannel("task-1", server.url, monitor=monitor,
+                                      connect_timeout=2, stall_timeout=stall_timeout).start()
+        assert monitor.push_off.wait(timeout=10), "channel never handed back to polling"
+        channel.close()
+    return monitor.calls
+
+
+def test_completion_pokes_monitor():
+    calls = _run_channel([
+        ("send", _progress(1)),
+        ("send", _progress(20)),
+        ("send", {"type": "executing", "data": {"node": None, "prompt_id": "p"}}),
+    ])
+    assert calls == [("push_active", "task-1", True), ("poke", "task-1"), ("push_active", "task-1", False)]
+
+
+def test_execution_error_pokes_monitor():
+    calls = _run_channel([("send", {"type": "execution_error", "data": {"node_id": "3"}})])
+    assert ("poke", "task-1") in calls
+
+
+def test_stall_falls_back_to_polling():
+    started = time.time()
+    calls = _run_channel([("send", _progress(1))], stall_timeout=0.5)
+    assert calls == [("push_active", "task-1", True), ("push_active", "task-1", False)]
+    assert time.time() - started < 5
+
+
+def test_disconnect_falls_back_to_polling():
+    calls = _run_channel([("send", _progress(1)), ("close",)])
+    assert calls == [("push_active", "task-1", True), ("push_active", "task-1", False)]
+
+
+def test_unreachable_server_falls_back_to_polling():
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    monitor = RecordingMonitor()
+    TaskProgressChannel("task-1", f"ws://127.0.0.1:{port}/ws", monitor=monitor, connect_timeout=2).start()
+    assert monitor.push_off.wait(timeout=10)
+    assert ("poke", "task-1") not in monitor.calls